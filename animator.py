@@ -0,0 +1,147 @@
+'''
+Filename: animator.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Non blocking, timer driven scroll/animation engine for the 4 digit tm1637 display
+Version: 1.0
+
+Default Pinout:
+- none, drives the write function it is given
+
+Dependencies:
+- none (frames are built from a tm1637 instance's encode_string)
+
+Usage:
+- anim = Animator(write, done=None)
+    write = function taking 4 segment bytes, e.g. tm.write or compositor.writer(slot)
+    done = optional function called when playback stops (finished or cancelled) with nothing queued
+- anim.play(frames, period, loop=False)
+    frames = bytearray of 4 segment bytes per frame, period = ms per frame,
+    replaces whatever is playing (and drops anything queued)
+- anim.then(frames, period, loop=False)
+    play after the current animation finishes, or now if idle, one job can wait
+- anim.cancel(notify=True) stops and drops everything, calls done unless notify=False
+- anim.busy() -> True while an animation is playing
+- scroll_frames(tm, string) -> frames that scroll string right to left across the display
+- SPINNER -> boot loader spinner frames (segments chase around the digits)
+
+Notes:
+- one Timer drives every animation, each tick copies one precomputed frame into a reused
+    4 byte buffer and writes it, nothing is allocated per frame
+- frames are built once when an animation is requested, not while it runs
+- last frame of a one shot animation stays on the display until something else writes or done clears it
+'''
+
+'''----------------------------imports----------------------------------------'''
+from machine import Timer
+
+'''------------------------------Frames---------------------------------------'''
+def scroll_frames(tm, string):
+    # same windows tm.scroll() shows: blank, text sliding in from the right, blank
+    segments = tm.encode_string(string)
+    n = len(segments)
+    data = bytearray(n + 8)
+    data[4:4 + n] = segments
+    frames = bytearray(4 * (n + 5))
+    for i in range(n + 5):
+        frames[4 * i:4 * i + 4] = data[i:i + 4]
+    return frames
+
+def spinner_frames():
+    # one segment lit on every digit, colon (MSB of the 2nd digit) kept off
+    frames = bytearray(32)
+    for i in range(8):
+        seg = 1 << i
+        frames[4 * i] = seg
+        frames[4 * i + 1] = seg & 0b01111111
+        frames[4 * i + 2] = seg
+        frames[4 * i + 3] = seg
+    return frames
+
+SPINNER = spinner_frames()
+
+'''------------------------------Animator-------------------------------------'''
+class Animator:
+    __slots__ = ('write', 'done', 'timer', 'tick_cb', 'out', 'frames', 'count', 'index', 'loop',
+                 'next_frames', 'next_period', 'next_loop')
+
+    def __init__(self, write, done=None):
+        self.write = write
+        self.done = done
+        self.timer = Timer(-1)
+        self.tick_cb = self._tick  #bound once so starting an animation doesn't allocate
+        self.out = bytearray(4)  #frame handed to write, reused every tick
+        self.frames = None  #playing frames, None = idle
+        self.count = 0
+        self.index = 0
+        self.loop = False
+        self.next_frames = None  #queued job
+        self.next_period = 0
+        self.next_loop = False
+
+    def busy(self):
+        return self.frames is not None
+
+    def play(self, frames, period, loop=False):
+        self.next_frames = None
+        self._start(frames, period, loop)
+
+    def then(self, frames, period, loop=False):
+        if self.frames is None:
+            self._start(frames, period, loop)
+        else:
+            self.next_frames = frames
+            self.next_period = period
+            self.next_loop = loop
+
+    def cancel(self, notify=True):
+        self.timer.deinit()
+        self.next_frames = None
+        if self.frames is not None:
+            self.frames = None
+            if notify and self.done:
+                self.done()
+
+    def _start(self, frames, period, loop):
+        self.timer.deinit()
+        self.frames = frames
+        self.count = len(frames) >> 2
+        self.index = 0
+        self.loop = loop
+        self._show()  #first frame now, the rest on the timer
+        if self.count > 1 or loop:
+            self.timer.init(period=period, mode=Timer.PERIODIC, callback=self.tick_cb)
+        else:
+            self._done()
+
+    def _tick(self, timer):
+        if self.frames is None:  #cancelled between ticks
+            return
+        i = self.index + 1
+        if i >= self.count:
+            if not self.loop:
+                self._done()
+                return
+            i = 0
+        self.index = i
+        self._show()
+
+    def _done(self):
+        self.timer.deinit()
+        self.frames = None
+        if self.next_frames is not None:
+            frames = self.next_frames
+            self.next_frames = None
+            self._start(frames, self.next_period, self.next_loop)
+        elif self.done:
+            self.done()
+
+    def _show(self):
+        frames = self.frames
+        out = self.out
+        o = self.index << 2
+        out[0] = frames[o]
+        out[1] = frames[o + 1]
+        out[2] = frames[o + 2]
+        out[3] = frames[o + 3]
+        self.write(out)
@@ -0,0 +1,48 @@
+'''
+Filename: bootprof.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Boot profiler, ticks_us timing of each boot stage printed over serial
+Version: 1.0
+
+Default Pinout:
+- none
+
+Dependencies:
+- none
+
+Usage:
+- import bootprof first thing in main.py, time zero is when it is imported
+- bootprof.stage(name) marks the end of a stage (time since the previous mark)
+- bootprof.report() prints every stage and the total, bootprof.total_us() for the total
+
+Notes:
+- up to MAX_STAGES marks, later ones are ignored
+- stage times include everything that ran in between, imports, callbacks, awaits
+'''
+
+'''----------------------------imports----------------------------------------'''
+from array import array
+from time import ticks_us, ticks_diff
+
+'''------------------------------Setup----------------------------------------'''
+MAX_STAGES = 16
+t0 = ticks_us()
+marks = array('i', (0 for _ in range(MAX_STAGES)))  #us since t0 at each mark
+names = []
+
+'''-------------------------------Stages--------------------------------------'''
+def stage(name):
+    if len(names) < MAX_STAGES:
+        marks[len(names)] = ticks_diff(ticks_us(), t0)
+        names.append(name)
+
+def total_us():
+    return marks[len(names) - 1] if names else 0
+
+def report():
+    prev = 0
+    for i in range(len(names)):
+        print(f"Boot {names[i]}: {marks[i] - prev}us (at {marks[i] // 1000}ms)")
+        prev = marks[i]
+    print(f"Boot total: {total_us() // 1000}ms")
@@ -0,0 +1,57 @@
+'''
+Filename: brightness.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Perceptual brightness steps to PWM duty lookup table
+Version: 1.0
+
+Default Pinout:
+- none
+
+Dependencies:
+- none
+
+Usage:
+- build_table(steps, invert, gamma=None)
+    returns array('H') of steps+1 duty_u16 values, index 0 = off, index steps = full on
+    gamma=None -> CIE 1931 lightness curve, gamma=2.2 (etc) -> plain power curve
+    invert=1 -> values are already inverted for the mosfet driven dimming input
+- percent(step)
+    integer percent 0-100 for a step, for the display
+
+Notes:
+- float math only runs once while the table is built at import/boot,
+    everything that indexes the table afterwards is integer only
+- brightness levels everywhere else (pwm_light thresholds, ir presets) are step indexes 0-STEPS
+'''
+
+'''----------------------------imports----------------------------------------'''
+from array import array
+
+'''------------------------------Setup----------------------------------------'''
+STEPS = 100  #number of perceptual steps above off
+MAX_DUTY = 65535
+
+'''-----------------------------Build Table-----------------------------------'''
+# CIE 1931 lightness (0-100) to relative luminance (0-1)
+def cie_luminance(lightness):
+    if lightness > 8:
+        return ((lightness + 16) / 116) ** 3
+    return lightness / 903.3
+
+def build_table(steps=STEPS, invert=0, gamma=None):
+    table = array('H', (0 for _ in range(steps + 1)))
+    for i in range(steps + 1):
+        if gamma is None:
+            y = cie_luminance(100 * i / steps)
+        else:
+            y = (i / steps) ** gamma
+        duty = int(y * MAX_DUTY + 0.5)
+        if invert == 1:
+            duty = MAX_DUTY - duty
+        table[i] = duty
+    return table
+
+'''-------------------------------Percent-------------------------------------'''
+def percent(step, steps=STEPS):
+    return step * 100 // steps
@@ -0,0 +1,122 @@
+'''
+Filename: compositor.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Owns the 4 digit display, shows the highest priority live message and times messages out
+Version: 1.0
+
+Default Pinout:
+- none, drives the write function it is given
+
+Dependencies:
+- none
+
+Usage:
+- comp = Compositor(write)
+    write = function taking 4 segment bytes, e.g. tm.write
+- comp.post(slot, segments, ttl_ms=0)
+    slot = priority (P_INFO..P_WARN, higher wins), segments = up to 4 segment bytes,
+    ttl_ms = time before the message drops out, 0 = stays until cleared, reposting restarts the ttl
+- comp.clear(slot) drops a message, the next highest live one (or blank) shows
+- comp.writer(slot) -> write function that posts to slot, for the animator
+- comp.top() -> slot being shown, -1 = blank
+- comp.timed() -> True while a message with a ttl is live (expiry timer armed)
+
+Notes:
+- one slot per kind of message, a new message replaces the old one in its slot
+- one reused one shot Timer is armed for the nearest expiry, no timer per message
+- a lower priority post updates its slot but doesn't touch the display until it is on top
+'''
+
+'''----------------------------imports----------------------------------------'''
+from array import array
+from time import ticks_ms, ticks_add, ticks_diff
+from machine import Timer
+
+'''------------------------------Setup----------------------------------------'''
+P_INFO = 0    #background readings, temperature
+P_BRIGHT = 1  #brightness changes
+P_BOOT = 2    #boot status, spinner, scrolling
+P_WARN = 3    #battery warnings
+SLOTS = 4
+
+'''-----------------------------Compositor------------------------------------'''
+class Compositor:
+    __slots__ = ('write', 'timer', 'tick_cb', 'frames', 'live', 'expires', 'shown', 'blank')
+
+    def __init__(self, write, slots=SLOTS):
+        self.write = write
+        self.timer = Timer(-1)
+        self.tick_cb = self._expire  #bound once so arming the timer doesn't allocate
+        self.frames = [bytearray(4) for _ in range(slots)]
+        self.live = bytearray(slots)  #1 = slot has a message
+        self.expires = array('i', (0 for _ in range(slots)))  #ticks_ms, only used if live == 2
+        self.shown = -1  #slot on the display, -1 = blank
+        self.blank = bytearray(4)
+
+    def post(self, slot, segments, ttl_ms=0):
+        frame = self.frames[slot]
+        n = len(segments)
+        for i in range(4):
+            frame[i] = segments[i] if i < n else 0
+        if ttl_ms > 0:
+            self.live[slot] = 2  #2 = live with a timeout
+            self.expires[slot] = ticks_add(ticks_ms(), ttl_ms)
+        else:
+            self.live[slot] = 1
+        self._render()
+
+    def clear(self, slot):
+        if self.live[slot]:
+            self.live[slot] = 0
+            self._render()
+
+    def writer(self, slot):
+        def write(segments):
+            self.post(slot, segments)
+        return write
+
+    def top(self):
+        return self.shown
+
+    def timed(self):
+        # True while any message is waiting to time out (expiry timer armed)
+        for state in self.live:
+            if state == 2:
+                return True
+        return False
+
+    def _expire(self, timer):
+        now = ticks_ms()
+        live = self.live
+        for slot in range(len(live)):
+            if live[slot] == 2 and ticks_diff(self.expires[slot], now) <= 0:
+                live[slot] = 0
+        self._render()
+
+    def _render(self):
+        live = self.live
+        top = -1
+        for slot in range(len(live) - 1, -1, -1):
+            if live[slot]:
+                top = slot
+                break
+        self.shown = top
+        self.write(self.frames[top] if top >= 0 else self.blank)
+        self._arm()
+
+    def _arm(self):
+        # one shot timer for the nearest expiry, any live slot can time out under the top one
+        now = ticks_ms()
+        wait = 0
+        armed = False
+        live = self.live
+        for slot in range(len(live)):
+            if live[slot] == 2:
+                d = ticks_diff(self.expires[slot], now)
+                if not armed or d < wait:
+                    wait = d
+                    armed = True
+        self.timer.deinit()
+        if armed:
+            self.timer.init(period=wait if wait > 0 else 1, mode=Timer.ONE_SHOT, callback=self.tick_cb)
@@ -0,0 +1,305 @@
+'''
+Filename: datalog.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Binary datalogger, fixed size records in a RAM ring flushed as whole 512 byte blocks to a pre-sized file
+Version: 1.0
+
+Default Pinout:
+- none, writes to a file (SD card mounted by main)
+
+Dependencies:
+- none
+
+Usage:
+- log = Logger(path, blocks=2048, ram_blocks=4, max_flush=4)
+    path = log file (created and pre-sized to blocks * 512 bytes if missing or a different size),
+    ram_blocks = blocks of records buffered in RAM, max_flush = most blocks written per flush()
+- log.record(ma, mv, mw, duty, temp_c10, hum10, lat=0, lon=0, fix=0, sats=0) -> False if RAM is full
+    packs one record stamped with ticks_ms straight into the ring, no allocation, no file access
+- log.flush() from a scheduler task, writes finished blocks then the partly filled one, then syncs
+- log.close()
+- log.pending() -> records in RAM not on disk yet (lost on a power cut)
+- log.used() -> bytes of the file holding data (header + blocks started, the whole file once it wraps)
+- log.stats() -> (records, dropped, blocks written, flushes, last flush us, max flush us)
+- scan(path, blocks=2048) -> (records, used bytes) of a log an earlier boot left, None if there isn't one,
+    same search as the recovery below without opening it for writing, for closing out its session
+- read(path) -> records (tuples in FIELDS order) oldest first, for host tools
+
+File layout:
+- block 0: file header FILE_FORMAT (magic, version, record size, records per block, blocks, file id)
+- blocks 1..: BLOCK_FORMAT header (magic, version, records used, file id, seq) in the first 32 bytes,
+    then RECORDS records of RECORD_FORMAT, block seq n lives at block 1 + n % (blocks - 1) so the
+    file is a ring that overwrites the oldest data once full
+
+Notes:
+- record() and flush() both run in main context (scheduler tasks), so they never interleave,
+    records can't come from irqs/callbacks
+- every write is whole blocks at block aligned offsets, so FAT never has to read-modify-write a sector,
+    a flush is at most max_flush + 1 block writes and one sync, the light's callbacks run on either side
+- power loss recovery: on open the last written block is found by binary search on block seq
+    (log2(blocks) header reads, no scan), its records are loaded back into RAM and logging carries on
+    filling it, so at most the records since the last flush are lost, main logs each boot to a new
+    file so it doesn't reopen one, it uses scan() at boot to find where the last boot's log ended
+- blocks only count if magic and file id match, so stale data in a re-created file can't be mistaken
+    for ours
+- temp/humidity None is logged as TEMP_NONE/HUM_NONE, lat/lon are degrees * 1e6, fix 0 = no gps fix
+'''
+
+'''----------------------------imports----------------------------------------'''
+import os
+import struct
+from time import ticks_ms, ticks_us, ticks_diff
+from micropython import const
+
+'''------------------------------Setup----------------------------------------'''
+BLOCK = const(512)
+HEADER = const(32) #bytes at the start of each data block
+RECORD = const(32) #bytes per record
+RECORDS = const(15) #records per block, (512 - 32) // 32
+FILE_MAGIC = const(0x464B) #"KF"
+BLOCK_MAGIC = const(0x4C4B) #"KL"
+VERSION = const(1)
+TEMP_NONE = const(-32768)
+HUM_NONE = const(0xFFFF)
+
+FILE_FORMAT = "<HHHHII" #magic, version, record size, records per block, blocks, file id
+BLOCK_FORMAT = "<HBBII" #magic, version, records used, file id, seq
+RECORD_FORMAT = "<IhHIHhHiiBB4x" #see FIELDS
+FIELDS = ('ms', 'ma', 'mv', 'mw', 'duty', 'temp_c10', 'hum10', 'lat', 'lon', 'fix', 'sats')
+
+'''-------------------------------Logger--------------------------------------'''
+class Logger:
+    __slots__ = ('path', 'blocks', 'ram_blocks', 'max_flush', 'f', 'ring', 'mv', 'hdr', 'file_id',
+                 'head', 'tail', 'count', 'written', 'seq', 'records', 'dropped', 'writes',
+                 'flushes', 'last_us', 'max_us')
+
+    def __init__(self, path, blocks=2048, ram_blocks=4, max_flush=4):
+        self.path = path
+        self.blocks = blocks
+        self.ram_blocks = ram_blocks
+        self.max_flush = max_flush
+        self.ring = bytearray(ram_blocks * BLOCK)
+        self.mv = memoryview(self.ring)
+        self.hdr = bytearray(HEADER) #header reads during recovery
+        self.head = 0 #RAM block being filled
+        self.tail = 0 #oldest RAM block not written yet
+        self.count = 0 #records in the head block
+        self.written = 0 #records of the tail block already on disk
+        self.records = 0
+        self.dropped = 0
+        self.writes = 0
+        self.flushes = 0
+        self.last_us = 0
+        self.max_us = 0
+        self.f = None
+        self._open()
+
+    '''-------------------------------Open------------------------------------'''
+    def _open(self):
+        try:
+            f = open(self.path, "r+b")
+        except OSError:
+            f = None
+        if f is not None:
+            f.readinto(self.hdr)
+            magic, version, size, per, blocks, file_id = struct.unpack_from(FILE_FORMAT, self.hdr)
+            if (magic, version, size, per, blocks) == (FILE_MAGIC, VERSION, RECORD, RECORDS, self.blocks):
+                self.f = f
+                self.file_id = file_id
+                self._recover()
+                return
+            f.close()
+        self._create()
+
+    def _create(self):
+        self.file_id = int.from_bytes(os.urandom(4), 'little') & 0x3fffffff
+        f = open(self.path, "wb")
+        head = self.mv[0:BLOCK] #ring is still empty, use its first block as the header block
+        struct.pack_into(FILE_FORMAT, head, 0, FILE_MAGIC, VERSION, RECORD, RECORDS, self.blocks, self.file_id)
+        f.write(head)
+        head[0:HEADER] = bytes(HEADER)
+        f.seek((self.blocks - 1) * BLOCK) #pre-size, clusters are allocated once here
+        f.write(head)
+        f.close()
+        self.f = open(self.path, "r+b")
+        self.seq = 0
+        self._start_block(0)
+
+    def _recover(self):
+        lo = _newest(self.f, self.hdr, self.blocks, self.file_id)
+        if lo < 0: #nothing logged yet
+            self.seq = 0
+            self._start_block(0)
+            return
+        f = self.f
+        f.seek(lo * BLOCK)
+        f.readinto(self.mv[0:BLOCK])
+        _, _, count, _, seq = struct.unpack_from(BLOCK_FORMAT, self.ring)
+        self.seq = seq
+        self.head = self.tail = 0
+        self.count = self.written = count #carry on filling it, record() moves on if it was full
+
+    def _advance(self):
+        # head block is full, start the next one, False if RAM is full (flush is behind)
+        head = self.head
+        nb = (head + 1) % self.ram_blocks
+        if nb == self.tail:
+            return False
+        if self.tail == head and self.written == RECORDS: #already on disk, nothing left to flush
+            self.tail = nb
+            self.written = 0
+        self.seq += 1
+        self._start_block(nb)
+        return True
+
+    def _start_block(self, b):
+        struct.pack_into(BLOCK_FORMAT, self.ring, b * BLOCK, BLOCK_MAGIC, VERSION, 0, self.file_id, self.seq)
+        self.head = b
+        self.count = 0
+
+    '''------------------------------Record-----------------------------------'''
+    def record(self, ma, mv, mw, duty, temp_c10, hum10, lat=0, lon=0, fix=0, sats=0):
+        if self.count >= RECORDS and not self._advance():
+            self.dropped += 1
+            return False
+        count = self.count
+        struct.pack_into(RECORD_FORMAT, self.ring, self.head * BLOCK + HEADER + count * RECORD,
+                         ticks_ms(), ma, mv, mw, duty,
+                         TEMP_NONE if temp_c10 is None else temp_c10,
+                         HUM_NONE if hum10 is None else hum10, lat, lon, fix, sats)
+        count += 1
+        self.count = count
+        self.ring[self.head * BLOCK + 3] = count
+        self.records += 1
+        if count == RECORDS: #move on now if there's room, else the next record() retries
+            self._advance()
+        return True
+
+    '''-------------------------------Flush-----------------------------------'''
+    def _pos(self, seq):
+        return 1 + seq % (self.blocks - 1)
+
+    def _write(self, b, n, seq):
+        # n RAM blocks from b, disk blocks from seq, both contiguous
+        f = self.f
+        f.seek(self._pos(seq) * BLOCK)
+        f.write(self.mv[b * BLOCK:(b + n) * BLOCK])
+        self.writes += n
+
+    def flush(self):
+        t = ticks_us()
+        rb = self.ram_blocks
+        budget = self.max_flush
+        head = self.head
+        dirty = 0
+        # seq of the tail block, blocks in RAM are consecutive seqs ending at the head's
+        seq = self.seq - ((head - self.tail) % rb)
+        while self.tail != head and budget:
+            b = self.tail
+            n = 1
+            while b + n < rb and b + n != head and n < budget \
+                    and self._pos(seq + n) == self._pos(seq) + n:
+                n += 1
+            self._write(b, n, seq)
+            self.tail = (b + n) % rb
+            self.written = 0
+            seq += n
+            budget -= n
+            dirty = 1
+        if self.tail == head and self.count != self.written and budget:
+            self._write(head, 1, self.seq) #partial tail, rewritten as it fills
+            self.written = self.count
+            dirty = 1
+        if dirty:
+            self.f.flush()
+            self.flushes += 1
+            t = ticks_diff(ticks_us(), t)
+            self.last_us = t
+            if t > self.max_us:
+                self.max_us = t
+
+    def close(self):
+        if self.f is not None:
+            self.flush()
+            self.f.close()
+            self.f = None
+
+    def pending(self):
+        return ((self.head - self.tail) % self.ram_blocks) * RECORDS + self.count - self.written
+
+    def used(self):
+        return _used(self.seq, self.blocks)
+
+    def stats(self):
+        return self.records, self.dropped, self.writes, self.flushes, self.last_us, self.max_us
+
+'''-------------------------------Search--------------------------------------'''
+def _seq_at(f, hdr, pos, file_id):
+    # seq of the data block at pos, -1 if it isn't one of ours
+    f.seek(pos * BLOCK)
+    f.readinto(hdr)
+    magic, version, _, fid, seq = struct.unpack_from(BLOCK_FORMAT, hdr)
+    if magic != BLOCK_MAGIC or version != VERSION or fid != file_id:
+        return -1
+    return seq
+
+def _newest(f, hdr, blocks, file_id):
+    # position of the newest data block, -1 if nothing was logged
+    first = _seq_at(f, hdr, 1, file_id)
+    if first < 0:
+        return -1
+    lo = 1
+    hi = blocks - 1
+    while lo < hi: #blocks are a rotated run of seqs, find the newest
+        mid = (lo + hi + 1) >> 1
+        if _seq_at(f, hdr, mid, file_id) >= first:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _used(seq, blocks):
+    return (1 + min(seq + 1, blocks - 1)) * BLOCK
+
+def scan(path, blocks=2048):
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    try:
+        hdr = bytearray(HEADER)
+        f.readinto(hdr)
+        magic, version, size, per, nblocks, file_id = struct.unpack_from(FILE_FORMAT, hdr)
+        if (magic, version, size, per, nblocks) != (FILE_MAGIC, VERSION, RECORD, RECORDS, blocks):
+            return None
+        pos = _newest(f, hdr, blocks, file_id)
+        if pos < 0:
+            return 0, BLOCK
+        f.seek(pos * BLOCK)
+        f.readinto(hdr)
+        _, _, count, _, seq = struct.unpack_from(BLOCK_FORMAT, hdr)
+        return seq * RECORDS + count, _used(seq, blocks) #every block before the newest is full
+    finally:
+        f.close()
+
+'''--------------------------------Read---------------------------------------'''
+def read(path):
+    # all records oldest first, host side (allocates freely)
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, size, per, blocks, file_id = struct.unpack_from(FILE_FORMAT, data)
+    if magic != FILE_MAGIC or version != VERSION:
+        raise ValueError("not a datalog file")
+    found = []
+    for pos in range(1, len(data) // BLOCK):
+        off = pos * BLOCK
+        magic, version, count, fid, seq = struct.unpack_from(BLOCK_FORMAT, data, off)
+        if magic == BLOCK_MAGIC and fid == file_id:
+            found.append((seq, off, count))
+    found.sort()
+    out = []
+    for _, off, count in found:
+        for i in range(count):
+            out.append(struct.unpack_from(RECORD_FORMAT, data, off + HEADER + i * size))
+    return out
@@ -1,30 +1,122 @@
+'''
+Filename: dht22.py
+Author: Brad Farris
+Date: 10/18/26
+Description: DHT22 temp/humidity sampler, rate limited reads with cached median filtered readings
+Version: 1.1
+
+Default Pinout:
+- GPIO16 -> DHT22 data
+- sensor vcc -> 3.3v
+- sensor gnd -> gnd
+
+Dependencies:
+- dht (MicroPython built in)
+
+Usage:
+- sample() takes a new reading if min_interval_ms has passed since the last one, else does nothing,
+    returns True if the sensor was read, call it as often as you like from the main loop/task
+- reading() -> (temp tenths C, humidity tenths %, errors), medians of the last N good reads,
+    None for temp/humidity until the first good read, never touches the sensor
+- temperature() -> cached temp in tenths C (or None), for temp_fn style consumers
+- temp_f() -> temperature in whole degrees F (or None), integer math
+- read_dht22() samples (rate limited) and prints the cached reading
+- print_reading() prints the cached reading only
+
+Notes:
+- DHT22 needs >= 2s between reads, a read bit bangs for several ms so only sample() ever calls measure()
+- display, logging and battery estimation should use reading()/temp_f(), they cost a few loads
+- floats from the dht driver are converted to tenths once per read, everything after is int
+'''
+
+'''----------------------------imports----------------------------------------'''
 import machine
 import time
-import dht
+from array import array
 
+'''------------------------------Setup----------------------------------------'''
 # Pin configuration
 dht_pin = machine.Pin(16)  # Change this to the pin you're using for the DHT22
 
-# Create the DHT22 sensor object
-sensor = dht.DHT22(dht_pin)
+sensor = None #DHT22 object, created (and dht imported) on the first sample() to keep boot short
 
-def read_dht22():
+min_interval_ms = 2000 #DHT22 minimum time between reads
+N = 5 #readings kept for the median filter
+
+temps = array('h', (0 for _ in range(N))) #tenths C, ring of the last N good reads
+hums = array('h', (0 for _ in range(N)))  #tenths %
+scratch = array('h', (0 for _ in range(N))) #median sort buffer
+count = 0 #good reads stored, up to N
+index = 0 #next slot in temps/hums
+last_ms = 0
+started = False #no read yet, first sample() always reads
+errors = 0 #failed reads (OSError) since boot
+temp_c10 = None #cached medians, updated once per good read
+hum10 = None
+
+'''------------------------------Filter---------------------------------------'''
+def median(values):
+    n = count
+    for i in range(n):
+        scratch[i] = values[i]
+    for i in range(1, n): #insertion sort, n <= N
+        v = scratch[i]
+        j = i - 1
+        while j >= 0 and scratch[j] > v:
+            scratch[j + 1] = scratch[j]
+            j -= 1
+        scratch[j + 1] = v
+    return scratch[n >> 1]
+
+def tenths(x):
+    return int(x * 10 + (0.5 if x >= 0 else -0.5))
+
+'''------------------------------Sample---------------------------------------'''
+def sample():
+    global sensor, count, index, last_ms, started, errors, temp_c10, hum10
+    now = time.ticks_ms()
+    if started and time.ticks_diff(now, last_ms) < min_interval_ms:
+        return False
+    started = True
+    last_ms = now
+    if sensor is None:
+        import dht
+        sensor = dht.DHT22(dht_pin)  # Create the DHT22 sensor object
     try:
-        # Attempt to read the sensor
         sensor.measure()  # Trigger the measurement
-        temp_celsius = sensor.temperature()  # Get temperature in Celsius
-        humidity = sensor.humidity()  # Get humidity in percentage
-        
-        # Convert temperature to Fahrenheit
-        temp_fahrenheit = (temp_celsius * 9/5) + 32
-        
-        # Print temperature in Fahrenheit and humidity
-        print(f"Temperature: {temp_fahrenheit:.2f}°F")
-        print(f"Humidity: {humidity}%")
-    except OSError as e:
-        print("Failed to read sensor data:", e)
-
-# Main loop to keep reading data
-#while True:
-    #read_dht22()
-    #time.sleep(2)  # Wait 2 seconds between readings
+        temps[index] = tenths(sensor.temperature())
+        hums[index] = tenths(sensor.humidity())
+    except OSError:
+        errors += 1
+        return True
+    index = (index + 1) % N
+    if count < N:
+        count += 1
+    temp_c10 = median(temps)
+    hum10 = median(hums)
+    return True
+
+'''------------------------------Getters--------------------------------------'''
+def reading():
+    return temp_c10, hum10, errors
+
+def temperature():
+    return temp_c10
+
+def temp_f():
+    if temp_c10 is None:
+        return None
+    f10 = temp_c10 * 9 // 5 + 320 #tenths F
+    return (f10 + 5) // 10
+
+def read_dht22():
+    sample()
+    print_reading()
+
+def print_reading():
+    if temp_c10 is None:
+        print("Failed to read sensor data:", errors, "errors")
+        return
+    # Print temperature in Fahrenheit and humidity
+    print(f"Temperature: {temp_f()}°F")
+    print(f"Humidity: {hum10 // 10}.{hum10 % 10}%")
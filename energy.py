@@ -0,0 +1,171 @@
+'''
+Filename: energy.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Coulomb/energy counter on INA260 samples with per brightness current and runtime prediction
+Version: 1.0
+
+Default Pinout:
+- none, fed by ina260 readings
+
+Dependencies:
+- none (level_fn and ina passed in)
+
+Usage:
+- counter = Counter(capacity_mah, level_fn, steps=100, path="energy.dat")
+    capacity_mah = usable battery capacity, level_fn() -> current brightness step (pwm_light.light.x),
+    steps = top brightness step (brightness.STEPS), path = file the totals persist in
+- counter.sample(ina) -> set as the INA260 callback, integrates one reading (O(1), no allocation)
+- counter.used_mah(), counter.used_mwh() -> totals since the last reset (survive reboots)
+- counter.level_ma(step) -> average current seen at that brightness (mA, -1 if never seen)
+- counter.runtime_min() -> minutes left at the current brightness (-1 until it knows the current)
+- counter.reset() after a full charge, counter.save() from a slow task to persist
+- counter.stats() -> (samples, last us, max us)
+- counter.boots, counter.lifetime_mah -> boots and total mAh drawn since the file was created
+
+Notes:
+- accumulators are split: whole mAh / mWh plus a remainder in mA*ms / mW*ms that carries over,
+    every value stays a small int (< 2^30) so nothing ever becomes a heap allocated long int
+- dt between samples is clamped to max_dt_ms so a stall (flash write, long lightsleep) can't add a spike
+- current at each brightness is an EMA per bucket of steps, runtime uses the bucket for the
+    current level so it reacts to a brightness change right away instead of waiting for a new average
+- save() writes a temp file and renames it over the old one, at most every save period so flash lasts
+'''
+
+'''----------------------------imports----------------------------------------'''
+import os
+import struct
+import micropython
+from time import ticks_ms, ticks_us, ticks_diff
+from micropython import const
+
+'''------------------------------Setup----------------------------------------'''
+MA_MS_PER_MAH = const(3600000) #1 mAh in mA*ms
+MW_MS_PER_MWH = const(3600000) #1 mWh in mW*ms
+BUCKETS = const(10) #brightness buckets for the current average
+EMA_SHIFT = const(4) #bucket average weight 1/16
+EMA_Q = const(4) #bucket averages kept in mA << EMA_Q
+MAGIC = const(0x454E) #"EN"
+FORMAT = "<HiIIIII" #magic, mah, ma_ms, mwh, mw_ms, lifetime mah, boots
+
+'''-------------------------------Counter-------------------------------------'''
+class Counter:
+    __slots__ = ('capacity_mah', 'level_fn', 'steps', 'path', 'max_dt_ms', 'last_ms', 'mah', 'ma_ms',
+                 'mwh', 'mw_ms', 'lifetime_mah', 'boots', 'samples', 'bucket_ma', 'last_ma',
+                 'last_us', 'max_us')
+
+    def __init__(self, capacity_mah, level_fn, steps=100, path="energy.dat", max_dt_ms=200):
+        self.capacity_mah = capacity_mah
+        self.level_fn = level_fn
+        self.steps = steps
+        self.path = path
+        self.max_dt_ms = max_dt_ms
+        self.last_ms = -1 #no sample yet
+        self.mah = 0 #whole mAh used since reset
+        self.ma_ms = 0 #remainder in mA*ms
+        self.mwh = 0
+        self.mw_ms = 0
+        self.lifetime_mah = 0
+        self.boots = 0
+        self.samples = 0
+        self.bucket_ma = [-1] * BUCKETS #EMA current per bucket, mA << EMA_Q, -1 = not seen
+        self.last_ma = 0
+        self.last_us = 0
+        self.max_us = 0
+        self.load()
+
+    '''------------------------------Sampling---------------------------------'''
+    @micropython.native
+    def sample(self, ina):
+        t = ticks_us()
+        now = ticks_ms()
+        ma = ina.current_ua // 1000
+        self.last_ma = ma
+        if self.last_ms >= 0:
+            dt = ticks_diff(now, self.last_ms)
+            if dt > self.max_dt_ms:
+                dt = self.max_dt_ms
+            q = self.ma_ms + ma * dt
+            while q >= MA_MS_PER_MAH: #at most a couple of times, dt is clamped
+                q -= MA_MS_PER_MAH
+                self.mah += 1
+                self.lifetime_mah += 1
+            while q < 0: #charging, current flows backwards
+                q += MA_MS_PER_MAH
+                self.mah -= 1
+            self.ma_ms = q
+            e = self.mw_ms + ina.power_mw * dt
+            while e >= MW_MS_PER_MWH:
+                e -= MW_MS_PER_MWH
+                self.mwh += 1
+            self.mw_ms = e
+            b = self.level_fn() * BUCKETS // (self.steps + 1)
+            avg = self.bucket_ma[b]
+            if avg < 0:
+                self.bucket_ma[b] = ma << EMA_Q
+            else:
+                self.bucket_ma[b] = avg + (((ma << EMA_Q) - avg) >> EMA_SHIFT)
+        self.last_ms = now
+        self.samples += 1
+        t = ticks_diff(ticks_us(), t)
+        self.last_us = t
+        if t > self.max_us:
+            self.max_us = t
+
+    '''------------------------------Readouts---------------------------------'''
+    def used_mah(self):
+        return self.mah
+
+    def used_mwh(self):
+        return self.mwh
+
+    def level_ma(self, step):
+        avg = self.bucket_ma[step * BUCKETS // (self.steps + 1)]
+        return avg >> EMA_Q if avg >= 0 else -1
+
+    def runtime_min(self):
+        ma = self.level_ma(self.level_fn())
+        if ma < 0:
+            ma = self.last_ma
+        left = self.capacity_mah - self.mah
+        if left <= 0:
+            return 0
+        if ma <= 0:
+            return -1
+        return left * 60 // ma
+
+    def stats(self):
+        return self.samples, self.last_us, self.max_us
+
+    '''-----------------------------Persistence-------------------------------'''
+    def reset(self):
+        self.mah = 0
+        self.ma_ms = 0
+        self.mwh = 0
+        self.mw_ms = 0
+        self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack(FORMAT, MAGIC, self.mah, self.ma_ms, self.mwh, self.mw_ms,
+                                self.lifetime_mah, self.boots))
+        os.rename(tmp, self.path)
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError: #first boot, nothing saved yet
+            return
+        if len(data) != struct.calcsize(FORMAT):
+            return
+        magic, mah, ma_ms, mwh, mw_ms, lifetime, boots = struct.unpack(FORMAT, data)
+        if magic != MAGIC:
+            return
+        self.mah = mah
+        self.ma_ms = ma_ms
+        self.mwh = mwh
+        self.mw_ms = mw_ms
+        self.lifetime_mah = lifetime
+        self.boots = boots + 1
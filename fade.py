@@ -0,0 +1,99 @@
+'''
+Filename: fade.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Timer driven brightness fade/ramp engine for the PWM light
+Version: 1.0
+
+Default Pinout:
+- none, drives the PWM object it is given
+
+Dependencies:
+- brightness (table passed in)
+
+Usage:
+- fader = Fader(pwm, table, period)
+    pwm = machine.PWM to drive, table = step -> duty_u16 lookup (brightness.build_table)
+    period = tick in ms, the timer only runs while a fade is in progress
+- fader.fade_to(step, duration)
+    ramp from wherever the output is now to step over duration ms, calling again mid fade
+    retargets from the current position, duration=0 jumps straight there
+- fader.jump(step)
+    set output immediately and cancel any fade in progress
+
+Notes:
+- position is kept as a Q8 fixed point step index, each tick adds a precomputed delta and
+    interpolates between the two neighbouring table entries, integer only and no allocation
+- last tick snaps to the exact target so rounding in delta never leaves it short
+'''
+
+'''----------------------------imports----------------------------------------'''
+from machine import Timer
+
+'''------------------------------Setup----------------------------------------'''
+Q = 8  #fraction bits of the step position
+Q_MASK = (1 << Q) - 1
+
+'''--------------------------------Fader--------------------------------------'''
+class Fader:
+    __slots__ = ('pwm', 'table', 'period', 'timer', 'tick_cb', 'pos', 'target', 'delta', 'ticks')
+
+    def __init__(self, pwm, table, period=10):
+        self.pwm = pwm
+        self.table = table
+        self.period = period
+        self.timer = Timer(-1)
+        self.tick_cb = self._tick  #bound once so starting a fade doesn't allocate
+        self.pos = 0      #current position, Q8 step index
+        self.target = 0   #target position, Q8 step index
+        self.delta = 0    #added to pos each tick
+        self.ticks = 0    #ticks left in the current fade, 0 = idle
+
+    def fading(self):
+        return self.ticks != 0
+
+    def step(self):
+        # nearest whole step the output is at right now
+        return (self.pos + (1 << (Q - 1))) >> Q
+
+    def jump(self, step):
+        if self.ticks:
+            self.timer.deinit()
+            self.ticks = 0
+        self.pos = self.target = step << Q
+        self._write()
+
+    def fade_to(self, step, duration):
+        ticks = duration // self.period
+        if ticks < 1:
+            self.jump(step)
+            return
+        target = step << Q
+        self.target = target
+        d = target - self.pos
+        self.delta = d // ticks if d >= 0 else -(-d // ticks)  #truncate so pos never overshoots
+        if not self.ticks:
+            self.ticks = ticks
+            self.timer.init(period=self.period, mode=Timer.PERIODIC, callback=self.tick_cb)
+        else:  #retarget mid fade, timer already running
+            self.ticks = ticks
+
+    def _tick(self, timer):
+        ticks = self.ticks - 1
+        if ticks <= 0:
+            self.pos = self.target
+            self.ticks = 0
+            timer.deinit()
+        else:
+            self.pos += self.delta
+            self.ticks = ticks
+        self._write()
+
+    def _write(self):
+        pos = self.pos
+        i = pos >> Q
+        frac = pos & Q_MASK
+        duty = self.table[i]
+        if frac:  #interpolate toward the next entry
+            duty += ((self.table[i + 1] - duty) * frac) >> Q
+        self.pwm.duty_u16(duty)
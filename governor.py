@@ -0,0 +1,107 @@
+'''
+Filename: governor.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Low voltage protection, caps the light's brightness in stages as the battery voltage falls
+Version: 1.0
+
+Default Pinout:
+- none, fed by ina260 readings
+
+Dependencies:
+- none (limit and warn passed in)
+
+Usage:
+- gov = Governor(stages, cutoff_mv, limit, warn=None, full=100, hyst_mv=200, release_mv=None, shift=4)
+    stages = ((mv, cap), ...) highest voltage first, below mv the brightness is capped at cap (step),
+    cutoff_mv = light forced off below this, limit(cap) applies a cap (pwm_light.limit),
+    warn(stage, mv) on every stage change (display), full = cap meaning no limit (brightness.STEPS),
+    hyst_mv = how far above a stage's threshold the voltage has to come back before the cap lifts,
+    release_mv = voltage that clears a cutoff (default cutoff_mv + 1000, i.e. after charging)
+- gov.update(mv) with each bus voltage reading (scheduled context, same as the light's drain)
+- gov.stage -> 0 = no cap, 1..len(stages) = capped, len(stages) + 1 = cut off
+- gov.cap, gov.mv() -> current cap and filtered voltage (-1 until the first reading)
+- gov.stats() -> (stage changes, cutoffs)
+
+Notes:
+- voltage is an EMA (weight 1/2^shift) kept in mV << shift, ints only, update() doesn't allocate
+- stages only step down on the filtered voltage crossing a threshold and only step back up once it
+    is hyst_mv above it, so the rise in voltage when the cap takes load off can't flip it back
+- a cutoff latches until release_mv, the battery recovers a lot with no load and would otherwise
+    turn the light straight back on
+- the cap is enforced in LightController.apply, so every input (panel, ir, anything posted later)
+    goes through it
+'''
+
+'''----------------------------imports----------------------------------------'''
+from micropython import const
+
+'''------------------------------Setup----------------------------------------'''
+HYST_MV = const(200) #default hysteresis
+RELEASE_MV = const(1000) #default cutoff release above cutoff_mv
+
+'''------------------------------Governor-------------------------------------'''
+class Governor:
+    __slots__ = ('stages', 'cutoff_mv', 'release_mv', 'hyst_mv', 'shift', 'limit', 'warn',
+                 'full', 'filtered', 'stage', 'cap', 'changes', 'cutoffs')
+
+    def __init__(self, stages, cutoff_mv, limit, warn=None, full=100, hyst_mv=HYST_MV,
+                 release_mv=None, shift=4):
+        self.stages = stages
+        self.cutoff_mv = cutoff_mv
+        self.release_mv = cutoff_mv + RELEASE_MV if release_mv is None else release_mv
+        self.hyst_mv = hyst_mv
+        self.shift = shift
+        self.limit = limit
+        self.warn = warn
+        self.full = full
+        self.filtered = -1 #mV << shift, -1 until the first reading
+        self.stage = 0
+        self.cap = full
+        self.changes = 0
+        self.cutoffs = 0
+
+    def update(self, mv):
+        shift = self.shift
+        f = self.filtered
+        if f < 0:
+            f = mv << shift
+        else:
+            f += ((mv << shift) - f) >> shift
+        self.filtered = f
+        v = f >> shift
+        stages = self.stages
+        n = len(stages)
+        stage = self.stage
+        if stage > n: #cut off, stays off until the battery is charged
+            if v < self.release_mv:
+                return
+            stage = 0
+        while stage < n and v < stages[stage][0]: #step down
+            stage += 1
+        if v < self.cutoff_mv:
+            stage = n + 1
+        while 0 < stage <= n and v > stages[stage - 1][0] + self.hyst_mv: #step back up
+            stage -= 1
+        if stage != self.stage:
+            self._set(stage, v)
+
+    def _set(self, stage, v):
+        self.stage = stage
+        self.changes += 1
+        if stage > len(self.stages):
+            self.cap = 0
+            self.cutoffs += 1
+        elif stage:
+            self.cap = self.stages[stage - 1][1]
+        else:
+            self.cap = self.full
+        self.limit(self.cap)
+        if self.warn:
+            self.warn(stage, v)
+
+    def mv(self):
+        return self.filtered >> self.shift if self.filtered >= 0 else -1
+
+    def stats(self):
+        return self.changes, self.cutoffs
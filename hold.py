@@ -0,0 +1,65 @@
+'''
+Filename: hold.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Time based hold detection with accelerating step size, shared by ir remote and panel switches
+Version: 1.0
+
+Default Pinout:
+- none
+
+Dependencies:
+- none
+
+Usage:
+- h = HoldTimer(hold_ms, curve=ACCEL, bucket_ms=100)
+    hold_ms = time pressed before it counts as held
+- h.start(now_ms) on the first edge/frame of a press
+- h.held(now_ms) -> True once hold_ms has passed since start
+- h.step(now_ms) -> step size for this repeat, grows along curve with time held past hold_ms
+- build_curve(n, first, last) -> array('B') of n step sizes rising from first to last (quadratic)
+
+Notes:
+- all ticks_ms math, curve is built once at import so held repeats only index it
+- a short press never reaches the curve, so single presses keep fine control
+'''
+
+'''----------------------------imports----------------------------------------'''
+from array import array
+from time import ticks_diff
+
+'''-------------------------------Curve---------------------------------------'''
+def build_curve(n=16, first=2, last=12):
+    curve = array('B', (0 for _ in range(n)))
+    span = (n - 1) * (n - 1)
+    for i in range(n):
+        curve[i] = first + (last - first) * i * i // span
+    return curve
+
+ACCEL = build_curve()  #default: 2 steps (= increment) right after the hold threshold, 12 steps 1.5s later
+
+'''----------------------------Hold Timer-------------------------------------'''
+class HoldTimer:
+    __slots__ = ('t0', 'hold_ms', 'curve', 'bucket_ms')
+
+    def __init__(self, hold_ms, curve=ACCEL, bucket_ms=100):
+        self.t0 = 0
+        self.hold_ms = hold_ms
+        self.curve = curve
+        self.bucket_ms = bucket_ms  #time held per curve entry
+
+    def start(self, now):
+        self.t0 = now
+
+    def elapsed(self, now):
+        return ticks_diff(now, self.t0)
+
+    def held(self, now):
+        return ticks_diff(now, self.t0) >= self.hold_ms
+
+    def step(self, now):
+        i = (ticks_diff(now, self.t0) - self.hold_ms) // self.bucket_ms
+        if i < 0:
+            return self.curve[0]
+        last = len(self.curve) - 1
+        return self.curve[i if i < last else last]
@@ -0,0 +1,90 @@
+'''
+Filename: idle.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Idle manager, lightsleeps the RP2 between events when nothing is in progress
+Version: 1.0
+
+Default Pinout:
+- none, wakes on the pin irqs the other modules already set up (switches, ir receiver)
+
+Dependencies:
+- scheduler (until_next)
+- uasyncio
+
+Usage:
+- idle.add_check(fn) -> fn() returns True while its subsystem has something in progress
+    (fade running, switch debounce, ir burst/events, display message timing out)
+- idle.run(pwm) -> coroutine, start it with the scheduler (startup or asyncio.create_task)
+    pwm = the light's PWM, used to tell if the output is static
+- idle.stats() -> (ms asleep, ms awake, lightsleeps, shallow idles) since idle.run started
+
+Notes:
+- lightsleep stops the system clocks, PWM included, so it is only used when the output is static
+    (duty exactly 0 or 65535), otherwise it stays in the shallow idle uasyncio already does between
+    tasks and the light keeps dimming normally
+- with pwm_light's table only off and step brightness.STEPS are static, the panel and up/glide stop at
+    high_thresh (98, still a dimmed duty), so in practice it lightsleeps only while the light is off
+- sleeps last until the next scheduler task is due (sensor sample, lag monitor), capped at max_sleep_ms,
+    a switch or ir edge wakes it early, the first ir frame after a long sleep may decode as an error
+- machine.Timer callbacks (fades, switch debounce, display timeouts) are all covered by checks so
+    nothing timer driven is pending when it sleeps
+'''
+
+'''----------------------------imports----------------------------------------'''
+import machine
+import uasyncio as asyncio
+from time import ticks_ms, ticks_us, ticks_diff
+import scheduler
+
+'''------------------------------Setup----------------------------------------'''
+min_sleep_ms = 20 #shorter gaps aren't worth the clock switch
+max_sleep_ms = 1000
+check_ms = 50 #how often to recheck while busy
+
+checks = []
+t_start = 0
+asleep_ms = 0
+asleep_us = 0 #remainder under 1ms, keeps the totals small ints
+sleeps = 0
+shallow = 0
+
+'''-------------------------------Checks--------------------------------------'''
+def add_check(fn):
+    checks.append(fn)
+
+def busy():
+    for fn in checks:
+        if fn():
+            return True
+    return False
+
+def static(pwm):
+    d = pwm.duty_u16()
+    return d == 0 or d == 65535
+
+'''--------------------------------Idle---------------------------------------'''
+async def run(pwm):
+    global t_start, asleep_ms, asleep_us, sleeps, shallow
+    t_start = ticks_ms()
+    while True:
+        if not static(pwm) or busy():
+            shallow += 1
+            await asyncio.sleep_ms(check_ms)
+            continue
+        wait = scheduler.until_next()
+        if wait < min_sleep_ms:  #a task is about to run, let it go first
+            shallow += 1
+            await asyncio.sleep_ms(wait + 1)
+            continue
+        t = ticks_us()
+        machine.lightsleep(wait if wait < max_sleep_ms else max_sleep_ms)
+        asleep_us += ticks_diff(ticks_us(), t)
+        asleep_ms += asleep_us // 1000
+        asleep_us %= 1000
+        sleeps += 1
+        await asyncio.sleep_ms(0) #let anything the wake up edge started run
+
+def stats():
+    total = ticks_diff(ticks_ms(), t_start)
+    return asleep_ms, total - asleep_ms, sleeps, shallow
@@ -0,0 +1,167 @@
+'''
+Filename: ina260.py
+Author: Brad Farris
+Date: 10/18/26
+Description: INA260 (Adafruit 4226) current/voltage/power monitor driver, integer readings, alert pin driven
+Version: 1.0
+
+Default Pinout:
+- GPIO4 -> SDA (I2C0)
+- GPIO5 -> SCL (I2C0)
+- GPIO3 -> ALERT (open drain, pulled up here)
+- board vcc -> 3.3v, gnd -> gnd, Vin+/Vin- in series with the light's supply
+
+Dependencies:
+- ringbuf (Deferred)
+
+Usage:
+- ina = INA260(i2c, addr=0x40, avg=AVG_16, vbus_ct=CT_1100, ish_ct=CT_1100, alert=None, callback=None)
+    i2c = machine.I2C, avg/ct = on chip averaging and conversion times (see constants),
+    alert = Pin wired to ALERT to read on conversion ready instead of polling,
+    callback(ina) is called (scheduled context) after each alert driven read
+- ina.read() -> reads current, bus voltage and power into ina.current_ua, ina.voltage_uv, ina.power_mw
+- ina.configure(avg, vbus_ct, ish_ct, mode) change averaging/conversion time on the fly
+- ina.period_us() -> time between new readings for the current config
+- ina.kick() -> main loop backstop, schedules a read if ALERT is stuck low with none pending
+- ina.stats() -> (samples, alerts missed while a read was pending, i2c errors)
+
+Notes:
+- the INA260 register pointer doesn't auto increment, so a "burst" is three back to back register
+    reads into slices of one preallocated 6 byte buffer, nothing is allocated per sample
+- units: current 1.25mA/LSB (signed) -> uA, bus voltage 1.25mV/LSB -> uV, power 10mW/LSB -> mW,
+    all small ints (< 2^30) so sampling at high rate makes no garbage
+- ALERT is set up as conversion ready (Mask/Enable CNVR), it pulls low when a new averaged reading
+    is ready, the pin irq only schedules the read, reading Mask/Enable releases the pin
+- raises OSError on init if nothing answers at addr
+'''
+
+'''----------------------------imports----------------------------------------'''
+from machine import Pin
+from micropython import const
+from ringbuf import Deferred
+
+'''------------------------------Setup----------------------------------------'''
+REG_CONFIG = const(0x00)
+REG_CURRENT = const(0x01)
+REG_VOLTAGE = const(0x02)
+REG_POWER = const(0x03)
+REG_MASK = const(0x06)
+REG_ALERT_LIMIT = const(0x07)
+REG_MFG_ID = const(0xFE)
+REG_DIE_ID = const(0xFF)
+
+MFG_ID = const(0x5449) #"TI"
+CONFIG_RST = const(0x8000)
+CONFIG_BASE = const(0x6000) #reserved bits 14-12 read back as 110
+MODE_CONT = const(7) #continuous current + voltage
+MODE_TRIG = const(3) #triggered current + voltage
+MASK_CNVR = const(0x0400) #alert on conversion ready
+MASK_CVRF = const(0x0008) #conversion ready flag, cleared by reading Mask/Enable
+
+# averaging count, config bits 11-9
+AVG_1, AVG_4, AVG_16, AVG_64, AVG_128, AVG_256, AVG_512, AVG_1024 = range(8)
+AVG_COUNT = (1, 4, 16, 64, 128, 256, 512, 1024)
+
+# conversion time, config bits 8-6 (bus) and 5-3 (current)
+CT_140, CT_204, CT_332, CT_588, CT_1100, CT_2116, CT_4156, CT_8244 = range(8)
+CT_US = (140, 204, 332, 588, 1100, 2116, 4156, 8244)
+
+CURRENT_UA = const(1250) #uA per LSB
+VOLTAGE_UV = const(1250) #uV per LSB
+POWER_MW = const(10) #mW per LSB
+
+'''-------------------------------Driver--------------------------------------'''
+class INA260:
+    __slots__ = ('i2c', 'addr', 'buf', 'cur_mv', 'volt_mv', 'pow_mv', 'reg_mv', 'alert', 'callback',
+                 'reader', 'avg', 'vbus_ct', 'ish_ct', 'mode',
+                 'current_ua', 'voltage_uv', 'power_mw', 'samples', 'missed', 'errors')
+
+    def __init__(self, i2c, addr=0x40, avg=AVG_16, vbus_ct=CT_1100, ish_ct=CT_1100,
+                 alert=None, callback=None):
+        self.i2c = i2c
+        self.addr = addr
+        self.buf = bytearray(8)  #current, voltage, power, then 2 spare for config/mask
+        mv = memoryview(self.buf)
+        self.cur_mv = mv[0:2]  #slices made once, reads land straight in buf
+        self.volt_mv = mv[2:4]
+        self.pow_mv = mv[4:6]
+        self.reg_mv = mv[6:8]
+        self.alert = alert
+        self.callback = callback
+        self.reader = Deferred(self._scheduled_read)
+        self.current_ua = 0
+        self.voltage_uv = 0
+        self.power_mw = 0
+        self.samples = 0
+        self.missed = 0
+        self.errors = 0
+        if self._read_reg(REG_MFG_ID) != MFG_ID:
+            raise OSError("INA260 not found at 0x{:02x}".format(addr))
+        self._write_reg(REG_CONFIG, CONFIG_RST)
+        self.configure(avg, vbus_ct, ish_ct)
+        if alert is not None:
+            alert.init(Pin.IN, Pin.PULL_UP)
+            self._write_reg(REG_MASK, MASK_CNVR)
+            alert.irq(trigger=Pin.IRQ_FALLING, handler=self._alert)
+
+    '''------------------------------Registers--------------------------------'''
+    def _read_reg(self, reg):
+        mv = self.reg_mv
+        self.i2c.readfrom_mem_into(self.addr, reg, mv)
+        return (mv[0] << 8) | mv[1]
+
+    def _write_reg(self, reg, value):
+        mv = self.reg_mv
+        mv[0] = value >> 8
+        mv[1] = value & 0xff
+        self.i2c.writeto_mem(self.addr, reg, mv)
+
+    def configure(self, avg=AVG_16, vbus_ct=CT_1100, ish_ct=CT_1100, mode=MODE_CONT):
+        self.avg = avg
+        self.vbus_ct = vbus_ct
+        self.ish_ct = ish_ct
+        self.mode = mode
+        self._write_reg(REG_CONFIG, CONFIG_BASE | (avg << 9) | (vbus_ct << 6) | (ish_ct << 3) | mode)
+
+    def period_us(self):
+        return AVG_COUNT[self.avg] * (CT_US[self.vbus_ct] + CT_US[self.ish_ct])
+
+    '''-------------------------------Reading---------------------------------'''
+    def read(self):
+        i2c = self.i2c
+        addr = self.addr
+        buf = self.buf
+        i2c.readfrom_mem_into(addr, REG_CURRENT, self.cur_mv)
+        i2c.readfrom_mem_into(addr, REG_VOLTAGE, self.volt_mv)
+        i2c.readfrom_mem_into(addr, REG_POWER, self.pow_mv)
+        raw = (buf[0] << 8) | buf[1]
+        if raw & 0x8000:  #two's complement, current can flow backwards
+            raw -= 0x10000
+        self.current_ua = raw * CURRENT_UA
+        self.voltage_uv = ((buf[2] << 8) | buf[3]) * VOLTAGE_UV
+        self.power_mw = ((buf[4] << 8) | buf[5]) * POWER_MW
+        self.samples += 1
+
+    def _alert(self, pin):
+        # conversion ready, i2c isn't allowed here so just schedule the read,
+        # a read still pending or a full schedule queue (pin stays low until kick) misses this one
+        if not self.reader.schedule():
+            self.missed += 1
+
+    def _scheduled_read(self):
+        try:
+            self._read_reg(REG_MASK)  #clears the conversion ready flag, releases ALERT
+            self.read()
+        except OSError:
+            self.errors += 1
+            return
+        if self.callback:
+            self.callback(self)
+
+    # Backstop for a lost alert (schedule full), ALERT stays low until read so no new edge would come
+    def kick(self):
+        if self.alert is not None and not self.reader.pending and not self.alert.value():
+            self._alert(self.alert)
+
+    def stats(self):
+        return self.samples, self.missed, self.errors
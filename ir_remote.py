@@ -12,286 +12,148 @@ Default Pinout:
 
 Dependencies:
 - tm1637
+- ringbuf
+- brightness
+- keymap
+- keymap.json (on flash)
+- hold
 
 Usage:
-- press_button_action_X() *where X = button label on remote
-    description here
-- held_button_action_X() *where X = button label on remote
-    description here
+- start_ir_receiver() loads keymap_file, compiles it into dispatch tables and starts the receiver,
+    ir_rx is imported lazily here to keep it off the early boot path
+- button actions live in keymap.json, not in code: swap remotes (or add the rf remote) by editing or
+    pointing keymap_file at another map, see keymap.py for the action names
 
 Notes:
-- change array level[] values to practical #'s through testing
+- cb() runs in the ir receiver's timer callback and only queues (cmd, addr, ext, ticks_ms) into events,
+    process_events() drains them through micropython.schedule and does the repeat/hold logic and actions
+- holds are timed from the first frame (ticks_ms), not counted in repeat codes, and held up/down
+    steps grow with hold time (hold.ACCEL) so full range takes ~1.5s while a single press still moves 1 increment
+- stats() returns (events handled, events dropped on overflow, max cb time in us)
+- receiving() is True while a burst is coming in, main holds display status writes off with it
+- kick() is the main loop's backstop if a schedule() failed, events are only ever consumed in scheduled context
+- set capture_file to a path to record every received burst with ir_rx.capture for offline replay
+    (tools/ir_replay.py), leave None for normal use
+- change "level N" values in keymap.json to practical #'s through testing, N is a perceptual step index
+    into pwm_light.duty_table (0-brightness.STEPS) or high/mid/low for the pwm_light thresholds
 '''
 
 '''----------------------------imports----------------------------------------'''
 from machine import Pin
 import time
 import pwm_light
-from ir_rx.nec import NEC_8
-from ir_rx.print_error import print_error
+import brightness
+from keymap import Keymap
+from hold import HoldTimer
+from ringbuf import RingBuffer, Deferred
 
 '''------------------------------Setup----------------------------------------'''
 ir_pin = Pin(17, Pin.IN)
-repeat = 0
-last_data = 0
-level = [5000, 10000, 15000, 25000, 33000, 45000, 55000] #array of brightness values assigned to buttons 2-8, 1 and 9 reserved
-
-'''--------------------------Button actions-----------------------------------'''
-# all unused contain pass, mapped for future modifications
-# Button '1' action
-def press_button_action_1():
-    #print("button '1' pressed") #debug statement
-    pwm_light.bottom_hold()
-    
-def held_button_action_1():
-    #print("button '1' held") #debug statement
-    pass
-
-# Button '2' action
-def press_button_action_2():
-    #print("button '2' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[0])
-    
-def held_button_action_2():
-    #print("button '2' held") #debug statement
-    pass
-
-# Button '3' action
-def press_button_action_3():
-    #print("button '3' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[1])
-
-def held_button_action_3():
-    #print("button '3' held") #debug statement
-    pass
-
-# Button '4' action
-def press_button_action_4():
-    #print("button '4' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[2])
-    
-def held_button_action_4():
-    #print("button '4' held") #debug statement
-    pass
-
-# Button '5' action
-def press_button_action_5():
-    #print("button '5' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[3])
-    
-def held_button_action_5():
-    #print("button '5' held") #debug statement
-    pass
-
-# Button '6' action
-def press_button_action_6():
-    #print("button '6' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[4])
-    
-def held_button_action_6():
-    #print("button '6' held") #debug statement
-    pass
-
-# Button '7' action
-def press_button_action_7():
-    #print("button '7' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[5])
-    
-def held_button_action_7():
-    #print("button '7' held") #debug statement
-    pass
-
-# Button '8' action
-def press_button_action_8():
-    #print("button '8' pressed") #debug statement
-    x = pwm_light.x
-    if x != 0:
-        pwm_light.set_x(level[6])
-    
-def held_button_action_8():
-    #print("button '8' held") #debug statement
-    pass
-
-# Button '9' action
-def press_button_action_9():
-    #print("button '9' press") #debug statement
-    pwm_light.top_hold()
-    
-def held_button_action_9():
-    #print("button '9' held") #debug statement
-    pass
-    
-# Button '*' action
-def press_button_action_star():
-    #print("button '*' pressed") #debug statement
-    pwm_light.middle_press()
-    
-def held_button_action_star():
-    #print("button '*' held") #debug statement
-    pass
-
-# Button '0' action
-def press_button_action_0():
-    #print("button '0' pressed") #debug statement
-    pass
-
-def held_button_action_0():
-    #print("button '0' held") #debug statement
-    pass
-
-# Button '#' action
-def press_button_action_pound():
-    #print("button '#' pressed") #debug statement
-    pass
-
-def held_button_action_pound():
-    #print("button '#' held") #debug statement
-    pass
-
-# Button 'Up' action
-def press_button_action_up():
-    #print("button 'Up' pressed") #debug statement
-    pwm_light.top_press()
-          
-def held_button_action_up():
-    #print("button 'Up' held") #debug statement
-    pwm_light.top_press()
-
-# Button 'Down' action
-def press_button_action_down():
-    #print("button 'Down' pressed") #debug statement
-    pwm_light.bottom_press()
-
-def held_button_action_down():
-    #print("button 'Down' held") #debug statement
-    pwm_light.bottom_press()
-
-# Button 'Left' action
-def press_button_action_left():
-    #print("button 'Left' pressed") #debug statement
-    pass
-
-def held_button_action_left():
-    #print("button 'Left' held") #debug statement
-    pass
-
-# Button 'Right' action
-def press_button_action_right():
-   #print("button 'Right' pressed") #debug statement
-    pass
-
-def held_button_action_right():
-    #print("button 'Right' held") #debug statement
-    pass
-
-# Button 'OK' action
-def press_button_action_ok():
-    #print("button 'OK' pressed") #debug statement
-    pass
-
-def held_button_action_ok():
-    #print("button 'OK' held") #debug statement
-    pass
-
-'''---------------------------Data Dictionary---------------------------------'''
-#dictionary mapping button codes to actions for press and holds
-button_actions = {
-    #Button '1'
-    0x45: (press_button_action_1, held_button_action_1),
-    #Button '2'
-    0x46: (press_button_action_2, held_button_action_2),
-    #Button '3'
-    0x47: (press_button_action_3, held_button_action_3),
-    #Button '4'
-    0x44: (press_button_action_4, held_button_action_4),
-    #Button '5'
-    0x40: (press_button_action_5, held_button_action_5),
-    #Button '6'
-    0x43: (press_button_action_6, held_button_action_6),
-    #Button '7'
-    0x07: (press_button_action_7, held_button_action_7),
-    #Button '8'
-    0x15: (press_button_action_8, held_button_action_8),
-    #Button '9'
-    0x09: (press_button_action_9, held_button_action_9),
-    #Button '*'
-    0x16: (press_button_action_star, held_button_action_star),
-    #Button '0'
-    0x19: (press_button_action_0, held_button_action_0),
-    #Button '#'
-    0x0d: (press_button_action_pound, held_button_action_pound),
-    #Button 'Up'
-    0x18: (press_button_action_up, held_button_action_up),
-    #Button 'Down'
-    0x52: (press_button_action_down, held_button_action_down),
-    #Button 'Left'
-    0x08: (press_button_action_left, held_button_action_left),
-    #Button 'Right'
-    0x5a: (press_button_action_right, held_button_action_right),
-    #Button 'OK'
-    0x1c: (press_button_action_ok, held_button_action_ok)
-}
+last_data = -1 #button of the press in progress, -1 = none
+last_ticks = 0 #ticks_ms of the last frame or repeat code
+ir_hold_ms = 250 #time from first frame before repeats count as held (~2 repeat codes)
+repeat_gap_ms = 200 #repeat codes come every ~108ms, a longer gap means frames were lost
+hold = HoldTimer(ir_hold_ms) #held step size accelerates along hold.ACCEL
+events = RingBuffer(16, 4) #decoded (cmd, addr, ext, ticks_ms) waiting for process_events
+events_handled = 0
+cb_us_max = 0 #longest cb() time seen (us)
+capture_file = None #e.g. "ir_capture.bin" to record raw edge timings
+keymap_file = "keymap.json" #button code -> action config
+keys = Keymap() #empty until start_ir_receiver() loads keymap_file
+receiver = None #NEC_8 instance once started
 
 '''---------------------------Handle Buttons----------------------------------'''
-def handle_button(button, action_type):
-    #check if the button code is in the dictionary
-    if button in button_actions:
-        # Get the tuple (press_action, hold_action)
-        press_action, hold_action = button_actions[button]
-        
-        # Call the correct action based on action_type
-        if action_type == 0:  # 0 means press
-            press_action()
-        elif action_type == 1:  # 1 means held
-            hold_action()
-    else:
+def handle_button(button, action_type, step=0):
+    # action_type 0 means press, 1 means held, one table index per event
+    if not keys.dispatch(button, action_type, pwm_light.light.post, step):
         print(f"Error: Button {button} not mapped")        
 
 '''------------------------Receive/Handle data--------------------------------'''
-# Callback function that is called when data is received from the IR receiver
+# Callback function that is called when data is received from the IR receiver,
+# queues the event and returns, nothing slow happens here
 def cb(data, addr, ctrl):
-    global repeat
-    global last_data
-    button = None
+    global cb_us_max
+    t = time.ticks_us()
+    i = events.reserve() #-1 and counted in events.dropped if full
+    if i >= 0:
+        buf = events.buf
+        buf[i] = data
+        buf[i + 1] = addr
+        buf[i + 2] = ctrl
+        buf[i + 3] = time.ticks_ms()
+        events.commit()
+    kick()
+    t = time.ticks_diff(time.ticks_us(), t)
+    if t > cb_us_max:
+        cb_us_max = t
+
+# Schedule process_events() if events are waiting and none is pending,
+# the main loop calls this too as a backstop for a schedule() that failed
+def kick():
+    if len(events):
+        processor.schedule()
+
+# Scheduled consumer, drains every queued event in order
+def process_events():
+    global events_handled
+    buf = events.buf
+    while True:
+        i = events.peek()
+        if i < 0:
+            break
+        data = buf[i]
+        ticks = buf[i + 3]
+        events.advance()
+        handle_event(data, ticks)
+        events_handled += 1
+
+processor = Deferred(process_events)
+
+# Press on a new frame, held once repeat codes have kept coming for ir_hold_ms
+def handle_event(data, ticks):
+    global last_data, last_ticks
+    gap = time.ticks_diff(ticks, last_ticks)
+    last_ticks = ticks
     
-    # Repeat Press but 'debounced'
-    if data < 0 and repeat <= 1:
-        repeat += 1
-        #print("Repeat code.") #debuggin statement
-        
-    # Repeat Press over threshold = Held down
-    elif data < 0 and repeat > 1:
-        repeat += 1
-        #hex_value = f"0x{last_data:02x}" #debug statement
-        button = last_data
-        #print(f"Held: {hex_value}") #debuggin statement
-        #held_button(button)
-        handle_button(button, 1)  # 1 for Held action
+    # Repeat code
+    if data < 0:
+        if gap > repeat_gap_ms: #first frame was lost, don't guess which button
+            last_data = -1
+        elif last_data >= 0 and hold.held(ticks):
+            #print(f"Held: 0x{last_data:02x}") #debuggin statement
+            handle_button(last_data, 1, hold.step(ticks))  # 1 for Held action, accelerating step
     
     # Button Press
     else:
         #print(f"Received data: 0x{data:02x}") #debuggin statement
-        repeat = 0
         last_data = data
-        button = data
-        #print(f"Last data: 0x{data:02x}") #debuggin statement
-        #press_button(button)
-        handle_button(button, 0)  # 0 for Press action
+        hold.start(ticks)
+        handle_button(data, 0)  # 0 for Press action
+
+# True while a burst is coming in (edges stamped, block timer not yet fired)
+def receiving():
+    return receiver is not None and receiver.edge
+
+# True while a burst is being received or events are waiting, the idle manager won't lightsleep
+def busy():
+    return processor.pending or len(events) or receiving()
+
+# (handled, dropped, max cb us)
+def stats():
+    return events_handled, events.dropped, cb_us_max
 
 '''------------------------------Startup--------------------------------------'''
 def start_ir_receiver():
+    global keys, receiver
+
+    # Compile the button map, named levels come from pwm_light
+    keys = Keymap.load(keymap_file, {"high": pwm_light.high_thresh,
+                                     "mid": pwm_light.mid_thresh,
+                                     "low": pwm_light.low_thresh}, brightness.STEPS)
+
+    # ir_rx is only imported here so it doesn't slow down the pwm/switch part of boot
+    from ir_rx.nec import NEC_8
+    from ir_rx.print_error import print_error
 
     # Create the IR receiver instance using NEC 8-bit protocol
     ir_receiver = NEC_8(ir_pin, cb)
@@ -299,6 +161,12 @@ def start_ir_receiver():
     # Error handling
     ir_receiver.error_function(print_error)
 
+    # Optional raw edge capture
+    if capture_file:
+        from ir_rx.capture import Capture
+        Capture(capture_file).tap(ir_receiver)
+
     #print("Ir Remote initialized") #debug statement
 
+    receiver = ir_receiver
     return ir_receiver
\ No newline at end of file
@@ -8,8 +8,11 @@
 
 from machine import Timer, Pin
 from array import array
+from micropython import const
 from utime import ticks_us
 
+_TICKS_MASK = const(0x3fffffff)  # ticks_us() period, keeps stored times small ints
+
 # from micropython import alloc_emergency_exception_buf
 # alloc_emergency_exception_buf(100)
 
@@ -43,14 +46,22 @@ class IR_RX:
         self.verbose = False
 
         self._times = array("i", (0 for _ in range(nedges + 1)))  # +1 for overrun
-        pin.irq(handler=self._cb_pin, trigger=(Pin.IRQ_FALLING | Pin.IRQ_RISING))
+        # Hard IRQ where the port supports it. A soft IRQ goes through micropython.schedule
+        # and waits behind any scheduled callback (e.g. a ~3ms display write), which
+        # stamps the edges late and corrupts the decode.
+        try:
+            pin.irq(handler=self._cb_pin, trigger=(Pin.IRQ_FALLING | Pin.IRQ_RISING), hard=True)
+        except TypeError:
+            pin.irq(handler=self._cb_pin, trigger=(Pin.IRQ_FALLING | Pin.IRQ_RISING))
         self.edge = 0
         self.tim = Timer(self.Timer_id)  # Defaul is sofware timer
         self.cb = self.decode
 
     # Pin interrupt. Save time of each edge for later decode.
+    # Runs as a hard IRQ: no allocation, only stores into the preallocated _times
+    # array, bumps edge and arms the block timer on the first edge.
     def _cb_pin(self, line):
-        t = ticks_us()
+        t = ticks_us() & _TICKS_MASK
         # On overrun ignore pulses until software timer times out
         if self.edge <= self._nedges:  # Allow 1 extra pulse to record overrun
             if not self.edge:  # First edge received
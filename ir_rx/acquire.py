@@ -13,12 +13,17 @@ from ir_rx import IR_RX
 
 
 class IR_GET(IR_RX):
-    def __init__(self, pin, nedges=100, twait=100, display=True):
+    # capture: optional ir_rx.capture.Capture, every burst's raw edge times are
+    # recorded to it before analysis (see capture.record())
+    def __init__(self, pin, nedges=100, twait=100, display=True, capture=None):
         self.display = display
+        self.capture = capture
         super().__init__(pin, nedges, twait, lambda *_ : None)
         self.data = None
 
     def decode(self, _):
+        if self.capture is not None:
+            self.capture.add(self._times, self.edge)
         def near(v, target):
             return target * 0.8 < v < target * 1.2
         lb = self.edge - 1  # Possible length of burst
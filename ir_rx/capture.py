@@ -0,0 +1,139 @@
+# capture.py Record IR edge timings to a compact binary file for offline replay
+# Works with IR_GET (acquire.py) or tapped onto any IR_RX subclass, so real
+# presses can be collected while the light is in normal use.
+
+# Author: Brad Farris
+# Released under the MIT license
+
+# File format, little endian:
+#   b'IRC1' once at the start of the file, then one record per burst:
+#   u32 ticks_ms at decode, u32 ticks_us of first edge, u16 edge count seen,
+#   u16 edges stored (n), then n - 1 u16 edge to edge deltas in us (clamped)
+# Edge count seen can exceed n when the receiver overran its buffer.
+
+from array import array
+from struct import unpack_from
+from utime import ticks_ms, ticks_diff
+from ringbuf import RingBuffer, Deferred
+
+MAGIC = b'IRC1'
+_HDR = 6  # header halfwords: ms lo, ms hi, t0 lo, t0 hi, edges, stored
+
+
+class Capture:
+    def __init__(self, path, nedges=100, slots=8):
+        self.path = path
+        self._width = _HDR + nedges  # halfwords per slot, fits nedges + 1 times
+        self._rb = RingBuffer(slots, self._width, 'H')
+        self._mv = memoryview(self._rb.buf)
+        self._rx = None
+        self._flusher = Deferred(self.flush)  # add() runs in timer callbacks
+        self.records = 0
+        try:
+            with open(path, 'rb') as f:
+                new = f.read(4) != MAGIC
+        except OSError:
+            new = True
+        self._f = open(path, 'wb' if new else 'ab')
+        if new:
+            self._f.write(MAGIC)
+
+    @property
+    def dropped(self):
+        return self._rb.dropped
+
+    # Copy a burst out of the receiver's _times buffer. Allocation free, safe in
+    # the IR_RX timer callback. The file write is deferred with schedule().
+    def add(self, times, nedges):
+        rb = self._rb
+        i = rb.reserve()
+        if i < 0:
+            return
+        buf = rb.buf
+        stored = min(nedges, len(times), self._width - _HDR + 1)
+        ms = ticks_ms()
+        t0 = times[0] & 0x3fffffff
+        buf[i] = ms & 0xffff
+        buf[i + 1] = (ms >> 16) & 0xffff
+        buf[i + 2] = t0 & 0xffff
+        buf[i + 3] = (t0 >> 16) & 0xffff
+        buf[i + 4] = nedges
+        buf[i + 5] = stored
+        j = i + _HDR
+        for e in range(1, stored):
+            d = ticks_diff(times[e], times[e - 1])
+            buf[j] = d if 0 <= d <= 0xffff else 0xffff
+            j += 1
+        rb.commit()
+        self._flusher.schedule()  # If the schedule queue is full flush() from the main loop picks it up
+
+    def flush(self):
+        rb = self._rb
+        while True:
+            i = rb.peek()
+            if i < 0:
+                break
+            stored = rb.buf[i + 5]
+            n = _HDR + max(stored - 1, 0)
+            self._f.write(self._mv[i:i + n])
+            rb.advance()
+            self.records += 1
+        self._f.flush()
+
+    # Record every burst an existing receiver decodes, then let it decode as usual
+    def tap(self, rx):
+        self._rx = rx
+        rx.cb = self._tapped
+
+    def _tapped(self, tim):
+        rx = self._rx
+        self.add(rx._times, rx.edge)
+        rx.decode(tim)
+
+    def close(self):
+        if self._rx is not None:
+            self._rx.cb = self._rx.decode
+            self._rx = None
+        self.flush()
+        self._f.close()
+
+
+# Yields (ticks_ms, edges seen, array of absolute edge times in us) per record
+def read(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError('not an IR capture file')
+    pos = 4
+    while pos + 2 * _HDR <= len(data):
+        ms_lo, ms_hi, t0_lo, t0_hi, nedges, stored = unpack_from('<6H', data, pos)
+        pos += 2 * _HDR
+        n = max(stored - 1, 0)
+        if pos + 2 * n > len(data):
+            break  # Truncated final record
+        times = array('i', (0 for _ in range(stored)))
+        t = t0_lo | t0_hi << 16
+        if stored:
+            times[0] = t
+        for e, d in enumerate(unpack_from('<%dH' % n, data, pos)):
+            t += d
+            times[e + 1] = t
+        pos += 2 * n
+        yield ms_lo | ms_hi << 16, nedges, times
+
+
+# Record bursts from the receiver pin for a while, e.g. on the water:
+# from ir_rx.capture import record; record(Pin(17, Pin.IN), 'ir.bin', 600)
+def record(pin, path='ir_capture.bin', seconds=60, nedges=100, twait=100):
+    from utime import sleep_ms
+    from ir_rx.acquire import IR_GET
+    cap = Capture(path, nedges)
+    irg = IR_GET(pin, nedges, twait, display=False, capture=cap)
+    start = ticks_ms()
+    try:
+        while ticks_diff(ticks_ms(), start) < seconds * 1000:
+            sleep_ms(100)
+    finally:
+        irg.close()
+        cap.close()
+    return cap.records
@@ -7,10 +7,21 @@
 # Author: Peter Hinch
 # Copyright Peter Hinch 2020-2022 Released under the MIT license
 
-from utime import ticks_us, ticks_diff
+import micropython
+from micropython import const
 from ir_rx import IR_RX
 
+# ticks_us() wraps at 2**30 (small int range), so masking a difference gives
+# the same result as ticks_diff() for any interval under ~536s without a call
+_TICKS_MASK = const(0x3fffffff)
+
 class NEC_ABC(IR_RX):
+    # Timing thresholds in us. Class attributes so they can be tuned per
+    # subclass or instance (e.g. from captured edge data) without code edits.
+    T_DATA_SPACE = 3000  # Leader space above this: data block (4.5ms)
+    T_REPEAT_SPACE = 1700  # Above this: repeat code (2.25ms)
+    T_ONE_SPACE = 1120  # Bit space above this is a 1 (1.6875ms v 562.5us)
+
     def __init__(self, pin, extended, samsung, callback, *args):
         # Block lasts <= 80ms (extended mode) and has 68 edges
         super().__init__(pin, 68, 80, callback, *args)
@@ -18,40 +29,55 @@ class NEC_ABC(IR_RX):
         self._addr = 0
         self._leader = 2500 if samsung else 4000  # 4.5ms for Samsung else 9ms
 
+    # Returns cmd (>= 0) or a negative result code. No exceptions, no heap
+    # allocation and no calls in the bit loop: each space is a masked
+    # subtraction on the edge array. The 32 data bits are assembled as two
+    # 16 bit halves so the value always stays a small int.
+    @micropython.native
+    def _decode(self):
+        nedges = self.edge
+        if nedges > 68:
+            return self.OVERRUN
+        t = self._times
+        if ((t[1] - t[0]) & _TICKS_MASK) < self._leader:  # 9ms leading mark for all valid data
+            return self.BADSTART
+        width = (t[2] - t[1]) & _TICKS_MASK
+        if width <= self.T_DATA_SPACE:
+            if width > self.T_REPEAT_SPACE:  # 2.5ms space for a repeat code. Should have exactly 4 edges.
+                return self.REPEAT if nedges == 4 else self.BADREP
+            return self.BADSTART
+        if nedges < 68:  # Haven't received the correct number of edges
+            return self.BADBLOCK
+        # Time spaces only (marks are always 562.5µs)
+        # Space is 1.6875ms (1) or 562.5µs (0)
+        # Skip last bit which is always 1
+        one = self.T_ONE_SPACE
+        lo = 0  # addr, ~addr (or 16 bit addr)
+        for edge in range(3, 35, 2):
+            lo >>= 1
+            if ((t[edge + 1] - t[edge]) & _TICKS_MASK) > one:
+                lo |= 0x8000
+        hi = 0  # cmd, ~cmd
+        for edge in range(35, 67, 2):
+            hi >>= 1
+            if ((t[edge + 1] - t[edge]) & _TICKS_MASK) > one:
+                hi |= 0x8000
+        cmd = hi & 0xff
+        if cmd != (hi >> 8) ^ 0xff:
+            return self.BADDATA
+        addr = lo & 0xff  # 8 bit addr
+        if addr != (lo >> 8) ^ 0xff:  # 8 bit addr doesn't match check
+            if not self._extended:
+                return self.BADADDR
+            addr = lo  # pass assumed 16 bit address to callback
+        self._addr = addr
+        return cmd
+
     def decode(self, _):
-        try:
-            if self.edge > 68:
-                raise RuntimeError(self.OVERRUN)
-            width = ticks_diff(self._times[1], self._times[0])
-            if width < self._leader:  # 9ms leading mark for all valid data
-                raise RuntimeError(self.BADSTART)
-            width = ticks_diff(self._times[2], self._times[1])
-            if width > 3000:  # 4.5ms space for normal data
-                if self.edge < 68:  # Haven't received the correct number of edges
-                    raise RuntimeError(self.BADBLOCK)
-                # Time spaces only (marks are always 562.5µs)
-                # Space is 1.6875ms (1) or 562.5µs (0)
-                # Skip last bit which is always 1
-                val = 0
-                for edge in range(3, 68 - 2, 2):
-                    val >>= 1
-                    if ticks_diff(self._times[edge + 1], self._times[edge]) > 1120:
-                        val |= 0x80000000
-            elif width > 1700: # 2.5ms space for a repeat code. Should have exactly 4 edges.
-                raise RuntimeError(self.REPEAT if self.edge == 4 else self.BADREP)  # Treat REPEAT as error.
-            else:
-                raise RuntimeError(self.BADSTART)
-            addr = val & 0xff  # 8 bit addr
-            cmd = (val >> 16) & 0xff
-            if cmd != (val >> 24) ^ 0xff:
-                raise RuntimeError(self.BADDATA)
-            if addr != ((val >> 8) ^ 0xff) & 0xff:  # 8 bit addr doesn't match check
-                if not self._extended:
-                    raise RuntimeError(self.BADADDR)
-                addr |= val & 0xff00  # pass assumed 16 bit address to callback
-            self._addr = addr
-        except RuntimeError as e:
-            cmd = e.args[0]
+        cmd = self._decode()
+        if cmd >= 0:
+            addr = self._addr
+        else:
             addr = self._addr if cmd == self.REPEAT else 0  # REPEAT uses last address
         # Set up for new data burst and run user callback
         self.do_callback(cmd, addr, 0, self.REPEAT)
@@ -0,0 +1,108 @@
+'''
+Filename: keymap.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Loads a remote's button map from a JSON config and compiles it to direct indexed dispatch tables
+Version: 1.0
+
+Default Pinout:
+- none
+
+Dependencies:
+- light_controller (op codes)
+
+Usage:
+- keys = Keymap.load(path, names, steps=255)
+    path = JSON keymap on flash (see keymap.json), names = dict of named levels, e.g. {"high": 98}
+    steps = highest level allowed (brightness.STEPS), anything above it is rejected at load
+- keys.dispatch(code, held, post, step=0)
+    code = 0-255 button code, held = 0 press / 1 held, post = light.post
+    step = steps to move for up/down/glide actions (hold acceleration), 0 = controller default
+    returns False if the code isn't in the map
+
+Notes:
+- keymap.json: {"buttons": [{"code": "0x45", "label": "1", "press": "level low", "hold": "none"}, ...]}
+    code can be "0x.." or a plain int, press/hold default to "none"
+- actions: "none", "up", "down", "toggle", "glide_up", "glide_down",
+    "level N" (only while on, presets), "set N" (also turns on), N = step or a name from names
+- compiled once at boot into 256 entry bytearrays, each event is one index plus one post
+'''
+
+'''----------------------------imports----------------------------------------'''
+import json
+from light_controller import (OP_SET, OP_LEVEL, OP_UP, OP_DOWN, OP_TOGGLE,
+                              OP_GLIDE_UP, OP_GLIDE_DOWN)
+
+'''------------------------------Setup----------------------------------------'''
+UNMAPPED = 0xFF  #code not in the keymap
+NO_ACTION = 0xFE  #mapped, deliberately does nothing
+
+STEP_OPS = (OP_UP, OP_DOWN, OP_GLIDE_UP, OP_GLIDE_DOWN)  #arg is a step count
+
+# action word -> (op, takes a level argument)
+ACTIONS = {
+    'none': (NO_ACTION, False),
+    'up': (OP_UP, False),
+    'down': (OP_DOWN, False),
+    'toggle': (OP_TOGGLE, False),
+    'glide_up': (OP_GLIDE_UP, False),
+    'glide_down': (OP_GLIDE_DOWN, False),
+    'level': (OP_LEVEL, True),
+    'set': (OP_SET, True),
+}
+
+'''-------------------------------Keymap--------------------------------------'''
+class Keymap:
+    __slots__ = ('ops', 'args', 'labels')
+
+    def __init__(self):
+        # [press, held] tables indexed by button code
+        self.ops = (bytearray(b'\xff' * 256), bytearray(b'\xff' * 256))
+        self.args = (bytearray(256), bytearray(256))
+        self.labels = {}  #code -> label, for debug prints only
+
+    @classmethod
+    def load(cls, path, names=None, steps=255):
+        with open(path) as f:
+            config = json.load(f)
+        return cls.compile(config, names, steps)
+
+    @classmethod
+    def compile(cls, config, names=None, steps=255):
+        keys = cls()
+        names = names or {}
+        for button in config['buttons']:
+            code = button['code']
+            if isinstance(code, str):
+                code = int(code, 0)
+            if not 0 <= code <= 255:
+                raise ValueError("Button code out of range: {}".format(code))
+            keys.labels[code] = button.get('label', '')
+            for held, field in ((0, 'press'), (1, 'hold')):
+                op, arg = parse_action(button.get(field, 'none'), names, steps)
+                keys.ops[held][code] = op
+                keys.args[held][code] = arg
+        return keys
+
+    def dispatch(self, code, held, post, step=0):
+        op = self.ops[held][code & 0xff]
+        if op == UNMAPPED:
+            return False
+        if op != NO_ACTION:
+            post(op, step if op in STEP_OPS else self.args[held][code & 0xff])
+        return True
+
+'''-------------------------------Parse---------------------------------------'''
+def parse_action(text, names, steps=255):
+    words = (text or 'none').split()
+    if words[0] not in ACTIONS:
+        raise ValueError("Unknown keymap action: {}".format(text))
+    op, needs_arg = ACTIONS[words[0]]
+    if not needs_arg:
+        return op, 0
+    if len(words) != 2:
+        raise ValueError("Keymap action needs a level: {}".format(text))
+    level = names[words[1]] if words[1] in names else int(words[1])
+    if not 0 <= level <= steps:  #steps <= 255, args are bytes
+        raise ValueError("Keymap level out of range: {}".format(text))
+    return op, level
@@ -0,0 +1,178 @@
+'''
+Filename: light_controller.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Central light state and command queue shared by all input sources
+Version: 1.0
+
+Default Pinout:
+- none, drives the fader it is given
+
+Dependencies:
+- ringbuf
+- fade (fader passed in)
+
+Usage:
+- light = LightController(fader, display, high, low, increment, x, steps=100)
+    display(x) is called once after each batch of commands is applied,
+    steps = top of the fader's table (brightness.STEPS), no op can set x past it
+- light.post(op, arg)
+    safe from pin irqs, timer callbacks and main code, queues the command and schedules drain()
+    returns False if the queue was full (counted in light.queue.dropped)
+- light.drain()
+    applies every queued command in order, normally run through micropython.schedule
+- light.limit(cap)
+    max step for the low voltage governor, takes effect at once for every op applied after it (queued ones
+    too) and queues OP_LIMIT to bring x down to it, if the queue is full kick() queues it on its next call
+- light.kick()
+    schedules drain() if commands are waiting and none is pending, the main loop calls this
+    as a backstop for a schedule() that failed (queue full), so drain never runs in main code
+- ops: OP_SET (arg=step), OP_LEVEL (arg=step, only while on), OP_UP, OP_DOWN, OP_TOGGLE,
+    OP_GLIDE_UP, OP_GLIDE_DOWN, OP_LIMIT (arg=max step, from the low voltage governor)
+    up/down/glide take the number of steps to move as arg, 0 = increment/glide_step
+
+Notes:
+- x, last_valid_x and the thresholds are only ever changed inside apply(), input callbacks just post
+- every op's result is clamped to steps and cap in apply(), so no input can get past the governor's limit,
+    lowering the cap below x fades down over derate_ms, a cap of 0 turns the light straight off (last
+    step kept for the toggle) and raising the cap never turns the brightness back up on its own
+- commands are single ints (op << 16 | arg) so posting never allocates
+- stats() -> (posted, applied, dropped, peak queue depth)
+'''
+
+'''----------------------------imports----------------------------------------'''
+from micropython import const
+from ringbuf import RingBuffer, Deferred
+
+'''------------------------------Setup----------------------------------------'''
+OP_SET = const(0)         # set step, also turns the light on
+OP_LEVEL = const(1)       # set step only if not off (presets and holds)
+OP_UP = const(2)          # step up by increment
+OP_DOWN = const(3)        # step down by increment
+OP_TOGGLE = const(4)      # off <-> last valid step
+OP_GLIDE_UP = const(5)    # held input ramp up
+OP_GLIDE_DOWN = const(6)  # held input ramp down
+OP_LIMIT = const(7)       # set the max step (low voltage cap)
+
+NO_CAP = const(0xffff)
+
+QUEUE_SIZE = 16
+
+'''--------------------------Light Controller---------------------------------'''
+class LightController:
+    __slots__ = ('x', 'last_valid_x', 'high', 'low', 'increment',
+                 'fade_ms', 'glide_ms', 'glide_step', 'fader', 'display',
+                 'queue', 'drainer', 'posted', 'applied', 'cap', 'reclamp', 'derate_ms', 'steps')
+
+    def __init__(self, fader, display, high, low, increment, x,
+                 fade_ms=200, glide_ms=120, glide_step=None, derate_ms=2000, steps=100):
+        self.fader = fader
+        self.display = display
+        self.high = high
+        self.low = low
+        self.increment = increment
+        self.fade_ms = fade_ms
+        self.glide_ms = glide_ms
+        self.glide_step = increment if glide_step is None else glide_step
+        self.derate_ms = derate_ms
+        self.steps = steps
+        self.cap = NO_CAP
+        self.reclamp = 0  #OP_LIMIT for cap still to be queued
+        x = min(x, steps)
+        self.x = x
+        self.last_valid_x = x
+        self.queue = RingBuffer(QUEUE_SIZE)
+        self.drainer = Deferred(self.drain)
+        self.posted = 0
+        self.applied = 0
+        fader.jump(x)
+
+    '''--------------------------------Post-----------------------------------'''
+    def post(self, op, arg=0):
+        if not self.queue.put((op << 16) | (arg & 0xffff)):
+            return False
+        self.posted += 1
+        self.kick()
+        return True
+
+    # The cap can't wait on queue space like other inputs, a lost OP_LIMIT would leave the light over it
+    # until the governor's next stage change
+    def limit(self, cap):
+        self.cap = cap
+        self.reclamp = 1
+        self.kick()
+
+    # Schedule drain() if nothing is pending, also the main loop's backstop for a failed schedule
+    # and for an OP_LIMIT that didn't fit in the queue
+    def kick(self):
+        if self.reclamp and self.queue.put((OP_LIMIT << 16) | self.cap):
+            self.reclamp = 0
+            self.posted += 1
+        if len(self.queue):
+            self.drainer.schedule()
+
+    '''--------------------------------Drain----------------------------------'''
+    def drain(self):
+        show = 0
+        queue = self.queue
+        while True:
+            cmd = queue.get(-1)
+            if cmd < 0:
+                break
+            show |= self.apply(cmd >> 16, cmd & 0xffff)
+            self.applied += 1
+        if show:
+            self.display(self.x)
+
+    '''--------------------------------Apply----------------------------------'''
+    # Only place light state changes, returns 1 if the display should update
+    def apply(self, op, arg):
+        x = self.x
+        duration = self.fade_ms
+        if op == OP_LIMIT:
+            self.cap = arg
+            if x <= arg:
+                return 0
+            if arg == 0:  #cutoff, hard off
+                self.last_valid_x = x  #back to this once the cutoff clears
+                duration = 0
+            else:
+                duration = self.derate_ms
+            x = arg
+        elif op == OP_SET:
+            x = arg
+        elif op == OP_TOGGLE:
+            if x != 0:
+                self.last_valid_x = x  #saves value if not off
+                x = 0
+            else:  #if off, sets x to last valid x
+                x = self.last_valid_x
+        elif x == 0:  #everything else leaves the light off
+            return 0
+        elif op == OP_LEVEL:
+            x = arg
+        elif op == OP_UP or op == OP_DOWN:
+            step = arg if arg else self.increment
+            if op == OP_UP:
+                x = x + step if x < self.high - step else self.high
+            else:
+                x = x - step if x > step + self.low else self.low
+        elif op == OP_GLIDE_UP or op == OP_GLIDE_DOWN:
+            step = arg if arg else self.glide_step
+            if op == OP_GLIDE_UP:
+                x = x + step if x < self.high - step else self.high
+            else:
+                x = x - step if x > step + self.low else self.low
+            duration = self.glide_ms
+        else:
+            return 0
+        if x > self.steps:  #past the end of the duty table (and energy buckets)
+            x = self.steps
+        if x > self.cap:
+            x = self.cap
+        self.x = x
+        self.fader.fade_to(x, duration)
+        return 1
+
+    def stats(self):
+        return self.posted, self.applied, self.queue.dropped, self.queue.peak
@@ -9,59 +9,225 @@ Default Pinout:
 - GPIOXX -> Component PinXX
 
 Dependencies:
+- bootprof
 - pwm_light.py
 - ir_remote
 - dht22
 - tm1637
 - tm1637_custom
+- scheduler
+- idle
+- ina260, soc, energy, governor (imported in start_power)
+- sdcard (micropython-lib driver), datalog, session (imported in start_logging)
 
 Usage:
 - *Light is a harbor freight ROADSHOCK 3 in. LED Flood Light
     Must open up case and solder wire to PWM dimming inputs on each TP8005s then these tie together
     Must also run this dimming wire externally (drill hole and epoxy wire in to maintain waterproofing)
-- Currently performs initialization of pwm_light, then ir_remote,
-    then starts main loop which reads dht22 and prints temp and humidity
+- Boots fast: pwm output and switches first, then the uasyncio main loop (scheduler) starts
+    with ir_remote coming up in a boot task while the display spinner runs, then one periodic task per subsystem:
+    sensors (dht22 sampling), input (ir/light/display queue backstop), log (prints)
+- task periods are the *_period_ms settings below, scheduler prints overruns and loop lag
+- boot stage timings (bootprof) are printed over serial once ir is up
+- INA260 on I2C0 (GPIO4 sda, GPIO5 scl, GPIO3 alert) is read on every conversion ready alert,
+    boot carries on without it if the board isn't found, with it a soc task publishes battery percent
+    every soc_period_ms (model coefficients in soc_model.py from tools/soc_fit.py)
+- energy counts mAh/mWh on every INA260 reading and predicts runtime left at the current brightness,
+    totals are saved to energy.dat every energy_save_ms and reset when soc reads full
+- governor caps the brightness in low_stages as the filtered bus voltage falls and turns the light off
+    below cutoff_mv (until charged), the display shows "LO n" for warn_ms on each step down and "CUt"
+    while cut off, the cap is enforced in the light controller so panel and ir both obey it
+- regulate_mw > 0 turns on constant power mode once the INA260 is found: brightness steps select a wattage
+    (regulate_mw at full) and pwm_light.regulator holds it as the battery sags, log prints loop error/timing
+- SD card on SPI1 (GPIO10 sck, GPIO11 mosi, GPIO12 miso, GPIO13 cs) is mounted at sd_mount, a record
+    (I, V, P, duty, temp, humidity) goes into datalog's RAM ring every record_period_ms and whole blocks
+    are written every flush_period_ms, boot carries on without logging if there's no card
+- each boot logs to a new session file (L0000042.BIN) numbered from sessions.idx on the card, the index
+    keeps each session's start time, record count and byte range (tools/sessions.py lists/dumps them,
+    tools/soc_fit.py reads the .bin logs directly)
+- after boot the idle manager lightsleeps between events while the light is off, log prints time asleep
 
 Notes:
 - Any additional information or warnings.
 - Need to add:
-    * P, I, V readings and shutoff for low battery
-    * incorperate formula created with AI to estimate battery capacity from I and V while under load
     * GPS
-    * use dht22 to aid in calculations for battery capacity
     * update with permanent rf remote (not temp solution: ir remote)
-    * implement SD card write for datalogging
 '''
-import time
-import pwm_light #import pwm module: pwm settings for light and override switches
-import ir_remote  # Import the IR remote module
-import dht22 #import dht22 temp/humidity module
-import tm1637
+import bootprof #first, boot stage times count from here
+import pwm_light #import pwm module: output restored to the start level (marks the "pwm" stage), then the display
+import ir_remote  # Import the IR remote module (ir_rx itself loads in start_ir_receiver)
+import dht22 #import dht22 temp/humidity module (dht loads on the first sample)
 import tm1637_custom
+import scheduler
+import idle
+from machine import Pin, I2C
+bootprof.stage("imports")
 
-def main():
-    tm1637_custom.tm.show("strt") #debug statement
-    time.sleep(.5)
-    tm1637_custom.custom_scroll("light init",150) #debug statement
-    tm1637_custom.load(1)
-    time.sleep(1)
-    pwm_light.start_pwm_light() #Start PWM and look for sw interrupts
-    tm1637_custom.load(0)
-    tm1637_custom.custom_scroll("ir init",150) #debug statement
-    tm1637_custom.load(1)
-    time.sleep(.5)
+'''------------------------------Setup----------------------------------------'''
+sensor_period_ms = 2000 #dht22 minimum interval
+input_period_ms = 100 #backstop only, events normally drain through schedule()
+log_period_ms = 10000
+lag_period_ms = 100 #loop lag monitor wake up
+lag_warn_ms = 20 #lag worth reporting
+soc_period_ms = 1000 #battery state of charge publish rate
+battery_mah = 7000 #usable capacity for the runtime prediction
+full_percent = 98 #soc at or above this on the first estimate resets the energy counter
+energy_save_ms = 300000 #energy.dat write period, flash wear
+low_stages = ((11800, 70), (11500, 45), (11200, 20)) #(bus mV under load, max brightness step), 12V AGM
+cutoff_mv = 10800 #light off below this until the battery is back over cutoff_mv + 1000
+warn_ms = 3000 #low voltage warning time on the display
+regulate_mw = 0 #constant power mode: power at full brightness, 0 = fixed duty per step
+sd_mount = "/sd"
+sd_baud = 10000000 #SPI clock once the card is initialised
+log_blocks = 2048 #pre-sized session file, 2048 blocks = 1MB = ~8.5h at one record/s, then it wraps
+record_period_ms = 1000
+flush_period_ms = 15000 #one block of records, at most this much lost on a power cut
+index_period_ms = 60000 #session record count/byte range update in sessions.idx
+ina = None #ina260.INA260 once found, None if the board isn't fitted
+battery = None #soc.Estimator, needs the ina
+counter = None #energy.Counter, needs the ina
+gov = None #governor.Governor, needs the ina
+log = None #datalog.Logger once the SD card is mounted
+sessions = None #session.SessionIndex on the card
+session_id = 0 #this boot's session number
+
+'''------------------------------Tasks----------------------------------------'''
+def input_backstop():
+    ir_remote.kick()
+    pwm_light.light.kick()
+    tm1637_custom.kick()
+    if ina:
+        ina.kick()
+
+def start_power():
+    global ina, battery, counter, gov
+    import ina260
+    try:
+        i2c = I2C(0, scl=Pin(5), sda=Pin(4), freq=400000)
+        ina = ina260.INA260(i2c, alert=Pin(3)) #16 x 1.1ms averages, new reading every ~35ms
+    except OSError as e:
+        print("INA260 not found:", e)
+        return
+    import soc
+    import energy
+    import governor
+    counter = energy.Counter(battery_mah, lambda: pwm_light.light.x, pwm_light.brightness.STEPS)
+    gov = governor.Governor(low_stages, cutoff_mv, pwm_light.limit, power_warning,
+                            pwm_light.brightness.STEPS)
+    ina.callback = on_reading #every conversion ready read
+    battery = soc.Estimator(ina, dht22.temperature, check_full)
+    scheduler.every("soc", soc_period_ms, battery.update, 2000)
+    scheduler.every("energy", energy_save_ms, counter.save, 50000)
+    if regulate_mw:
+        pwm_light.regulator.enable(ina, regulate_mw)
+
+def on_reading(ina):
+    counter.sample(ina)
+    gov.update(ina.voltage_uv // 1000)
+
+def power_warning(stage, mv):
+    print(f"Low voltage: stage {stage} at {mv}mV, cap {gov.cap}")
+    if stage == 0:
+        tm1637_custom.clear_warning()
+    elif stage > len(low_stages):
+        tm1637_custom.show_warning("CUt ") #stays until the cutoff clears
+    else:
+        tm1637_custom.show_warning("LO " + str(stage), warn_ms)
+
+# Fresh charge: the first estimate after boot reads full, start counting from zero
+def check_full(est):
+    if est.count == 1 and est.percent >= full_percent:
+        counter.reset()
+
+def start_logging():
+    global log, sessions, session_id
+    import os
+    import time
+    try:
+        import sdcard
+        from machine import SPI
+        spi = SPI(1, sck=Pin(10), mosi=Pin(11), miso=Pin(12))
+        sd = sdcard.SDCard(spi, Pin(13), baudrate=sd_baud)
+        os.mount(os.VfsFat(sd), sd_mount)
+    except (ImportError, OSError) as e:
+        print("SD card not found:", e)
+        return
+    import datalog
+    import session
+    sessions = session.SessionIndex(sd_mount + "/sessions.idx")
+    # next number straight from the index (no directory listing), the last boot's session is closed out
+    # with what its log file really holds, its last index update can be up to index_period_ms behind
+    session_id = sessions.begin(time.time(), lambda name: datalog.scan(sd_mount + "/" + name, log_blocks))
+    log = datalog.Logger(sd_mount + "/" + sessions.name(session_id), log_blocks)
+    scheduler.every("record", record_period_ms, record_sample, 2000)
+    scheduler.every("flush", flush_period_ms, log.flush, 50000)
+    scheduler.every("index", index_period_ms, update_session, 50000)
+
+def update_session():
+    sessions.update(session_id, log.records - log.pending(), log.used()) #only what's on the card
+
+def record_sample():
+    duty = pwm_light.pwm.duty_u16()
+    if ina:
+        log.record(ina.current_ua // 1000, ina.voltage_uv // 1000, ina.power_mw, duty,
+                   dht22.temp_c10, dht22.hum10)
+    else:
+        log.record(0, 0, 0, duty, dht22.temp_c10, dht22.hum10)
+
+def log_status():
+    dht22.print_reading()
+    asleep, awake, sleeps, _ = idle.stats()
+    print(f"Idle: asleep {asleep}ms, awake {awake}ms, {sleeps} lightsleeps")
+    if ina:
+        print(f"Power: {ina.voltage_uv // 1000}mV, {ina.current_ua // 1000}mA, {ina.power_mw}mW")
+    if battery:
+        print(f"Battery: {battery.percent}% (rest {battery.rest_mv}mV, {battery.max_us}us per estimate)")
+    if gov:
+        print(f"Governor: {gov.mv()}mV filtered, stage {gov.stage}, cap {gov.cap}")
+    if log:
+        records, dropped, writes, _, _, max_us = log.stats()
+        print(f"Datalog: session {session_id}, {records} records, {dropped} dropped, {writes} blocks, {log.pending()} pending,"
+              f" {max_us}us max flush")
+    reg = pwm_light.regulator
+    if reg.on:
+        ticks, err, err_max, holds, _, max_us = reg.stats()
+        print(f"Regulator: target {reg.target_mw}mW, error {err}mW (max {err_max}), duty {reg.duty},"
+              f" {ticks} ticks, {holds} anti-windup holds, {max_us}us max")
+    if counter:
+        samples, _, max_us = counter.stats()
+        print(f"Energy: {counter.used_mah()}mAh, {counter.used_mwh()}mWh used, {counter.runtime_min()} min left"
+              f" ({samples} samples, {max_us}us max)")
+
+'''-------------------------------Boot----------------------------------------'''
+# Runs as the first task, the loop and the display spinner keep going around it
+async def boot():
     ir_remote.start_ir_receiver()  #Start looking for IR remote
-    tm1637_custom.load(0)
-    tm1637_custom.tm.show("done") #debug statement
-    time.sleep(.5)
-    tm1637_custom.tm.show("    ")
-    
+    tm1637_custom.hold_off = ir_remote.receiving  #status writes wait out an ir burst
+    bootprof.stage("ir")
+    start_power()
+    bootprof.stage("power")
+    start_logging()
+    bootprof.stage("sd")
+    tm1637_custom.show_status("done", 500) #replaces the spinner, compositor blanks it
+    bootprof.report()
+    for check in (pwm_light.busy, ir_remote.busy, tm1637_custom.busy):
+        idle.add_check(check)
+    await idle.run(pwm_light.pwm) #lightsleep between events while the output is static
+
+'''-------------------------------Main----------------------------------------'''
+
+def main():
+    pwm_light.start_pwm_light() #look for sw interrupts, light responds to the panel from here
+    bootprof.stage("switches")
+    tm1637_custom.load(1) #spinner runs on its own timer while the rest comes up
+    bootprof.stage("display")
+
     # Main Loop
+    scheduler.every("sensors", sensor_period_ms, dht22.sample, 20000) #get temp/humidity
+    scheduler.every("input", input_period_ms, input_backstop, 1000)
+    scheduler.every("log", log_period_ms, log_status)
     try:
-        while True:
-            # Perform tasks
-            dht22.read_dht22() #get temp/humidity
-            time.sleep(2)  #wait 2 seconds between readings
+        scheduler.run(lag_period_ms, lag_warn_ms, log_period_ms, boot())
     except KeyboardInterrupt:
         print("Program exited.")
 
@@ -15,65 +15,96 @@ Default Pinout:
 Dependencies:
 - tm1637_custom
 - tm1637
+- bootprof
+- brightness
+- fade
+- light_controller
+- hold
+- regulator
 
 Usage:
 - Controls PWM and three override switches, set invert = 1 or 0 depending on circuit, adjust threshold values for override brightness settings
+    brightness values (x, thresholds, increment) are perceptual step indexes 0-brightness.STEPS into duty_table, not raw duty
     adjust increment for higher or lower incrementing of brightness, adjust hold_threshold for duration required to register button hold,
     only: start_pwm_light() is needed to call, initialize, and attach interrupts
+- set_x() fades to the new level over fade_ms, glide_up()/glide_down() are for held inputs and chain short
+    fades of glide_ms each so repeated calls (ir repeat codes) give one continuous ramp
+- every input function here only posts a command to light (LightController), current level is light.x
+- limit(cap) caps the brightness at step cap (0 = off until the cap lifts), for the low voltage governor
+- regulator sits between light and fader, regulator.enable(ina, full_mw) switches to constant power
+    (steps select a wattage, a PI loop sets the duty), it passes straight to the fader until then
 
 Notes:
-- interrupts for the three buttons (top_sw, middle_sw, bottom_sw)
+- interrupts for the three buttons (top_sw, middle_sw, bottom_sw) only record the edge and return,
+    a periodic switch timer runs the debounce/press/hold state machine and stops itself once all switches are released
+- irq_stats() returns (max, last) switch IRQ handler time in us, tools/bench_switch.py compares it with the old handler
+- busy() is True while anything timer driven here is still running, the idle manager won't lightsleep then
+- tm1637_custom is imported after the light is created so the first pwm write doesn't wait on the display,
+    the "pwm" boot stage is marked here, between the two
 '''
 
 '''----------------------------imports----------------------------------------'''
 import machine
 import time
-from machine import Pin, PWM
+from machine import Pin, PWM, Timer
+from micropython import const
 import tm1637
-import tm1637_custom
+import bootprof
+import brightness
+from fade import Fader
+from hold import HoldTimer
+from regulator import Regulator
+from light_controller import (LightController, OP_SET, OP_LEVEL, OP_UP, OP_DOWN,
+                              OP_TOGGLE, OP_GLIDE_UP, OP_GLIDE_DOWN)
 
 '''------------------------------Setup----------------------------------------'''
 # Invert pwm logic? for inverted duty cycle: 1=invert 0=regular
 invert = 1
 
-# Constants for brightness levels
-high_thresh = 63000 #high bright, max thresh = 65535
-mid_thresh = 10000
-low_thresh = 1000 #low bright, min thresh = 1 since 0 reserved for off
-increment = 1000
+# Constants for brightness levels, in perceptual steps (duty in comments)
+high_thresh = 98 #high bright (~62200), max thresh = brightness.STEPS
+mid_thresh = 46  #(~10000)
+low_thresh = 13 #low bright (~1020), min thresh = 1 since 0 reserved for off
+increment = 2
+
+# Step index -> duty_u16 lookup, built once with invert already applied
+duty_table = brightness.build_table(brightness.STEPS, invert)
+
+fade_ms = 200  #fade duration for presses/presets in milliseconds
+derate_ms = 2000  #fade down when a low voltage cap drops below the current level
+fade_tick = 10  #fade timer period in milliseconds
+glide_ms = 120  #held input ramp segment, slightly over the ~108ms NEC repeat interval
+glide_step = increment  #steps moved per held input repeat
 
 hold_threshold = 0.8  # seconds
+debounce_delay = 50  # Debounce time in milliseconds (adjust if needed)
+switch_tick = 10  # Switch state machine tick in milliseconds
 
 # PWM setup
 pwm = PWM(Pin(6))
 pwm.freq(1000)  #1kHz freq
-x = 32767  #Initial brightness set point
-pwm.duty_u16(x)
+fader = Fader(pwm, duty_table, fade_tick)
+regulator = Regulator(pwm, fader, duty_table, invert)  #fixed duty per step until enabled
 
 # Switches setup
 top_sw = Pin(20, Pin.IN, Pin.PULL_UP)
 middle_sw = Pin(21, Pin.IN, Pin.PULL_UP)
 bottom_sw = Pin(22, Pin.IN, Pin.PULL_UP)
 
-top_sw_last_state = 1
-middle_sw_last_state = 1
-bottom_sw_last_state = 1
+# Switch states
+SW_IDLE = const(0)      # released, waiting for a falling edge
+SW_DEBOUNCE = const(1)  # edge recorded, waiting out debounce_delay
+SW_DOWN = const(2)      # confirmed press, timing for a hold
+SW_HELD = const(3)      # hold action fired, waiting for release
+
+switch_timer = Timer(-1)
+switch_timer_running = 0
+irq_us_max = 0   # longest switch IRQ handler time seen (us)
+irq_us_last = 0  # most recent switch IRQ handler time (us)
 
-'''------------------------------Set PWM--------------------------------------'''
-def set_x(val):
-    global x
-    x = val
-    if invert == 1:
-        x_actual = abs(x-65535)
-    else:
-        x_actual = x
-    pwm.duty_u16(x_actual)    
-    display_brightness()
-    
 '''-------------------------Display Brightness--------------------------------'''
 # Display brightness in percent or high/low/off
-def display_brightness():
-    global invert
+def display_brightness(x):
     if x == high_thresh:
         tm1637_custom.show_bright_percentage(0,"high ")
     elif x == low_thresh:
@@ -81,121 +112,157 @@ def display_brightness():
     elif x == 0:
         tm1637_custom.show_bright_percentage(0,"off ")
     else:
-        tm1637_custom.show_bright_percentage(1,x) #calculates percent doesnt need inversion
+        tm1637_custom.show_bright_percentage(1,brightness.percent(x)) #integer percent of the step range
+
+'''----------------------------Light State------------------------------------'''
+# Initial brightness set point 76 (~32700)
+light = LightController(regulator, display_brightness, high_thresh, low_thresh, increment, 76,
+                        fade_ms, glide_ms, glide_step, derate_ms, brightness.STEPS)
+
+bootprof.stage("pwm")  #output is at the start level from here
+
+# Display comes up only once the output is restored, creating it writes the whole frame out
+# over the bus (~3ms), display_brightness() is never called before this point
+import tm1637_custom
+
+'''------------------------------Set PWM--------------------------------------'''
+def set_x(val):
+    light.post(OP_SET, val)
+
+# Preset level, ignored while off
+def set_level(val):
+    light.post(OP_LEVEL, val)
 
 '''------------------------------SW Hold--------------------------------------'''
 # Brightness control functions
 def top_hold():
-    global x
-    if x != 0: #if not off   
-        x = high_thresh
-        set_x(x)
+    light.post(OP_LEVEL, high_thresh)
 
 def middle_hold():
-    global x
-    if x != 0:
-        x = mid_thresh
-        set_x(x)
+    light.post(OP_LEVEL, mid_thresh)
 
 def bottom_hold():
-    global x
-    if x != 0:
-        x = low_thresh
-        set_x(x)
+    light.post(OP_LEVEL, low_thresh)
 
 '''------------------------------SW Press-------------------------------------'''
 def top_press():
-    global x, increment
-    if x != 0:
-        if x < high_thresh - increment:
-            x += increment
-        else:
-            x = high_thresh
-        set_x(x)
+    light.post(OP_UP)
 
 def middle_press():
-    global x
-    global last_valid_x
     # Toggle between 0 and the last valid x value
-    if x != 0:
-        last_valid_x = x #saves value if not off
-    if x == 0:       #if off, sets x to last valid x
-        x = last_valid_x
-    else:
-        x = 0
-    set_x(x)
+    light.post(OP_TOGGLE)
 
 def bottom_press():
-    global x, increment
-    if x != 0:    
-        if x > increment + low_thresh:
-            x -= increment
-        else:
-            x = low_thresh
-        set_x(x)
+    light.post(OP_DOWN)
+
+'''------------------------------Glide----------------------------------------'''
+# Held input ramps, each call extends the ramp by glide_step over glide_ms
+def glide_up():
+    light.post(OP_GLIDE_UP)
+
+def glide_down():
+    light.post(OP_GLIDE_DOWN)
+
+'''------------------------------Limit----------------------------------------'''
+# Max brightness step, every other input is clamped to it in the light's apply(),
+# the regulator gets the same cap as a duty ceiling so it can't push past it as the battery sags
+def limit(cap):
+    light.limit(cap)  #never dropped, retried from kick() if the command queue is full
+    regulator.limit(cap)
+
+'''---------------------------Switch State Machine----------------------------'''
+# One instance per panel switch, the IRQ only sets edge, tick() does the rest
+class Switch:
+    __slots__ = ('pin', 'press', 'hold', 'state', 'edge', 't0', 'timer')
+
+    def __init__(self, pin, press, hold, hold_ms):
+        self.pin = pin
+        self.press = press  #action on release before hold_threshold
+        self.hold = hold    #action once held past hold_threshold
+        self.state = SW_IDLE
+        self.edge = 0
+        self.t0 = 0  #debounce start
+        self.timer = HoldTimer(hold_ms)  #same hold engine as the ir remote
+
+    def irq(self, pin):
+        switch_irq(self)
+
+    def tick(self, now):
+        # returns 1 while the switch still needs ticking
+        state = self.state
+        if state == SW_IDLE:
+            if not self.edge:
+                return 0
+            self.edge = 0
+            self.state = SW_DEBOUNCE
+            self.t0 = now
+        elif state == SW_DEBOUNCE:
+            if time.ticks_diff(now, self.t0) >= debounce_delay:
+                if self.pin.value() == 0:  #check if still pressed
+                    self.state = SW_DOWN
+                    self.timer.start(now)  #start counting press time
+                else:
+                    self.state = SW_IDLE  #bounce or glitch
+        elif state == SW_DOWN:
+            if self.pin.value() == 1:  #released before hold threshold
+                self.state = SW_IDLE
+                self.press()
+            elif self.timer.held(now):  #if held
+                self.state = SW_HELD
+                self.hold()
+        elif self.pin.value() == 1:  #SW_HELD, only re-arm on release
+            self.state = SW_IDLE
+        return 1
 
 '''-----------------------------Interrupts------------------------------------'''
-# Interrupt handler function that checks for presses or holds
-def check_switch_state():
-    global top_sw_last_state, middle_sw_last_state, bottom_sw_last_state
-    debounce_delay = 50  # Debounce time in milliseconds (adjust if needed)
-    
-    if top_sw.value() == 0 and top_sw_last_state == 1:
-        time.sleep_ms(debounce_delay)  #short debounce
-        if top_sw.value() == 0:  #check if still pressed
-            press_time = time.ticks_ms() #start counting time
-            while top_sw.value() == 0:
-                time.sleep(0.01) #more delay
-                if time.ticks_diff(time.ticks_ms(), press_time) > hold_threshold * 1000: #if held
-                    #print("Top switch is held") #debug statement
-                    top_hold()
-                    break
-            else:
-                #print("Top switch is pressed") #debug statement
-                top_press()
-            while top_sw.value() == 0:  #wait for release
-                time.sleep(0.01)
-            top_sw_last_state = 1  #only update on release
-            
-    if middle_sw.value() == 0 and middle_sw_last_state == 1:
-        time.sleep_ms(debounce_delay)
-        if middle_sw.value() == 0:
-            press_time = time.ticks_ms()
-            while middle_sw.value() == 0:
-                time.sleep(0.01)
-                if time.ticks_diff(time.ticks_ms(), press_time) > hold_threshold * 1000:
-                    #print("Middle switch is held") #debug statement
-                    middle_hold()
-                    break
-            else:
-                #print("Middle switch is pressed") #debug statement
-                middle_press()
-            while middle_sw.value() == 0:
-                time.sleep(0.01)
-            middle_sw_last_state = 1  
-
-    if bottom_sw.value() == 0 and bottom_sw_last_state == 1:
-        time.sleep_ms(debounce_delay)
-        if bottom_sw.value() == 0:
-            press_time = time.ticks_ms()
-            while bottom_sw.value() == 0:
-                time.sleep(0.01)
-                if time.ticks_diff(time.ticks_ms(), press_time) > hold_threshold * 1000:
-                    #print("Bottom switch is held") #debug statement
-                    bottom_hold()
-                    break
-            else:
-                #print("Bottom switch is pressed") #debug statement
-                bottom_press()
-            while bottom_sw.value() == 0:
-                time.sleep(0.01)
-            bottom_sw_last_state = 1  
+# Pin interrupt, records the edge and makes sure the switch timer is running
+def switch_irq(sw):
+    global irq_us_max, irq_us_last
+    t = time.ticks_us()
+    sw.edge = 1
+    if not switch_timer_running:
+        start_switch_timer()
+    irq_us_last = time.ticks_diff(time.ticks_us(), t)
+    if irq_us_last > irq_us_max:
+        irq_us_max = irq_us_last
+
+def start_switch_timer():
+    global switch_timer_running
+    switch_timer_running = 1
+    switch_timer.init(period=switch_tick, mode=Timer.PERIODIC, callback=switch_tick_cb)
+
+# Periodic timer callback, advances every switch and stops once all are idle
+def switch_tick_cb(timer):
+    global switch_timer_running
+    now = time.ticks_ms()
+    busy = 0
+    for sw in switches:
+        busy |= sw.tick(now)
+    if not busy:
+        switch_timer.deinit()
+        switch_timer_running = 0
+        for sw in switches:  #edge landed while stopping, keep ticking
+            if sw.edge:
+                start_switch_timer()
+                break
+
+# Latency check: (max, last) switch IRQ handler time in us
+def irq_stats():
+    return irq_us_max, irq_us_last
+
+# True while a fade, switch debounce/hold, queued command or power loop is in progress (idle manager check)
+def busy():
+    return fader.fading() or switch_timer_running or light.drainer.pending or len(light.queue) or regulator.running
+
+hold_ms = int(hold_threshold * 1000)  #converted once, no float work in the tick
+switches = (Switch(top_sw, top_press, top_hold, hold_ms),
+            Switch(middle_sw, middle_press, middle_hold, hold_ms),
+            Switch(bottom_sw, bottom_press, bottom_hold, hold_ms))
 
 '''------------------------------Startup--------------------------------------'''
 # Main setup function
 def start_pwm_light():
     # Attach interrupts to switches (falling edge)
-    top_sw.irq(trigger=Pin.IRQ_FALLING, handler=lambda pin: check_switch_state())
-    middle_sw.irq(trigger=Pin.IRQ_FALLING, handler=lambda pin: check_switch_state())
-    bottom_sw.irq(trigger=Pin.IRQ_FALLING, handler=lambda pin: check_switch_state())
+    for sw in switches:
+        sw.pin.irq(trigger=Pin.IRQ_FALLING, handler=sw.irq)
     #print("PWM light control initialized.") #debug statement
\ No newline at end of file
@@ -0,0 +1,195 @@
+'''
+Filename: regulator.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Optional constant power mode, integer PI loop on INA260 power that drives the light's PWM duty
+Version: 1.0
+
+Default Pinout:
+- none, drives the PWM object it is given
+
+Dependencies:
+- fade (fader passed in)
+- ina260 (passed to enable())
+
+Usage:
+- reg = Regulator(pwm, fader, table, invert, period=40, kp=128, ki=32, slew=2000)
+    pwm/fader/table/invert = the light's PWM, Fader and step -> duty table (pwm_light),
+    kp/ki = gains in Q8 duty counts per mW, slew = max duty change per tick, period = tick in ms
+- reg stands in for the fader in LightController: reg.fade_to(step, duration), reg.jump(step), reg.fading()
+    pass straight through to the fader until regulation is enabled
+- reg.enable(ina, full_mw) -> brightness steps now select a target power, full_mw = power at full step
+- reg.disable() -> back to fixed duty per step through the fader
+- reg.limit(step) -> duty ceiling, the duty the governor's cap step would have, shared with the controller
+- reg.running -> 1 while the loop timer runs (idle manager check)
+- reg.stats() -> (ticks, last error mW, max abs error mW, anti-windup holds, last us, max us)
+
+Notes:
+- target power for a step = full_mw * the step's un-inverted table duty / 65535, so steps stay perceptual
+    and at the voltage full_mw was measured at the loop's feed forward (the table duty) is already right
+- output = feed forward + (kp * error + integral) >> 8, slew limited then clamped to 0..limit duty,
+    all small ints, no floats and nothing allocated per tick
+- anti-windup: the integral isn't accumulated while the output is held by the slew limit or a clamp
+    in the direction the error pushes, so it can't wind up during a fade or while capped
+- the integral only moves on a fresh INA260 reading (its sample count changed), the tick can run faster
+    than conversions without integrating the same error twice
+- stepping to 0 ramps down at the slew rate and stops the timer, a limit of 0 (cutoff) is immediate
+'''
+
+'''----------------------------imports----------------------------------------'''
+from time import ticks_us, ticks_diff
+from machine import Timer
+from micropython import const
+
+'''------------------------------Setup----------------------------------------'''
+Q = const(8) #fraction bits of the gains and integral
+MAX_DUTY = const(65535)
+INTEG_MAX = const(65535 << 8) #integral clamp, one full scale of duty
+
+'''------------------------------Regulator------------------------------------'''
+class Regulator:
+    __slots__ = ('pwm', 'fader', 'table', 'invert', 'period', 'kp', 'ki', 'slew', 'timer', 'tick_cb',
+                 'ina', 'full_mw', 'on', 'running', 'step', 'target_mw', 'ff', 'hi', 'duty', 'integ',
+                 'seen', 'err', 'err_max', 'holds', 'ticks', 'last_us', 'max_us')
+
+    def __init__(self, pwm, fader, table, invert, period=40, kp=128, ki=32, slew=2000):
+        self.pwm = pwm
+        self.fader = fader
+        self.table = table
+        self.invert = invert
+        self.period = period
+        self.kp = kp
+        self.ki = ki
+        self.slew = slew
+        self.timer = Timer(-1)
+        self.tick_cb = self._tick  #bound once so starting the loop doesn't allocate
+        self.ina = None
+        self.full_mw = 0
+        self.on = 0
+        self.running = 0
+        self.step = 0
+        self.target_mw = 0
+        self.ff = 0
+        self.hi = MAX_DUTY
+        self.duty = 0
+        self.integ = 0
+        self.seen = 0
+        self.err = 0
+        self.err_max = 0
+        self.holds = 0
+        self.ticks = 0
+        self.last_us = 0
+        self.max_us = 0
+
+    def _level(self, step):
+        # un-inverted table duty for a step
+        d = self.table[step]
+        return MAX_DUTY - d if self.invert else d
+
+    '''---------------------------Fader Interface-----------------------------'''
+    def fade_to(self, step, duration):
+        if not self.on:
+            self.fader.fade_to(step, duration)
+            return
+        self.step = step
+        ff = self._level(step)
+        self.ff = ff
+        self.target_mw = ((ff >> 4) * self.full_mw) >> 12
+        if step and not self.running:
+            self._start()
+
+    def jump(self, step):
+        self.fade_to(step, 0)
+
+    def fading(self):
+        return self.fader.fading()
+
+    def limit(self, step):
+        self.hi = self._level(step)
+        if self.running and self.duty > self.hi:  #cutoff/derate can't wait for the next tick
+            self._write(self.hi)
+
+    '''--------------------------------Mode-----------------------------------'''
+    def enable(self, ina, full_mw):
+        self.ina = ina
+        self.full_mw = full_mw
+        step = self.fader.step()
+        self.fader.jump(step)  #stop any fade, the loop owns the pwm from here
+        d = self.pwm.duty_u16()
+        self.duty = MAX_DUTY - d if self.invert else d
+        self.integ = 0
+        self.seen = ina.samples
+        self.err_max = 0
+        self.on = 1
+        self.fade_to(step, 0)
+
+    def disable(self):
+        self.on = 0
+        self._stop()
+        self.fader.jump(self.step)
+
+    '''--------------------------------Loop-----------------------------------'''
+    def _start(self):
+        self.running = 1
+        self.timer.init(period=self.period, mode=Timer.PERIODIC, callback=self.tick_cb)
+
+    def _stop(self):
+        if self.running:
+            self.timer.deinit()
+            self.running = 0
+
+    def _write(self, duty):
+        self.duty = duty
+        self.pwm.duty_u16(MAX_DUTY - duty if self.invert else duty)
+
+    def _tick(self, timer):
+        t = ticks_us()
+        ina = self.ina
+        err = self.target_mw - ina.power_mw
+        n = ina.samples
+        fresh = n != self.seen
+        self.seen = n
+        integ = self.integ
+        if fresh:
+            integ += self.ki * err
+            if integ > INTEG_MAX:
+                integ = INTEG_MAX
+            elif integ < -INTEG_MAX:
+                integ = -INTEG_MAX
+        out = self.ff + ((self.kp * err + integ) >> Q)
+        duty = self.duty
+        held = 0
+        slew = self.slew
+        if out > duty + slew:
+            out = duty + slew
+            held = 1
+        elif out < duty - slew:
+            out = duty - slew
+            held = -1
+        if out > self.hi:
+            out = self.hi
+            held = 1
+        elif out < 0:
+            out = 0
+            held = -1
+        if fresh and ((held > 0 and err > 0) or (held < 0 and err < 0)):
+            integ -= self.ki * err  #anti-windup, hold the integral while the output can't follow
+            self.holds += 1
+        self.integ = integ
+        self._write(out)
+        if not self.step and not out:  #ramped down to off
+            self.integ = 0
+            self._stop()
+        self.err = err
+        if err < 0:
+            err = -err
+        if err > self.err_max:
+            self.err_max = err
+        self.ticks += 1
+        t = ticks_diff(ticks_us(), t)
+        self.last_us = t
+        if t > self.max_us:
+            self.max_us = t
+
+    def stats(self):
+        return self.ticks, self.err, self.err_max, self.holds, self.last_us, self.max_us
@@ -0,0 +1,122 @@
+'''
+Filename: ringbuf.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Preallocated lock-free ring buffer for passing data out of interrupt/timer callbacks, and its scheduled drain
+Version: 1.0
+
+Default Pinout:
+- none
+
+Dependencies:
+- none
+
+Usage:
+- rb = RingBuffer(size, width=1, typecode='i')
+    size = number of records, rounded up to a power of 2, width = ints per record
+- rb.put(value) / rb.get(default)
+    single value records (width=1)
+- i = rb.reserve() -> write rb.buf[i] .. rb.buf[i+width-1] -> rb.commit()
+    multi value records from the producer side, reserve() returns -1 when full
+- i = rb.peek() -> read rb.buf[i] .. rb.buf[i+width-1] -> rb.advance()
+    multi value records from the consumer side, peek() returns -1 when empty
+- task = Deferred(fn) -> task.schedule() runs fn() once through micropython.schedule, safe from irqs,
+    timer callbacks and main code, no allocation, returns False if a run was already pending or the
+    schedule queue was full (nothing new scheduled), task.pending is 1 until fn starts
+
+Notes:
+- single producer / single consumer: only the producer moves head and only the consumer moves tail,
+    so no locking is needed as long as each side runs in one context (all producers in soft
+    timer/scheduled callbacks count as one context since the VM runs those one at a time)
+- full buffer drops the new record and counts it in dropped, it never blocks or allocates
+- one slot is always left empty to tell full from empty
+- Deferred is how every ring here gets consumed: pending drops before fn runs, so records added while
+    it drains schedule another run, a failed schedule leaves pending 0 so the owner's kick() from the
+    main loop can just call schedule() again, fn therefore only ever runs in scheduled context
+'''
+
+'''----------------------------imports----------------------------------------'''
+from array import array
+import micropython
+
+'''-----------------------------Ring Buffer-----------------------------------'''
+class RingBuffer:
+    __slots__ = ('buf', 'width', 'mask', 'head', 'tail', 'dropped', 'peak')
+
+    def __init__(self, size, width=1, typecode='i'):
+        n = 2
+        while n < size:
+            n <<= 1
+        self.buf = array(typecode, (0 for _ in range(n * width)))
+        self.width = width
+        self.mask = n - 1
+        self.head = 0  #next record to write, producer only
+        self.tail = 0  #next record to read, consumer only
+        self.dropped = 0  #records lost to a full buffer
+        self.peak = 0  #most records ever waiting at once
+
+    def __len__(self):
+        return (self.head - self.tail) & self.mask
+
+    def reserve(self):
+        if ((self.head + 1) & self.mask) == self.tail:
+            self.dropped += 1
+            return -1
+        return self.head * self.width
+
+    def commit(self):
+        self.head = (self.head + 1) & self.mask
+        n = (self.head - self.tail) & self.mask
+        if n > self.peak:
+            self.peak = n
+
+    def peek(self):
+        if self.tail == self.head:
+            return -1
+        return self.tail * self.width
+
+    def advance(self):
+        self.tail = (self.tail + 1) & self.mask
+
+    def put(self, value):
+        i = self.reserve()
+        if i < 0:
+            return False
+        self.buf[i] = value
+        self.commit()
+        return True
+
+    def get(self, default=None):
+        i = self.peek()
+        if i < 0:
+            return default
+        value = self.buf[i]
+        self.advance()
+        return value
+
+    def clear(self):
+        self.tail = self.head
+
+'''---------------------------Deferred Call-----------------------------------'''
+class Deferred:
+    __slots__ = ('fn', 'cb', 'pending')
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.cb = self._run  #bound once so schedule() doesn't allocate
+        self.pending = 0
+
+    def schedule(self):
+        if self.pending:
+            return False
+        self.pending = 1
+        try:
+            micropython.schedule(self.cb, 0)
+        except RuntimeError:  #schedule queue full, the next schedule() retries
+            self.pending = 0
+            return False
+        return True
+
+    def _run(self, _):
+        self.pending = 0
+        self.fn()
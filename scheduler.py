@@ -0,0 +1,146 @@
+'''
+Filename: scheduler.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Cooperative uasyncio scheduler for the main loop, periodic tasks plus a loop lag monitor
+Version: 1.0
+
+Default Pinout:
+- none
+
+Dependencies:
+- uasyncio (MicroPython built in)
+
+Usage:
+- every(name, period_ms, fn, budget_us=0)
+    register fn() to run every period_ms, budget_us = run time allowed per call (0 = whole period),
+    can be called before run() or from a running task
+- run(lag_ms=100, warn_ms=20, report_ms=10000, startup=None)
+    starts every registered task and the lag monitor, never returns,
+    startup = optional coroutine (e.g. the rest of boot) started before the periodic tasks
+- until_next() -> ms until the next task or monitor wake is due, for the idle manager
+- stats() -> list of (name, runs, overruns, max us, max late ms) per task, then ('loop', lag checks,
+    lag warnings, 0, max lag ms)
+
+Notes:
+- tasks are plain functions, keep each call short (no sleeps), the loop only switches between calls
+- a task overruns when a call takes longer than its budget or it starts later than its slot,
+    a late task skips the missed slots instead of running back to back to catch up
+- lag monitor wakes every lag_ms and measures how late it was, anything over warn_ms means some
+    task (or callback) held the cpu too long, overruns and lag are printed at most once per report_ms
+'''
+
+'''----------------------------imports----------------------------------------'''
+import uasyncio as asyncio
+from time import ticks_ms, ticks_us, ticks_add, ticks_diff
+
+'''------------------------------Setup----------------------------------------'''
+tasks = []
+lag_checks = 0
+lag_warnings = 0
+lag_max = 0
+monitor_due = 0  #ticks_ms of the lag monitor's next wake
+running = False
+
+'''--------------------------------Task---------------------------------------'''
+class Periodic:
+    __slots__ = ('name', 'period', 'fn', 'budget', 'due', 'runs', 'overruns', 'max_us', 'late_max', 'reported')
+
+    def __init__(self, name, period_ms, fn, budget_us=0):
+        self.name = name
+        self.period = period_ms
+        self.fn = fn
+        self.budget = budget_us or period_ms * 1000
+        self.due = ticks_ms()  #ticks_ms of the next call
+        self.runs = 0
+        self.overruns = 0
+        self.max_us = 0
+        self.late_max = 0
+        self.reported = 0  #overruns already printed
+
+    async def loop(self):
+        due = self.due = ticks_ms()
+        while True:
+            late = ticks_diff(ticks_ms(), due)
+            t = ticks_us()
+            self.fn()
+            t = ticks_diff(ticks_us(), t)
+            self.runs += 1
+            if t > self.max_us:
+                self.max_us = t
+            if late > self.late_max:
+                self.late_max = late
+            if t > self.budget or late >= self.period:
+                self.overruns += 1
+            due = ticks_add(due, self.period)
+            wait = ticks_diff(due, ticks_ms())
+            if wait < 0:  #missed slots, skip them
+                due = ticks_add(due, (-wait // self.period + 1) * self.period)
+                wait = ticks_diff(due, ticks_ms())
+            self.due = due
+            await asyncio.sleep_ms(wait)
+
+def every(name, period_ms, fn, budget_us=0):
+    task = Periodic(name, period_ms, fn, budget_us)
+    tasks.append(task)
+    if running:  #added after run(), e.g. from the boot task
+        asyncio.create_task(task.loop())
+    return task
+
+'''------------------------------Monitor--------------------------------------'''
+async def monitor(lag_ms, warn_ms, report_ms):
+    global lag_checks, lag_warnings, lag_max, monitor_due
+    last_report = ticks_ms()
+    worst = 0  #worst lag since the last report
+    while True:
+        t = ticks_ms()
+        monitor_due = ticks_add(t, lag_ms)
+        await asyncio.sleep_ms(lag_ms)
+        lag = ticks_diff(ticks_ms(), t) - lag_ms
+        lag_checks += 1
+        if lag > lag_max:
+            lag_max = lag
+        if lag > warn_ms:
+            lag_warnings += 1
+            if lag > worst:
+                worst = lag
+        if ticks_diff(ticks_ms(), last_report) >= report_ms:
+            last_report = ticks_ms()
+            report(worst)
+            worst = 0
+
+def report(worst):
+    if worst:
+        print(f"Loop lag: {worst}ms (max {lag_max}ms)")
+    for task in tasks:
+        if task.overruns != task.reported:
+            print(f"Task {task.name} overran {task.overruns - task.reported}x (max {task.max_us}us, late {task.late_max}ms)")
+            task.reported = task.overruns
+
+# ms until the next task (or the lag monitor) is due, 0 if one is already due
+def until_next():
+    now = ticks_ms()
+    wait = ticks_diff(monitor_due, now)
+    for task in tasks:
+        d = ticks_diff(task.due, now)
+        if d < wait:
+            wait = d
+    return wait if wait > 0 else 0
+
+def stats():
+    out = [(t.name, t.runs, t.overruns, t.max_us, t.late_max) for t in tasks]
+    out.append(('loop', lag_checks, lag_warnings, 0, lag_max))
+    return out
+
+'''-------------------------------Run-----------------------------------------'''
+async def main(lag_ms, warn_ms, report_ms, startup):
+    global running
+    running = True
+    if startup is not None:
+        asyncio.create_task(startup)
+    for task in tasks:
+        asyncio.create_task(task.loop())
+    await monitor(lag_ms, warn_ms, report_ms)
+
+def run(lag_ms=100, warn_ms=20, report_ms=10000, startup=None):
+    asyncio.run(main(lag_ms, warn_ms, report_ms, startup))
@@ -0,0 +1,207 @@
+'''
+Filename: session.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Per boot log sessions, fixed record index file with a write ahead journal for O(1) lookup
+Version: 1.0
+
+Default Pinout:
+- none, writes to a file (SD card mounted by main)
+
+Dependencies:
+- none
+
+Usage:
+- idx = SessionIndex(path)
+    opens (or creates) the index, replays a journal entry left by a power cut, a missing or corrupt
+    index is rebuilt numbering on from the highest L*.BIN already in its directory
+- s = idx.begin(start_s, finish=None) -> new session number, idx.name(s) -> its log file name ("L0000042.BIN")
+    start_s = time.time() at boot, the next number comes from the index header, no directory listing,
+    the previous session is marked closed, finish(name) -> (records, end byte) read from its log file
+    (datalog.scan) replaces the counts of its last update(), None keeps them
+- idx.update(s, records, end) -> record count and end byte of the session's log so far, from a slow task
+- idx.get(s) -> (session, state, start_s, records, first byte, end byte, name) or None, O(1) seek
+- idx.first, idx.next -> oldest session in the index and the number the next begin() will use
+- idx.close()
+
+File layout:
+- 0: header HEADER_FORMAT (magic, version, first session, next session)
+- 32: journal, one RECORD_FORMAT slot
+- 64 + (session - first) * 32: RECORD_FORMAT (magic, state, check, session, start_s, records,
+    first byte, end byte, name stem)
+
+Notes:
+- every change is journalled first: write the new record to the journal slot and sync, write it to its
+    table slot and the header and sync, then clear the journal and sync, on open a valid journal entry
+    is applied again (same slot, same bytes, so replaying twice is harmless)
+- check is an xor of the record's other bytes, a journal entry torn by a power cut fails it and is
+    dropped, the table is still as it was before that update started
+- records/end of an open session are as of its last update(), anything logged after that is still in
+    its log file, begin() on the next boot closes it out with finish() so the index catches up with
+    what actually reached the card
+- a rebuilt index only lists the directory once, without that numbering would restart at 1 and the
+    next Logger would append a new session into the existing L0000001.BIN
+'''
+
+'''----------------------------imports----------------------------------------'''
+import os
+import struct
+from micropython import const
+
+'''------------------------------Setup----------------------------------------'''
+MAGIC = const(0x5849) #"IX"
+REC_MAGIC = const(0x5352) #"RS"
+VERSION = const(1)
+HEADER = const(32)
+JOURNAL = const(32) #journal slot offset
+TABLE = const(64) #first record offset
+RECORD = const(32)
+FIRST_BYTE = const(512) #log data starts after datalog's header block
+
+OPEN = const(1) #logging, counts may be behind
+CLOSED = const(2)
+
+HEADER_FORMAT = "<HHII" #magic, version, first session, next session
+RECORD_FORMAT = "<HBBIIIII8s" #magic, state, check, session, start_s, records, first, end, name stem
+
+def name(session):
+    return "L%07d.BIN" % session
+
+# Highest session number with a log file in directory d, 0 if none
+def last_log(d):
+    last = 0
+    for fname in os.listdir(d) if d else os.listdir():
+        if len(fname) == 12 and fname[0] == "L" and fname[8:] == ".BIN":
+            try:
+                last = max(last, int(fname[1:8]))
+            except ValueError:
+                pass
+    return last
+
+'''-----------------------------Index-----------------------------------------'''
+class SessionIndex:
+    __slots__ = ('path', 'f', 'buf', 'hdr', 'first', 'next')
+
+    def __init__(self, path):
+        self.path = path
+        self.buf = bytearray(RECORD) #record being written/read
+        self.hdr = bytearray(HEADER)
+        try:
+            self.f = open(path, "r+b")
+        except OSError:
+            self._create()
+            return
+        f = self.f
+        f.readinto(self.hdr)
+        magic, version, first, nxt = struct.unpack_from(HEADER_FORMAT, self.hdr)
+        if magic != MAGIC or version != VERSION:
+            f.close()
+            self._create()
+            return
+        self.first = first
+        self.next = nxt
+        self._replay()
+
+    def _create(self):
+        path = self.path
+        self.first = self.next = last_log(path[:path.rfind("/")] if "/" in path else "") + 1
+        self.f = open(path, "wb")
+        self._write_header()
+        self.f.write(bytes(RECORD)) #empty journal
+        self.f.close()
+        self.f = open(self.path, "r+b")
+
+    '''------------------------------Records----------------------------------'''
+    def _check(self):
+        c = 0
+        buf = self.buf
+        for i in range(RECORD):
+            if i != 3:
+                c ^= buf[i]
+        return c
+
+    def _pack(self, session, state, start_s, records, first, end):
+        buf = self.buf
+        struct.pack_into(RECORD_FORMAT, buf, 0, REC_MAGIC, state, 0, session, start_s, records, first, end,
+                         name(session)[:8].encode())
+        buf[3] = self._check()
+
+    def _valid(self):
+        buf = self.buf
+        return (buf[0] | (buf[1] << 8)) == REC_MAGIC and buf[3] == self._check()
+
+    def _slot(self, session):
+        return TABLE + (session - self.first) * RECORD
+
+    def _write_header(self):
+        struct.pack_into(HEADER_FORMAT, self.hdr, 0, MAGIC, VERSION, self.first, self.next)
+        self.f.seek(0)
+        self.f.write(self.hdr)
+
+    '''------------------------------Journal----------------------------------'''
+    def _commit(self):
+        # buf holds the new record: journal, apply, clear
+        f = self.f
+        f.seek(JOURNAL)
+        f.write(self.buf)
+        f.flush()
+        self._apply()
+        f.seek(JOURNAL)
+        f.write(bytes(RECORD))
+        f.flush()
+
+    def _apply(self):
+        session = struct.unpack_from("<I", self.buf, 4)[0]
+        f = self.f
+        f.seek(self._slot(session))
+        f.write(self.buf)
+        if session >= self.next:
+            self.next = session + 1
+            self._write_header()
+        f.flush()
+
+    def _replay(self):
+        f = self.f
+        f.seek(JOURNAL)
+        if f.readinto(self.buf) == RECORD and self._valid():
+            self._apply()
+            f.seek(JOURNAL)
+            f.write(bytes(RECORD))
+            f.flush()
+
+    '''--------------------------------Use------------------------------------'''
+    def begin(self, start_s, finish=None):
+        prev = self.get(self.next - 1)
+        if prev is not None and prev[1] == OPEN: #last boot ended without closing it
+            s, _, _, records, _, end, fname = prev
+            done = finish(fname) if finish else None
+            if done is not None:
+                records, end = done
+            self.update(s, records, end, CLOSED)
+        session = self.next
+        self._pack(session, OPEN, start_s, 0, FIRST_BYTE, FIRST_BYTE)
+        self._commit()
+        return session
+
+    def name(self, session):
+        return name(session)
+
+    def update(self, session, records, end, state=OPEN):
+        rec = self.get(session)
+        if rec is None:
+            return
+        self._pack(session, state, rec[2], records, FIRST_BYTE, end)
+        self._commit()
+
+    def get(self, session):
+        if session < self.first or session >= self.next:
+            return None
+        f = self.f
+        f.seek(self._slot(session))
+        if f.readinto(self.buf) != RECORD or not self._valid():
+            return None
+        _, state, _, s, start_s, records, first, end, stem = struct.unpack_from(RECORD_FORMAT, self.buf)
+        return s, state, start_s, records, first, end, stem.decode() + ".BIN"
+
+    def close(self):
+        self.f.close()
@@ -0,0 +1,86 @@
+'''
+Filename: sim/__init__.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Host side (CPython) simulation runtime for the kayak light firmware
+Version: 1.0
+
+Usage:
+- python -m sim [--seconds N] [--scenario file.py]
+    boots the unmodified main.py on a virtual clock and prints a summary
+- import sim; sim.install()
+    puts the stand-in machine, utime/time, micropython, dht and uasyncio modules in sys.modules,
+    after that the firmware modules import normally
+- sim.press(pin_id, t_ms, hold_ms, bounce=0)
+    script a panel switch press (pin pulled low while held)
+- sim.ir.press(Pin(17), cmd, ...)
+    script an ir remote button, see sim/ir.py
+- sim.flash() -> changes to a fresh temp directory holding copies of the board's json files,
+    files the firmware writes (energy.dat, ...) land there instead of the repo
+
+Notes:
+- host only, never copy this package to the board
+- everything runs on the virtual clock in sim.clock, so runs are deterministic and
+    much faster than real time
+'''
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# MicroPython module name -> stand-in module under sim/
+MODULES = {
+    'machine': 'sim.machine',
+    'utime': 'sim.utime',
+    'time': 'sim.utime',
+    'micropython': 'sim.micropython',
+    'dht': 'sim.dht',
+    'uasyncio': 'sim.uasyncio',
+}
+
+'''------------------------------Install--------------------------------------'''
+def install(root=ROOT):
+    import importlib
+    for name, target in MODULES.items():
+        sys.modules[name] = importlib.import_module(target)
+    if root not in sys.path:
+        sys.path.insert(0, root)
+
+# Forget firmware modules and state so the next import boots fresh
+def reset():
+    from sim.clock import clock
+    from sim.machine import Pin, PWM, I2C
+    from sim import uasyncio
+    clock.reset()
+    uasyncio.new_event_loop()
+    Pin.reset_all()
+    PWM.instances.clear()
+    I2C.devices.clear()
+    for name, mod in list(sys.modules.items()):
+        path = getattr(mod, '__file__', None) or ''
+        if path.startswith(ROOT) and not name.startswith('sim'):
+            del sys.modules[name]
+
+# Stand-in for the board's filesystem, the firmware opens files relative to the cwd
+def flash():
+    import glob
+    import shutil
+    import tempfile
+    path = tempfile.mkdtemp(prefix='kayak_flash_')
+    for name in glob.glob(os.path.join(ROOT, '*.json')):
+        shutil.copy(name, path)
+    os.chdir(path)
+    return path
+
+'''-------------------------------Inputs--------------------------------------'''
+def press(pin_id, t_ms, hold_ms, bounce=0):
+    from sim.machine import Pin
+    pin = Pin(pin_id)
+    t = t_ms * 1000
+    for i in range(bounce):  #contact bounce, 200us apart
+        pin.drive_at(t + i * 400, 0)
+        pin.drive_at(t + i * 400 + 200, 1)
+    t += bounce * 400
+    pin.drive_at(t, 0)
+    pin.drive_at(t + hold_ms * 1000, 1)
@@ -0,0 +1,96 @@
+'''
+Filename: sim/__main__.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Boot the firmware on the host and report what it did
+Version: 1.0
+
+Usage:
+- python -m sim [--seconds 60] [--scenario file.py] [--module main] [--entry main] [--quiet]
+    scenario is a python file with scenario(sim) that scripts inputs before boot, SECONDS = n in it
+    sets the run length when --seconds isn't given (60 otherwise),
+    e.g. sim.press(20, 5000, 100) or sim.ir.press(sim.machine.Pin(17), 0x18, t_us=6000000, repeats=10),
+    and optionally check(sim) that asserts on the outcome once the run stops, a failed check prints
+    why and exits with status 1 so a scenario doubles as a test
+'''
+
+import argparse
+import importlib
+import io
+import sys
+import time as host_time
+
+import sim
+import sim.ir
+import sim.machine
+from sim import clock as clock_mod
+from sim.clock import StopSimulation
+from sim.tm1637bus import TM1637Bus
+
+def load_scenario(path):
+    namespace = {'__file__': path, '__name__': 'scenario'}
+    with open(path) as f:
+        exec(compile(f.read(), path, 'exec'), namespace)
+    return namespace.get('scenario'), namespace.get('check'), namespace.get('SECONDS')
+
+def run(seconds=None, scenario=None, module='main', entry='main', quiet=False):
+    sim.install()
+    fn, check, length = load_scenario(scenario) if scenario else (None, None, None)
+    if seconds is None:
+        seconds = length or 60
+    sim.flash()
+    clock = clock_mod.clock
+    bus = TM1637Bus(7, 8)
+    sim.bus = bus
+    if fn:
+        fn(sim)
+    clock.stop_at(int(seconds * 1000000))
+    out = sys.stdout
+    if quiet:
+        sys.stdout = io.StringIO()
+    wall = host_time.perf_counter()
+    try:
+        mod = importlib.import_module(module)
+        getattr(mod, entry)()
+        clock.run_until(clock.stop_us)  #entry returned early, let timers finish
+    except StopSimulation:
+        pass
+    finally:
+        wall = host_time.perf_counter() - wall
+        sys.stdout = out
+    result = report(clock, bus, wall)
+    if check:
+        try:
+            check(sim)
+        except AssertionError as e:
+            print('check FAILED  %s' % e)
+            sys.exit(1)
+        print('check         passed')
+    return result
+
+def report(clock, bus, wall):
+    from sim.machine import PWM
+    virtual = clock.now_us / 1000000
+    print()
+    print('--- sim summary ---')
+    print('virtual time  %.3f s' % virtual)
+    print('wall time     %.3f s (%.0fx real time)' % (wall, virtual / wall if wall else 0))
+    print('events run    %d' % clock.events_run)
+    for pwm in PWM.instances:
+        print('pwm %-9s %d duty changes, now %d' % (pwm.pin, len(pwm.history), pwm.duty_u16()))
+    print('display       %d frames, %d transactions, %d bytes, %.1f ms on bus, reads "%s"'
+          % (len(bus.frames), bus.transactions, bus.bytes, bus.bus_us / 1000, bus.text()))
+    return clock, bus
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m sim', description='Boot the firmware on the host and report what it did')
+    parser.add_argument('--seconds', type=float, help="virtual seconds to run (scenario's SECONDS or 60)")
+    parser.add_argument('--scenario', help='python file defining scenario(sim)')
+    parser.add_argument('--module', default='main', help='firmware module to boot')
+    parser.add_argument('--entry', default='main', help='function to call in that module')
+    parser.add_argument('--quiet', action='store_true', help='hide firmware prints')
+    args = parser.parse_args(argv)
+    run(args.seconds, args.scenario, args.module, args.entry, args.quiet)
+
+if __name__ == '__main__':
+    main()
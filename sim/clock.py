@@ -0,0 +1,156 @@
+'''
+Filename: sim/clock.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Virtual clock and event loop behind the simulated machine/utime modules
+Version: 1.0
+
+Usage:
+- clock.now_us
+    current virtual time in microseconds since boot
+- clock.at(t_us, fn, *args) / clock.after(dt_us, fn, *args)
+    run fn(*args) at a virtual time, returns an event handle for cancel()
+- clock.hw_at(t_us, fn, *args)
+    same for the outside world (input pin levels), these run on time even while a callback runs
+- clock.sleep_us(us)
+    advance time, running every timer/pin event and scheduled callback that falls due,
+    this is what time.sleep*() in the firmware ends up calling
+- clock.run_until(t_us) / clock.stop_at(t_us)
+    run events up to a time / raise StopSimulation once firmware sleeps past a time
+
+Notes:
+- code takes no virtual time to run, only sleeps move the clock, so a firmware loop with
+    time.sleep(2) covers hours of virtual time in a second or two of wall time
+- callbacks never nest, same as soft irqs/micropython.schedule on the board: while one is
+    running, sleeps inside it move time but due events wait until it returns
+- hw_at events are the exception, an input changes level when it changes and a hard irq handler
+    runs from it right then, nested inside whatever callback is running
+'''
+
+import heapq
+
+# Raised from a sleep once the stop time is reached, BaseException so firmware
+# "except Exception" blocks don't swallow it
+class StopSimulation(BaseException):
+    pass
+
+class Event:
+    __slots__ = ('t', 'seq', 'fn', 'args', 'live')
+
+    def __init__(self, t, seq, fn, args):
+        self.t = t
+        self.seq = seq
+        self.fn = fn
+        self.args = args
+        self.live = True
+
+    def __lt__(self, other):
+        return (self.t, self.seq) < (other.t, other.seq)
+
+    def cancel(self):
+        self.live = False
+
+class Clock:
+    SCHEDULE_DEPTH = 8  #MICROPY_SCHEDULER_DEPTH on the board
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.now_us = 0
+        self._events = []
+        self._hw = []  #hw_at events, kept apart so they can run inside a callback
+        self._seq = 0
+        self._scheduled = []  #micropython.schedule queue
+        self._depth = 0  #>0 while a callback is running
+        self.stop_us = None
+        self.events_run = 0
+        self.slept_us = 0  #time spent in sleeps called from firmware
+
+    '''------------------------------Events-----------------------------------'''
+    def at(self, t_us, fn, *args):
+        self._seq += 1
+        ev = Event(max(t_us, self.now_us), self._seq, fn, args)
+        heapq.heappush(self._events, ev)
+        return ev
+
+    def after(self, dt_us, fn, *args):
+        return self.at(self.now_us + dt_us, fn, *args)
+
+    def hw_at(self, t_us, fn, *args):
+        self._seq += 1
+        ev = Event(max(t_us, self.now_us), self._seq, fn, args)
+        heapq.heappush(self._hw, ev)
+        return ev
+
+    def schedule(self, fn, arg):
+        if len(self._scheduled) >= self.SCHEDULE_DEPTH:
+            raise RuntimeError("schedule queue full")
+        self._scheduled.append((fn, arg))
+
+    def _head(self, heap):
+        while heap and not heap[0].live:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    # earliest due heap, hw first on a tie so a level change lands before the irq it queues
+    def _next(self):
+        ev = self._head(self._events)
+        hw = self._head(self._hw)
+        if hw is not None and (ev is None or hw.t <= ev.t):
+            return self._hw
+        return self._events if ev is not None else None
+
+    def next_event_us(self):
+        heap = self._next()
+        return heap[0].t if heap else None
+
+    def _call(self, fn, *args):
+        self._depth += 1
+        try:
+            fn(*args)
+        finally:
+            self._depth -= 1
+
+    def _run_scheduled(self):
+        while self._scheduled:
+            fn, arg = self._scheduled.pop(0)
+            self._call(fn, arg)
+
+    def run_until(self, t_us):
+        if self._depth:  #inside a callback, only the outside world keeps time
+            while True:
+                ev = self._head(self._hw)
+                if ev is None or ev.t > t_us:
+                    break
+                heapq.heappop(self._hw)
+                self.now_us = max(self.now_us, ev.t)
+                self.events_run += 1
+                ev.fn(*ev.args)
+            self.now_us = max(self.now_us, t_us)
+            return
+        self._run_scheduled()
+        while True:
+            heap = self._next()
+            if heap is None or heap[0].t > t_us:
+                break
+            ev = heapq.heappop(heap)
+            self.now_us = max(self.now_us, ev.t)
+            self.events_run += 1
+            self._call(ev.fn, *ev.args)
+            self._run_scheduled()
+        self.now_us = max(self.now_us, t_us)
+
+    '''------------------------------Sleeps-----------------------------------'''
+    def sleep_us(self, us):
+        target = self.now_us + max(0, int(us))
+        if self.stop_us is not None and not self._depth and target >= self.stop_us:
+            self.run_until(self.stop_us)
+            raise StopSimulation(self.now_us)
+        self.slept_us += target - self.now_us
+        self.run_until(target)
+
+    def stop_at(self, t_us):
+        self.stop_us = t_us
+
+clock = Clock()
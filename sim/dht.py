@@ -0,0 +1,65 @@
+'''
+Filename: sim/dht.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Scripted stand-in for the MicroPython dht module
+Version: 1.0
+
+Usage:
+- script([(temp_c, humidity), OSError(...), ...], repeat=True)
+    readings handed out one per measure(), an exception instance is raised instead
+    of a reading, repeat=False holds the last entry once the script runs out
+
+Notes:
+- measure() takes MEASURE_US of virtual time like the bit banged read on the board
+'''
+
+from sim.clock import clock
+
+MEASURE_US = 5000
+
+_script = [(21.5, 55.0)]
+_repeat = True
+_index = 0
+
+def script(readings, repeat=True):
+    global _script, _repeat, _index
+    _script = list(readings)
+    _repeat = repeat
+    _index = 0
+
+class DHTBase:
+    def __init__(self, pin):
+        self.pin = pin
+        self.measures = 0
+        self._t = 0
+        self._h = 0
+
+    def measure(self):
+        global _index
+        clock.sleep_us(MEASURE_US)
+        if _index < len(_script):
+            entry = _script[_index]
+            _index += 1
+            if _repeat and _index == len(_script):
+                _index = 0
+        else:
+            entry = _script[-1]
+        self.measures += 1
+        if isinstance(entry, BaseException):
+            raise entry
+        self._t, self._h = entry
+
+class DHT11(DHTBase):
+    def temperature(self):
+        return int(self._t)
+
+    def humidity(self):
+        return int(self._h)
+
+class DHT22(DHTBase):
+    def temperature(self):
+        return round(self._t, 1)
+
+    def humidity(self):
+        return round(self._h, 1)
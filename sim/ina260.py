@@ -0,0 +1,111 @@
+'''
+Filename: sim/ina260.py
+Author: Brad Farris
+Date: 10/18/26
+Description: INA260 register map model on the simulated I2C bus
+Version: 1.0
+
+Usage:
+- ina = INA260Model(addr=0x40, alert=Pin(3), load=fn)
+    attaches to sim.machine.I2C, load(t_us) -> (current mA, bus volts) sampled at each conversion,
+    default is a steady 1500mA at 12.6V
+- light_load(pwm=None, full_ma=3000, idle_ma=40, volts=12.6, invert=1) -> load function that follows
+    the light's PWM duty, for scenarios, pwm=None is LightPWM()
+- LightPWM() stands in for the light's PWM(Pin(6)) before main has made it, reads 65535 (off) until then
+- ina.conversions, ina.reads -> counters
+
+Notes:
+- register pointer doesn't auto increment, reading past 2 bytes repeats the register like the chip
+- conversions run on the virtual clock every avg * (bus ct + shunt ct) while in continuous mode,
+    each one sets CVRF and, with CNVR enabled in Mask/Enable, pulls ALERT low until Mask/Enable is read
+- current/voltage/power are quantised to the chip's LSBs (1.25mA, 1.25mV, 10mW)
+'''
+
+from sim.clock import clock
+from sim.machine import I2C, PWM
+
+AVG_COUNT = (1, 4, 16, 64, 128, 256, 512, 1024)
+CT_US = (140, 204, 332, 588, 1100, 2116, 4156, 8244)
+CONFIG_DEFAULT = 0x6127
+MASK_CNVR = 0x0400
+MASK_CVRF = 0x0008
+
+class LightPWM:
+    # PWM(Pin(6)) isn't made until main imports pwm_light, look it up on each conversion
+    def duty_u16(self):
+        return PWM.instances[-1].duty_u16() if PWM.instances else 65535
+
+def light_load(pwm=None, full_ma=3000, idle_ma=40, volts=12.6, invert=1):
+    pwm = pwm or LightPWM()
+    def load(t_us):
+        duty = pwm.duty_u16()
+        on = 65535 - duty if invert else duty
+        return idle_ma + full_ma * on / 65535, volts
+    return load
+
+class INA260Model:
+    def __init__(self, addr=0x40, alert=None, load=None):
+        self.addr = addr
+        self.alert = alert
+        self.load = load or (lambda t_us: (1500.0, 12.6))
+        self.regs = {}
+        self.conversions = 0
+        self.reads = 0
+        self._event = None
+        self._reset()
+        if alert is not None:
+            alert.drive(1)
+        I2C.attach(addr, self)
+
+    def _reset(self):
+        self.regs = {0x00: CONFIG_DEFAULT, 0x01: 0, 0x02: 0, 0x03: 0, 0x06: 0, 0x07: 0,
+                     0xFE: 0x5449, 0xFF: 0x2270}
+        self._restart()
+
+    def period_us(self):
+        config = self.regs[0x00]
+        return AVG_COUNT[(config >> 9) & 7] * (CT_US[(config >> 6) & 7] + CT_US[(config >> 3) & 7])
+
+    def _restart(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if self.regs[0x00] & 7 in (5, 6, 7):  #continuous modes
+            self._event = clock.after(self.period_us(), self._convert)
+
+    def _convert(self):
+        self._event = clock.after(self.period_us(), self._convert)
+        ma, volts = self.load(clock.now_us)
+        raw_i = int(round(ma / 1.25))
+        raw_v = int(round(volts * 800))
+        raw_p = int(round(abs(raw_i * 1.25) * volts / 10))
+        self.regs[0x01] = raw_i & 0xffff
+        self.regs[0x02] = max(0, min(raw_v, 0xffff))
+        self.regs[0x03] = max(0, min(raw_p, 0xffff))
+        self.regs[0x06] |= MASK_CVRF
+        self.conversions += 1
+        if self.alert is not None and self.regs[0x06] & MASK_CNVR:
+            self.alert.drive(0)
+
+    def read(self, reg, n):
+        self.reads += 1
+        value = self.regs.get(reg, 0)
+        if reg == 0x06:  #reading Mask/Enable clears the flag and releases ALERT
+            self.regs[0x06] &= ~MASK_CVRF
+            if self.alert is not None:
+                self.alert.drive(1)
+        pair = bytes((value >> 8, value & 0xff))
+        return (pair * (n // 2 + 1))[:n]
+
+    def write(self, reg, data):
+        value = (data[0] << 8) | data[1]
+        if reg == 0x00:
+            if value & 0x8000:
+                self._reset()
+                return
+            self.regs[0x00] = value
+            self._restart()
+        elif reg == 0x06:  #flag bits are read only
+            self.regs[0x06] = (value & ~MASK_CVRF) | (self.regs[0x06] & MASK_CVRF)
+        elif reg == 0x07:
+            self.regs[0x07] = value
@@ -0,0 +1,68 @@
+'''
+Filename: sim/ir.py
+Author: Brad Farris
+Date: 10/18/26
+Description: NEC ir remote waveform generator for the simulated ir receiver pin
+Version: 1.0
+
+Usage:
+- nec_frame(addr, cmd) / nec_repeat()
+    mark/space durations in us, starting with a mark
+- send(pin, durations, t_us, jitter=0)
+    schedule the edges on a Pin, receiver output is active low (mark = 0)
+- press(pin, cmd, addr=0, t_us=None, repeats=0)
+    full frame then a repeat code every REPEAT_US, like holding a remote button
+
+Notes:
+- jitter adds a random +-us to every duration, seed with random.seed() for repeatable runs
+'''
+
+import random
+from sim.clock import clock
+
+'''------------------------------Setup----------------------------------------'''
+LEADER_MARK = 9000
+LEADER_SPACE = 4500
+REPEAT_SPACE = 2250
+BIT_MARK = 562
+ZERO_SPACE = 562
+ONE_SPACE = 1687
+REPEAT_US = 108000  #frame start to repeat start
+
+'''------------------------------Frames---------------------------------------'''
+def nec_frame(addr, cmd, extended=False):
+    if extended:
+        word = (addr & 0xffff) | (cmd & 0xff) << 16 | ((cmd ^ 0xff) & 0xff) << 24
+    else:
+        word = (addr & 0xff) | ((addr ^ 0xff) & 0xff) << 8 | (cmd & 0xff) << 16 | ((cmd ^ 0xff) & 0xff) << 24
+    durations = [LEADER_MARK, LEADER_SPACE]
+    for bit in range(32):
+        durations.append(BIT_MARK)
+        durations.append(ONE_SPACE if (word >> bit) & 1 else ZERO_SPACE)
+    durations.append(BIT_MARK)  #stop bit
+    return durations
+
+def nec_repeat():
+    return [LEADER_MARK, REPEAT_SPACE, BIT_MARK]
+
+'''-------------------------------Send----------------------------------------'''
+def send(pin, durations, t_us, jitter=0):
+    level = 0
+    t = t_us
+    pin.drive_at(t, level)
+    for d in durations:
+        if jitter:
+            d += random.randint(-jitter, jitter)
+        t += max(1, d)
+        level ^= 1
+        pin.drive_at(t, level)
+    if level == 0:  #always finish idle high
+        pin.drive_at(t + 1, 1)
+    return t
+
+def press(pin, cmd, addr=0, t_us=None, repeats=0, jitter=0, extended=False):
+    t = clock.now_us if t_us is None else t_us
+    send(pin, nec_frame(addr, cmd, extended), t, jitter)
+    for i in range(1, repeats + 1):
+        send(pin, nec_repeat(), t + i * REPEAT_US, jitter)
+    return t + repeats * REPEAT_US
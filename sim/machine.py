@@ -0,0 +1,297 @@
+'''
+Filename: sim/machine.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Stand-in for the MicroPython machine module on the virtual clock
+Version: 1.0
+
+Usage:
+- Pin(id) returns the same object for the same id, like the rp2 port
+    pin.drive(level) is the outside world changing an input (fires matching irqs)
+    Pin.watch(id, fn) calls fn(pin, level) whenever firmware changes an output (bus recorders)
+- PWM(pin).history -> [(t_us, duty_u16), ...] every duty change with its virtual time
+- Timer(-1) runs its callback off the virtual clock, periodic or one shot
+- I2C talks to device models registered with I2C.attach(addr, model), e.g. sim/ina260.py
+- lightsleep(ms) advances the clock until ms or the first pin irq, lightsleeps/lightsleep_us count it
+
+Notes:
+- inputs idle high (pull ups, ir receiver output) until something drives them
+- input levels change on time (clock.hw_at), pin.irq(..., hard=True) handlers run right at the edge
+    even inside another callback, soft pin irqs and timer callbacks run as callbacks, never nested
+'''
+
+from sim.clock import clock
+
+'''--------------------------------Pin----------------------------------------'''
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+    IRQ_LOW_LEVEL = 1
+    IRQ_HIGH_LEVEL = 2
+
+    _pins = {}
+    _watchers = {}
+    irqs = 0  #irq handlers fired on any pin, lightsleep wakes on a change
+
+    def __new__(cls, id, *args, **kwargs):
+        pin = cls._pins.get(id)
+        if pin is None:
+            pin = object.__new__(cls)
+            pin._id = id
+            pin._mode = Pin.IN
+            pin._pull = None
+            pin._level = 1
+            pin._handler = None
+            pin._trigger = 0
+            pin._hard = False
+            pin.edges = 0  #irq triggers delivered
+            cls._pins[id] = pin
+        return pin
+
+    def __init__(self, id, mode=-1, pull=-1, value=None, **kwargs):
+        self.init(mode, pull, value)
+
+    def __repr__(self):
+        return "Pin(%s)" % (self._id,)
+
+    def init(self, mode=-1, pull=-1, value=None, **kwargs):
+        if mode != -1 and mode is not None:
+            self._mode = mode
+        if pull != -1:
+            self._pull = pull
+        if value is not None:
+            self._set(value)
+
+    @classmethod
+    def reset_all(cls):
+        cls._pins.clear()
+        cls._watchers.clear()
+
+    @classmethod
+    def watch(cls, id, fn):
+        cls._watchers.setdefault(id, []).append(fn)
+
+    # firmware side
+    def value(self, v=None):
+        if v is None:
+            return self._level
+        self._set(v)
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self._set(1)
+
+    def off(self):
+        self._set(0)
+
+    def low(self):
+        self._set(0)
+
+    def high(self):
+        self._set(1)
+
+    def toggle(self):
+        self._set(not self._level)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False, wake=None):
+        self._handler = handler
+        self._trigger = trigger if handler else 0
+        self._hard = hard
+        return self
+
+    def _set(self, v):
+        v = 1 if v else 0
+        if v != self._level:
+            self._level = v
+            for fn in self._watchers.get(self._id, ()):
+                fn(self, v)
+
+    # outside world side
+    def drive(self, level):
+        level = 1 if level else 0
+        if level == self._level:
+            return
+        self._level = level
+        trig = self.IRQ_RISING if level else self.IRQ_FALLING
+        if self._handler and self._trigger & trig:
+            self.edges += 1
+            Pin.irqs += 1
+            if self._hard:
+                clock._call(self._handler, self)
+            else:
+                clock.at(clock.now_us, self._handler, self)
+
+    def drive_at(self, t_us, level):
+        return clock.hw_at(t_us, self.drive, level)
+
+'''--------------------------------PWM----------------------------------------'''
+class PWM:
+    instances = []
+
+    def __init__(self, pin, freq=None, duty_u16=None, **kwargs):
+        PWM.instances.append(self)
+        self.pin = pin
+        self._freq = 0
+        self._duty = 0
+        self.history = []
+        if freq is not None:
+            self.freq(freq)
+        if duty_u16 is not None:
+            self.duty_u16(duty_u16)
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        if not 0 <= d <= 65535:
+            raise ValueError("duty out of range")
+        self._duty = d
+        self.history.append((clock.now_us, d))
+
+    def duty_ns(self, ns=None):
+        if ns is None:
+            return self._duty * 1000000000 // 65535 // max(self._freq, 1)
+        self.duty_u16(min(65535, ns * max(self._freq, 1) * 65535 // 1000000000))
+
+    def deinit(self):
+        self._freq = 0
+
+'''-------------------------------Timer---------------------------------------'''
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self._event = None
+        self.fired = 0
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=-1, tick_hz=1000):
+        self.deinit()
+        if freq > 0:
+            period_us = 1000000 // freq
+        else:
+            period_us = int(period * 1000000 // tick_hz)
+        self._mode = mode
+        self._period_us = max(1, period_us)
+        self._callback = callback
+        self._event = clock.after(self._period_us, self._fire)
+
+    def _fire(self):
+        if self._mode == Timer.PERIODIC:
+            self._event = clock.at(clock.now_us + self._period_us, self._fire)
+        else:
+            self._event = None
+        self.fired += 1
+        if self._callback:
+            self._callback(self)
+
+    def deinit(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def running(self):
+        return self._event is not None
+
+'''--------------------------------I2C----------------------------------------'''
+class I2C:
+    devices = {}  #addr -> device model with read(reg, n) -> bytes and write(reg, data)
+
+    def __init__(self, id=0, scl=None, sda=None, freq=400000, **kwargs):
+        self.freq = freq
+        self.transactions = 0
+        self.bytes = 0
+        self.bus_us = 0  #time the transfers would take on the wire (clock isn't advanced)
+
+    @classmethod
+    def attach(cls, addr, device):
+        cls.devices[addr] = device
+
+    def _device(self, addr, n):
+        self.transactions += 1
+        self.bytes += n + 2  #address + register/data bytes
+        self.bus_us += (n + 2) * 9 * 1000000 // self.freq
+        dev = I2C.devices.get(addr)
+        if dev is None:
+            raise OSError(5)  #EIO, what the rp2 port raises on a NAK
+        return dev
+
+    def scan(self):
+        return sorted(I2C.devices)
+
+    def readfrom_mem_into(self, addr, memaddr, buf, addrsize=8):
+        data = self._device(addr, len(buf) + 1).read(memaddr, len(buf))
+        for i in range(len(buf)):
+            buf[i] = data[i]
+
+    def readfrom_mem(self, addr, memaddr, nbytes, addrsize=8):
+        return bytes(self._device(addr, nbytes + 1).read(memaddr, nbytes))
+
+    def writeto_mem(self, addr, memaddr, buf, addrsize=8):
+        self._device(addr, len(buf) + 1).write(memaddr, bytes(buf))
+
+'''------------------------------Module---------------------------------------'''
+_irq_state = 0
+
+def disable_irq():
+    return _irq_state
+
+def enable_irq(state=0):
+    pass
+
+_freq = 150000000
+
+def freq(hz=None):
+    global _freq
+    if hz is None:
+        return _freq
+    _freq = hz
+
+def unique_id():
+    return b'\x53\x49\x4d\x50\x49\x43\x4f\x32'
+
+def idle():
+    nxt = clock.next_event_us()
+    if nxt is not None and nxt > clock.now_us:
+        clock.sleep_us(nxt - clock.now_us)
+
+lightsleeps = 0
+lightsleep_us = 0  #virtual time spent in lightsleep
+
+def lightsleep(time_ms=None):
+    # wakes after time_ms or on the first pin irq, timers still fire, PWM is not stopped (not modelled)
+    global lightsleeps, lightsleep_us
+    lightsleeps += 1
+    start = clock.now_us
+    target = None if time_ms is None else start + int(time_ms) * 1000
+    irqs = Pin.irqs
+    while Pin.irqs == irqs:
+        nxt = clock.next_event_us()
+        if target is not None and (nxt is None or nxt > target):
+            clock.sleep_us(target - clock.now_us)
+            break
+        if nxt is None:  #nothing will ever wake it
+            clock.sleep_us(clock.stop_us - clock.now_us if clock.stop_us else 0)
+            break
+        clock.sleep_us(nxt - clock.now_us)
+    lightsleep_us += clock.now_us - start
+
+def reset():
+    from sim.clock import StopSimulation
+    raise StopSimulation(clock.now_us)
+
+soft_reset = reset
@@ -0,0 +1,52 @@
+'''
+Filename: sim/micropython.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Stand-in for the MicroPython micropython module
+Version: 1.0
+
+Notes:
+- schedule() queues onto the virtual clock, callbacks run at the next sleep/event boundary
+    and it raises RuntimeError when full just like the board (depth 8)
+- native/viper/asm_thumb are no-ops so decorated firmware functions run as plain Python
+'''
+
+from sim.clock import clock
+
+def const(value):
+    return value
+
+def schedule(fn, arg):
+    clock.schedule(fn, arg)
+
+def native(fn):
+    return fn
+
+viper = native
+asm_thumb = native
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def mem_info(verbose=None):
+    pass
+
+def qstr_info(verbose=None):
+    pass
+
+def stack_use():
+    return 0
+
+def heap_lock():
+    return 0
+
+def heap_unlock():
+    return 0
+
+_opt = 0
+
+def opt_level(level=None):
+    global _opt
+    if level is None:
+        return _opt
+    _opt = level
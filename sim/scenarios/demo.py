@@ -0,0 +1,44 @@
+'''
+Filename: sim/scenarios/demo.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Example scenario, panel switches and a few ir remote buttons after boot
+Version: 1.0
+
+Usage:
+- python -m sim --scenario sim/scenarios/demo.py
+    runs for SECONDS (20) unless --seconds is given,
+    check() asserts the ir '5' preset decoded and set its level, so edges stamped late by display
+    traffic (a soft pin irq) fail the run
+'''
+
+import sys
+
+from sim.clock import clock
+from sim.machine import Pin
+
+SECONDS = 20  #run length unless --seconds is given
+PRESET_S = 10
+PRESET_X = 68  #keymap.json '5' -> level 68
+seen = {}  #light step and ir stats read just before the 'Up' hold
+
+def scenario(sim):
+    sim.press(20, 5000, 100, bounce=3)   # top press, step up
+    sim.press(22, 6000, 1200)            # bottom hold, low
+    sim.press(21, 8000, 100)             # middle press, off
+    sim.press(21, 9000, 100)             # middle press, back on
+    ir = Pin(17)
+    sim.ir.press(ir, 0x40, t_us=PRESET_S * 1000000)     # '5' preset
+    sim.ir.press(ir, 0x18, t_us=12000000, repeats=20)   # hold 'Up'
+    seen.clear()
+    clock.at(11500000, read_preset)
+
+def read_preset():
+    main = sys.modules['main']
+    seen['x'] = main.pwm_light.light.x
+    seen['ir'] = main.ir_remote.stats()
+
+def check(sim):
+    assert seen, "run stopped before the ir preset"
+    assert seen['x'] == PRESET_X, "light at step %d after the '5' preset, expected %d (ir stats %s)" % (
+        seen['x'], PRESET_X, seen['ir'])
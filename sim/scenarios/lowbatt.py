@@ -0,0 +1,79 @@
+'''
+Filename: sim/scenarios/lowbatt.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Low voltage governor scenario, scripted battery voltage curve with sag under the light's load
+Version: 1.0
+
+Usage:
+- python -m sim --scenario sim/scenarios/lowbatt.py
+    runs for SECONDS (150, the whole scripted curve) unless --seconds is given,
+    expect "LO 1".."LO 3" as the cap steps down, no flapping back up when the cap takes load off,
+    then "CUt" and the light off until the end (the curve never recovers past the release voltage),
+    check() asserts exactly that, so the run exits 1 if the governor misbehaves
+
+Notes:
+- edit CURVE to script a different discharge, resting mV is interpolated between (seconds, mV) points
+- terminal voltage = resting - load current * R_MOHM plus a small ripple, like the INA260 sees it
+- every cap the governor sets is recorded with its time (caps), the hook goes in once boot has made the governor
+'''
+
+import math
+
+import sys
+
+from sim.clock import clock
+from sim.machine import Pin, PWM
+from sim.ina260 import INA260Model, light_load
+
+CURVE = ((0, 12400), (20, 12100), (60, 11700), (90, 11500), (100, 11700),  #bump: charger blip / rest
+         (120, 11300), (140, 10900), (150, 10800))
+R_MOHM = 60  #battery + wiring resistance
+RIPPLE_MV = 40
+HOOK_S = 1  #boot (and the governor) is done well before this
+EXPECT_CAPS = [70, 45, 20, 0]  #main.low_stages then the cutoff, each once, in order
+SECONDS = 150  #run length, CURVE reaches the cutoff at ~140s
+
+caps = []  #(seconds, cap) for every governor limit() call
+
+def resting_mv(t):
+    for (t0, v0), (t1, v1) in zip(CURVE, CURVE[1:]):
+        if t <= t1:
+            return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+    return CURVE[-1][1]
+
+def scenario(sim):
+    light = light_load()
+
+    def load(t_us):
+        ma, _ = light(t_us)
+        t = t_us / 1000000
+        mv = resting_mv(t) - ma * R_MOHM / 1000 + RIPPLE_MV * math.sin(t * 7)
+        return ma, mv / 1000
+
+    INA260Model(alert=Pin(3), load=load)
+    del caps[:]
+    clock.at(HOOK_S * 1000000, record_caps)
+    sim.press(20, 2000, 1200)  # top hold, high: full load from the start
+    sim.press(20, 50000, 1200)  # try high again while capped
+    sim.press(21, 130000, 100)  # toggle off/on near the end
+    sim.press(21, 132000, 100)
+
+def record_caps():
+    gov = sys.modules['main'].gov
+    limit = gov.limit
+    def recorded(cap):
+        caps.append((clock.now_us / 1000000, cap))
+        limit(cap)
+    gov.limit = recorded
+
+def check(sim):
+    main = sys.modules['main']
+    assert main.gov is not None, "no governor, INA260 model not found at boot"
+    seq = [cap for _, cap in caps]
+    assert seq == EXPECT_CAPS, "caps %s, expected %s (times %s)" % (seq, EXPECT_CAPS, caps)
+    assert main.gov.stage == len(main.low_stages) + 1, "ended in stage %d, not cut off" % main.gov.stage
+    light = main.pwm_light.light
+    assert light.cap == 0 and light.x == 0, "light x %d cap %d after the cutoff" % (light.x, light.cap)
+    off = main.pwm_light.duty_table[0]
+    assert PWM.instances[-1].duty_u16() == off, "pwm duty %d, off is %d" % (PWM.instances[-1].duty_u16(), off)
@@ -0,0 +1,40 @@
+'''
+Filename: sim/scenarios/power.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Power monitor scenario, INA260 model whose current follows the light's PWM duty
+Version: 1.0
+
+Usage:
+- python -m sim --scenario sim/scenarios/power.py
+    runs for SECONDS (30) unless --seconds is given,
+    check() asserts the INA260 was found and counted, the governor never capped a full battery,
+    the light lightsleeps while off and ends on high, the run exits 1 if not
+'''
+
+import sys
+
+from sim.machine import Pin
+from sim.ina260 import INA260Model, light_load
+
+SECONDS = 30  #run length unless --seconds is given
+
+def scenario(sim):
+    INA260Model(alert=Pin(3), load=light_load())
+    sim.press(21, 8000, 100)    # middle press, off
+    sim.press(21, 16000, 100)   # back on
+    sim.press(20, 20000, 1200)  # top hold, high
+
+def check(sim):
+    main = sys.modules['main']
+    assert main.ina is not None, "INA260 model not found at boot"
+    samples, _, _ = main.counter.stats()
+    assert samples > 500 and main.counter.used_mwh() > 0, "energy counter: %d samples, %dmWh" % (
+        samples, main.counter.used_mwh())
+    changes, cutoffs = main.gov.stats()
+    assert main.gov.stage == 0 and changes == 0 and cutoffs == 0, "governor stage %d, %d changes on a full battery" % (
+        main.gov.stage, changes)
+    _, _, sleeps, _ = main.idle.stats()
+    assert sleeps > 0, "no lightsleeps while the light was off"
+    light = main.pwm_light.light
+    assert light.x == main.pwm_light.high_thresh, "light ended at step %d, not high" % light.x
@@ -0,0 +1,78 @@
+'''
+Filename: sim/scenarios/regulate.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Constant power scenario, the lowbatt voltage curve with the PI power loop switched on
+Version: 1.0
+
+Usage:
+- python -m sim --scenario sim/scenarios/regulate.py
+    runs for lowbatt's SECONDS (150) unless --seconds is given,
+    power should hold at the step's target while the voltage sags (duty climbing), until the governor's
+    caps take over, log lines show the loop's error, anti-windup holds and tick cost,
+    check() asserts the held power and lowbatt's cap sequence/cutoff, the run exits 1 if either fails
+
+Notes:
+- regulation is enabled at ENABLE_S the same way main does it (regulator.enable(ina, full_mw)),
+    so the switch from fixed duty is exercised too
+- power is sampled every SAMPLE_MS, samples within SETTLE_S of enabling or of a cap/target change are
+    skipped (derate fade plus the loop settling), the rest must be within TOL_PERCENT (or TOL_MW) of target
+'''
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import lowbatt
+
+from sim.clock import clock
+
+SECONDS = lowbatt.SECONDS
+ENABLE_S = 5
+FULL_MW = 36000  #power at full step, close to what the sim light draws at 12.4V
+SAMPLE_MS = 250
+SETTLE_S = 4
+TOL_PERCENT = 2
+TOL_MW = 100  #floor for the low steps, a few mA of INA260 resolution
+
+samples = []  #(seconds, target mW, measured mW) while regulating
+
+def enable():
+    main = sys.modules['main']
+    if main.ina is not None:
+        main.pwm_light.regulator.enable(main.ina, FULL_MW)
+
+def sample():
+    main = sys.modules['main']
+    reg = main.pwm_light.regulator
+    if reg.on:
+        samples.append((clock.now_us / 1000000, reg.target_mw, main.ina.power_mw))
+    clock.after(SAMPLE_MS * 1000, sample)
+
+def scenario(sim):
+    lowbatt.scenario(sim)
+    del samples[:]
+    clock.at(ENABLE_S * 1000000, enable)
+    clock.at(ENABLE_S * 1000000, sample)
+
+def check(sim):
+    lowbatt.check(sim)
+    assert samples, "regulator never turned on"
+    last_change = ENABLE_S
+    target = None
+    held = 0
+    worst = (0, 0, 0, 0)
+    for t, target_mw, mw in samples:
+        if target_mw != target:
+            target = target_mw
+            last_change = t
+        if t - last_change < SETTLE_S or target_mw == 0:
+            continue
+        held += 1
+        err = abs(mw - target_mw)
+        if err > worst[0]:
+            worst = (err, t, target_mw, mw)
+        assert err <= max(TOL_MW, target_mw * TOL_PERCENT // 100), \
+            "at %.2fs power %dmW, target %dmW" % (t, mw, target_mw)
+    assert held > 100, "only %d settled samples" % held
+    print('regulate      %d settled samples, worst %dmW off at %.2fs (target %dmW)' % (held, worst[0], worst[1], worst[2]))
@@ -0,0 +1,167 @@
+'''
+Filename: sim/sdcard.py
+Author: Brad Farris
+Date: 10/18/26
+Description: SD card block device and FAT file stand-ins with a timing model on the virtual clock
+Version: 1.0
+
+Usage:
+- dev = SDCard(blocks=8192, baudrate=10000000)
+    MicroPython block device protocol (readblocks, writeblocks, ioctl) like micropython-lib's
+    sdcard.SDCard, every transfer takes virtual time (clock.sleep_us) and is counted
+- f = BlockFile(dev, start=64) -> file object (seek/tell/read/readinto/write/flush/close) laid out
+    contiguously from block start, behaves like a FatFs file: one sector buffer, partial sector
+    writes read the sector first, flush() writes the buffered sector and the directory entry
+- dev.reads, dev.writes, dev.busy_us, dev.write_us -> counters
+
+Notes:
+- timing: command overhead + 512 bytes at baudrate per block, plus program busy time after each write,
+    every gc_every writes the card stalls for gc_us (flash erase/garbage collection) like real cards do
+- host only, the board uses the sdcard driver from micropython-lib and os.VfsFat
+'''
+
+from sim.clock import clock
+
+BLOCK = 512
+IOCTL_BLOCK_COUNT = 4
+IOCTL_BLOCK_SIZE = 5
+
+'''------------------------------Block Device---------------------------------'''
+class SDCard:
+    def __init__(self, spi=None, cs=None, blocks=8192, baudrate=10000000, cmd_us=60,
+                 program_us=700, gc_every=256, gc_us=40000):
+        self.data = bytearray(blocks * BLOCK)
+        self.blocks = blocks
+        self.xfer_us = BLOCK * 8 * 1000000 // baudrate
+        self.cmd_us = cmd_us
+        self.program_us = program_us
+        self.gc_every = gc_every
+        self.gc_us = gc_us
+        self.reads = 0
+        self.writes = 0
+        self.busy_us = 0
+        self.write_us = 0
+
+    def _take(self, us):
+        self.busy_us += us
+        clock.sleep_us(us)
+
+    def readblocks(self, n, buf, offset=0):
+        count = (len(buf) + BLOCK - 1) // BLOCK
+        start = n * BLOCK + offset
+        buf[:] = self.data[start:start + len(buf)]
+        self.reads += count
+        self._take(self.cmd_us + count * (self.cmd_us + self.xfer_us))
+
+    def writeblocks(self, n, buf, offset=0):
+        count = (len(buf) + BLOCK - 1) // BLOCK
+        start = n * BLOCK + offset
+        self.data[start:start + len(buf)] = buf
+        us = self.cmd_us
+        for _ in range(count):  #multi block write, each block still programs
+            self.writes += 1
+            us += self.cmd_us + self.xfer_us + self.program_us
+            if self.gc_every and self.writes % self.gc_every == 0:
+                us += self.gc_us
+        self.write_us += us
+        self._take(us)
+
+    def ioctl(self, op, arg):
+        if op == IOCTL_BLOCK_COUNT:
+            return self.blocks
+        if op == IOCTL_BLOCK_SIZE:
+            return BLOCK
+        return 0
+
+'''---------------------------------File--------------------------------------'''
+class BlockFile:
+    def __init__(self, dev, start=64, dir_block=1):
+        self.dev = dev
+        self.start = start
+        self.dir_block = dir_block
+        self.pos = 0
+        self.size = 0
+        self.sector = bytearray(BLOCK)
+        self.cached = -1  #file block held in sector
+        self.dirty = False
+        self.modified = False
+
+    def _load(self, b):
+        if self.cached == b:
+            return
+        self._write_back()
+        self.dev.readblocks(self.start + b, self.sector)
+        self.cached = b
+
+    def _write_back(self):
+        if self.dirty:
+            self.dev.writeblocks(self.start + self.cached, self.sector)
+            self.dirty = False
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += self.size
+        self.pos = offset
+        return offset
+
+    def tell(self):
+        return self.pos
+
+    def write(self, buf):
+        buf = memoryview(buf)
+        n = len(buf)
+        done = 0
+        while done < n:
+            b, off = divmod(self.pos, BLOCK)
+            chunk = min(BLOCK - off, n - done)
+            if off == 0 and chunk == BLOCK:  #whole sectors go straight to the card
+                whole = (n - done) // BLOCK
+                if self.cached >= b and self.cached < b + whole:
+                    self.cached = -1
+                    self.dirty = False
+                self.dev.writeblocks(self.start + b, buf[done:done + whole * BLOCK])
+                chunk = whole * BLOCK
+            else:  #partial sector, read it into the buffer first (FatFs does the same)
+                self._load(b)
+                self.sector[off:off + chunk] = buf[done:done + chunk]
+                self.dirty = True
+            done += chunk
+            self.pos += chunk
+        self.size = max(self.size, self.pos)
+        self.modified = True
+        return n
+
+    def readinto(self, buf):
+        n = min(len(buf), max(0, self.size - self.pos))
+        done = 0
+        while done < n:
+            b, off = divmod(self.pos, BLOCK)
+            chunk = min(BLOCK - off, n - done)
+            self._load(b)
+            buf[done:done + chunk] = self.sector[off:off + chunk]
+            done += chunk
+            self.pos += chunk
+        return n
+
+    def read(self, n=-1):
+        if n < 0:
+            n = self.size - self.pos
+        buf = bytearray(n)
+        return bytes(buf[:self.readinto(buf)])
+
+    def flush(self):
+        self._write_back()
+        if self.modified:  #f_sync updates the directory entry (size, time)
+            self.dev.writeblocks(self.dir_block, bytes(BLOCK))
+            self.modified = False
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,125 @@
+'''
+Filename: sim/tm1637bus.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Decodes the bit banged TM1637 clk/dio lines back into commands and frames
+Version: 1.0
+
+Usage:
+- bus = TM1637Bus(clk=7, dio=8)
+    attach before the firmware creates its display, watches the two output pins
+- bus.digits / bus.brightness / bus.on
+    current state of the display as the chip would see it
+- bus.frames -> [(t_us, bytes(4)), ...] every change of the 4 visible digits
+- bus.text() -> what the display currently reads, '?' for unknown segments
+- bus.transactions / bus.bytes / bus.bus_us
+    start..stop count, bytes clocked and virtual time spent between start and stop
+
+Notes:
+- bits are sampled on clk rising edges, 9 clocks per byte (8 data lsb first + ack)
+- start = dio falls while clk high, stop = dio rises while clk high, any stray clocks
+    before a stop (the driver clocks once inside _stop) are dropped
+'''
+
+from sim.clock import clock
+from sim.machine import Pin
+
+'''------------------------------Setup----------------------------------------'''
+CMD_DATA = 0x40
+CMD_ADDR = 0xC0
+CMD_CTRL = 0x80
+DATA_FIXED = 0x04
+
+'''------------------------------Decoder--------------------------------------'''
+class TM1637Bus:
+    def __init__(self, clk=7, dio=8):
+        self.clk_id = clk
+        self.dio_id = dio
+        self._clk = 0
+        self._dio = 0
+        self._bits = []
+        self._t_start = None
+        self.fixed = False
+        self.digits = bytearray(6)
+        self.brightness = 0
+        self.on = False
+        self.frames = []
+        self.transactions = 0
+        self.bytes = 0
+        self.bus_us = 0
+        self.log = []  #raw transactions, [(t_us, bytes), ...]
+        Pin.watch(clk, self._on_clk)
+        Pin.watch(dio, self._on_dio)
+
+    def _on_clk(self, pin, level):
+        self._clk = level
+        if level:
+            self._bits.append(self._dio)
+
+    def _on_dio(self, pin, level):
+        self._dio = level
+        if not self._clk:
+            return
+        if level:  #stop
+            self._finish()
+        else:  #start
+            self._bits = []
+            self._t_start = clock.now_us
+
+    def _finish(self):
+        bits = self._bits
+        self._bits = []
+        data = bytearray()
+        for i in range(len(bits) // 9):
+            b = 0
+            for j in range(8):
+                b |= bits[i * 9 + j] << j
+            data.append(b)
+        t0 = self._t_start if self._t_start is not None else clock.now_us
+        self._t_start = None
+        if not data:
+            return
+        self.transactions += 1
+        self.bytes += len(data)
+        self.bus_us += clock.now_us - t0
+        self.log.append((clock.now_us, bytes(data)))
+        self._apply(data)
+
+    def _apply(self, data):
+        cmd = data[0]
+        kind = cmd & 0xC0
+        if kind == CMD_DATA:
+            self.fixed = bool(cmd & DATA_FIXED)
+        elif kind == CMD_CTRL:
+            self.on = bool(cmd & 0x08)
+            self.brightness = cmd & 0x07
+        elif kind == CMD_ADDR:
+            before = bytes(self.digits[:4])
+            addr = cmd & 0x07
+            for b in data[1:]:
+                if addr < 6:
+                    self.digits[addr] = b
+                if not self.fixed:
+                    addr += 1
+            after = bytes(self.digits[:4])
+            if after != before:
+                self.frames.append((clock.now_us, after))
+
+    '''-------------------------------Text------------------------------------'''
+    def text(self, segments=None):
+        lookup = _reverse()
+        segs = self.digits[:4] if segments is None else segments
+        return ''.join(lookup.get(s & 0x7F, '?') for s in segs)
+
+_lookup = None
+
+def _reverse():
+    global _lookup
+    if _lookup is None:
+        import tm1637  #firmware driver, for its segment table
+        chars = '0123456789abcdefghijklmnopqrstuvwxyz -*'
+        _lookup = {}
+        for i, c in enumerate(chars):
+            _lookup.setdefault(tm1637._SEGMENTS[i], c)
+        _lookup[0] = ' '
+    return _lookup
@@ -0,0 +1,126 @@
+'''
+Filename: sim/uasyncio.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Minimal uasyncio stand-in that runs tasks on the virtual clock
+Version: 1.0
+
+Usage:
+- same names the firmware uses: run, create_task, sleep, sleep_ms, get_event_loop, Task.cancel
+
+Notes:
+- single threaded round robin like the board: the earliest due task runs until its next await,
+    waiting between tasks is a clock.sleep_us so timers, pin irqs and schedule() run in the gaps
+- only sleeps are awaitable (plus awaiting another task), enough for the firmware's periodic tasks
+'''
+
+import heapq
+from sim.clock import clock
+
+'''-------------------------------Awaitables----------------------------------'''
+class _Sleep:
+    __slots__ = ('us',)
+
+    def __init__(self, us):
+        self.us = us
+
+    def __await__(self):
+        yield self
+
+def sleep_ms(ms):
+    return _Sleep(int(ms) * 1000)
+
+def sleep(s):
+    return _Sleep(int(s * 1000000))
+
+'''---------------------------------Tasks-------------------------------------'''
+class CancelledError(BaseException):
+    pass
+
+class Task:
+    def __init__(self, coro):
+        self.coro = coro
+        self.done = False
+        self.cancelled = False
+        self.result = None
+        self.waiters = []
+
+    def cancel(self):
+        if not self.done:
+            self.cancelled = True
+            _loop.push(clock.now_us, self)
+        return True
+
+    def __await__(self):
+        if not self.done:
+            yield self
+        return self.result
+
+class Loop:
+    def __init__(self):
+        self.queue = []
+        self.seq = 0
+
+    def push(self, t_us, task):
+        self.seq += 1
+        heapq.heappush(self.queue, (t_us, self.seq, task))
+
+    def create_task(self, coro):
+        task = Task(coro)
+        self.push(clock.now_us, task)
+        return task
+
+    def step(self, task):
+        if task.done:
+            return
+        try:
+            if task.cancelled:
+                task.cancelled = False
+                req = task.coro.throw(CancelledError())
+            else:
+                req = task.coro.send(None)
+        except (StopIteration, CancelledError) as e:
+            task.done = True
+            task.result = getattr(e, 'value', None)
+            for waiter in task.waiters:
+                self.push(clock.now_us, waiter)
+            return
+        if isinstance(req, _Sleep):
+            self.push(clock.now_us + req.us, task)
+        elif isinstance(req, Task):
+            req.waiters.append(task)
+        else:
+            self.push(clock.now_us, task)
+
+    def run_until_complete(self, main):
+        while not main.done:
+            if not self.queue:
+                raise RuntimeError('deadlock: no runnable tasks')
+            t, _, task = heapq.heappop(self.queue)
+            if t > clock.now_us:
+                clock.sleep_us(t - clock.now_us)
+            self.step(task)
+        return main.result
+
+    def run_forever(self):
+        while self.queue:
+            t, _, task = heapq.heappop(self.queue)
+            if t > clock.now_us:
+                clock.sleep_us(t - clock.now_us)
+            self.step(task)
+
+_loop = Loop()
+
+def get_event_loop():
+    return _loop
+
+def new_event_loop():
+    global _loop
+    _loop = Loop()
+    return _loop
+
+def create_task(coro):
+    return _loop.create_task(coro)
+
+def run(coro):
+    return _loop.run_until_complete(_loop.create_task(coro))
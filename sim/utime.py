@@ -0,0 +1,62 @@
+'''
+Filename: sim/utime.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Stand-in for MicroPython utime/time backed by the virtual clock
+Version: 1.0
+
+Notes:
+- installed as both utime and time, anything MicroPython doesn't have (monotonic, perf_counter, ...)
+    falls through to the real CPython time module so the stdlib keeps working
+- ticks wrap at 2**30 like the rp2 port so ticks_diff/ticks_add wrap handling gets exercised
+'''
+
+import calendar as _calendar
+import time as _host_time
+from sim.clock import clock
+
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALF = TICKS_PERIOD // 2
+EPOCH_OFFSET = 0  #seconds added to time() so logs get a sensible start time
+
+def ticks_us():
+    return clock.now_us & TICKS_MAX
+
+def ticks_ms():
+    return (clock.now_us // 1000) & TICKS_MAX
+
+def ticks_cpu():
+    return clock.now_us & TICKS_MAX
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+def ticks_diff(ticks1, ticks2):
+    return ((ticks1 - ticks2 + TICKS_HALF) & TICKS_MAX) - TICKS_HALF
+
+def sleep(seconds):
+    clock.sleep_us(seconds * 1000000)
+
+def sleep_ms(ms):
+    clock.sleep_us(ms * 1000)
+
+def sleep_us(us):
+    clock.sleep_us(us)
+
+def time():
+    return EPOCH_OFFSET + clock.now_us // 1000000
+
+def time_ns():
+    return (EPOCH_OFFSET * 1000000 + clock.now_us) * 1000
+
+def localtime(secs=None):
+    return _host_time.gmtime(time() if secs is None else secs)[:8]
+
+gmtime = localtime
+
+def mktime(t):
+    return _calendar.timegm(tuple(t[:6]))
+
+def __getattr__(name):
+    return getattr(_host_time, name)
@@ -0,0 +1,109 @@
+'''
+Filename: soc.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Battery state of charge estimator, fitted polynomial model run in Q12 fixed point
+Version: 1.0
+
+Default Pinout:
+- none, uses readings from ina260 and dht22
+
+Dependencies:
+- soc_model (coefficients exported by tools/soc_fit.py)
+
+Usage:
+- estimate(v_mv, i_ma, t_c10) -> soc percent 0-100
+    v_mv = terminal voltage under load, i_ma = load current, t_c10 = temperature in tenths C
+- rest_mv(v_mv, i_ma, t_c10) -> estimated resting voltage, soc_percent(rest) -> soc from it
+- est = Estimator(ina, temp_fn, callback=None)
+    ina = ina260.INA260, temp_fn() -> tenths C or None (dht22 cached reading),
+    callback(est) after every new estimate (display, governor)
+- est.update() run it from a scheduler task, the task period is the publish rate
+- est.percent, est.rest_mv -> latest estimate (-1 until the first one)
+- est.stats() -> (estimates, last us, max us) cost per estimate
+
+Notes:
+- model: resting voltage = v + i * R(T), soc = P(resting voltage), R and P are polynomials
+    fitted offline from logged data (tools/soc_fit.py), evaluated here with Horner's method
+- inputs are normalised to Q12 (-4096..4096 over the fitted range, clamped) and coefficients are
+    Q12 ints, so every intermediate stays a small int (< 2^30): no floats and no allocation
+- soc_fit.py checks coefficient size when it exports and reports held out error using this exact
+    fixed point code, so the error it prints is what the board will see
+'''
+
+'''----------------------------imports----------------------------------------'''
+from time import ticks_us, ticks_diff
+from micropython import const
+import soc_model
+
+'''------------------------------Setup----------------------------------------'''
+Q = const(12)
+ONE = const(4096) #1.0 in Q12
+T_DEFAULT = const(250) #25.0C when there's no temperature reading
+
+'''------------------------------Fixed Point----------------------------------'''
+def horner(coeffs, x):
+    # coeffs highest power first, Q12 in and out
+    acc = 0
+    for c in coeffs:
+        acc = ((acc * x) >> Q) + c
+    return acc
+
+def norm(value, center, scale):
+    x = (value - center) * ONE // scale
+    if x > ONE:
+        return ONE
+    if x < -ONE:
+        return -ONE
+    return x
+
+def rest_mv(v_mv, i_ma, t_c10):
+    m = soc_model
+    r = (horner(m.R_COEFFS, norm(t_c10, m.T_CENTER, m.T_SCALE)) * m.R_SCALE) >> Q #mOhm
+    return v_mv + i_ma * r // 1000
+
+def soc_percent(rest):
+    m = soc_model
+    s = (horner(m.SOC_COEFFS, norm(rest, m.V_CENTER, m.V_SCALE)) * 100 + (ONE >> 1)) >> Q
+    if s > 100:
+        return 100
+    if s < 0:
+        return 0
+    return s
+
+def estimate(v_mv, i_ma, t_c10):
+    return soc_percent(rest_mv(v_mv, i_ma, t_c10))
+
+'''------------------------------Estimator------------------------------------'''
+class Estimator:
+    __slots__ = ('ina', 'temp_fn', 'callback', 'percent', 'rest_mv', 'count', 'last_us', 'max_us')
+
+    def __init__(self, ina, temp_fn, callback=None):
+        self.ina = ina
+        self.temp_fn = temp_fn
+        self.callback = callback
+        self.percent = -1
+        self.rest_mv = -1
+        self.count = 0
+        self.last_us = 0
+        self.max_us = 0
+
+    def update(self):
+        t = self.temp_fn()
+        if t is None:
+            t = T_DEFAULT
+        ina = self.ina
+        start = ticks_us()
+        rest = rest_mv(ina.voltage_uv // 1000, ina.current_ua // 1000, t)
+        self.rest_mv = rest
+        self.percent = soc_percent(rest)
+        cost = ticks_diff(ticks_us(), start)
+        self.last_us = cost
+        if cost > self.max_us:
+            self.max_us = cost
+        self.count += 1
+        if self.callback:
+            self.callback(self)
+
+    def stats(self):
+        return self.count, self.last_us, self.max_us
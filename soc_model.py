@@ -0,0 +1,20 @@
+'''
+Filename: soc_model.py
+Description: Battery model coefficients for soc.py, generated by tools/soc_fit.py
+Source: placeholder, generic 12V AGM resting voltage chart (10.5V = 0%, 12.7V = 100%) and a flat 30 mOhm
+
+Notes:
+- Q12 ints, highest power first, inputs normalised as (value - CENTER) / SCALE
+- regenerate with tools/soc_fit.py, don't edit by hand
+'''
+
+# internal resistance vs temperature (tenths C), output * R_SCALE mOhm
+T_CENTER = 250
+T_SCALE = 250
+R_SCALE = 60
+R_COEFFS = (0, 0, 2048)
+
+# state of charge (0-1) vs resting voltage (mV)
+V_CENTER = 11600
+V_SCALE = 1100
+SOC_COEFFS = (-1772, 468, 1749, 671, 2082, 919)
@@ -36,10 +36,32 @@ TM1637_CMD3 = const(128) # 0x80 display control command
 TM1637_DSP_ON = const(8) # 0x08 display on
 TM1637_DELAY = const(10) # 10us delay between clk/dio pulses
 TM1637_MSB = const(128)  # msb is the decimal point or the colon depending on your display
+TM1637_CACHE = const(16)  # max strings kept by frame()
 
 # 0-9, a-z, blank, dash, star
 _SEGMENTS = bytearray(b'\x3F\x06\x5B\x4F\x66\x6D\x7D\x07\x7F\x6F\x77\x7C\x39\x5E\x79\x71\x3D\x76\x06\x1E\x76\x38\x55\x54\x3F\x73\x67\x50\x6D\x78\x3E\x1C\x2A\x76\x6E\x5B\x00\x40\x63')
 
+# ASCII 0-127 -> segments, built once so encoding is one index per character,
+# TM1637_MSB alone marks a character with no glyph (no real glyph is just the dot/colon)
+def _build_ascii():
+    table = bytearray(b'\x80' * 128)
+    for i in range(10):
+        table[48 + i] = _SEGMENTS[i] # 0-9
+    for i in range(26):
+        table[65 + i] = _SEGMENTS[10 + i] # uppercase A-Z
+        table[97 + i] = _SEGMENTS[10 + i] # lowercase a-z
+    table[32] = _SEGMENTS[36] # space
+    table[45] = _SEGMENTS[37] # dash
+    table[42] = _SEGMENTS[38] # star/degrees
+    table[94] = _SEGMENTS[38] # ^ degrees
+    table[37] = _SEGMENTS[38] # % is only the upper box (same as the degree sign), a percent sign takes
+                              # two digits so the next one must be PERCENT_LOW, show("50%") alone shows 50 degrees
+    table[95] = 0x08 # underscore
+    return table
+
+_ASCII = _build_ascii()
+PERCENT_LOW = const(0x5C) # lower box of the percent sign, the 4th digit after '%'
+
 class TM1637(object):
     """Library for quad 7-segment LED modules based on the TM1637 LED driver."""
     def __init__(self, clk, dio, brightness=7):
@@ -49,6 +71,7 @@ class TM1637(object):
         if not 0 <= brightness <= 7:
             raise ValueError("Brightness out of range")
         self._brightness = brightness
+        self._cache = {} # string -> frame() bytes
 
         self.clk.init(Pin.OUT, value=0)
         self.dio.init(Pin.OUT, value=0)
@@ -139,21 +162,24 @@ class TM1637(object):
         return segments
 
     def encode_char(self, char):
-        """Convert a character 0-9, a-z, space, dash or star to a segment."""
+        """Convert a character 0-9, a-z, space, dash, star, %, ^ or _ to a segment.
+        '%' is the upper half of a percent sign, set the next digit to PERCENT_LOW."""
         o = ord(char)
-        if o == 32:
-            return _SEGMENTS[36] # space
-        if o == 42:
-            return _SEGMENTS[38] # star/degrees
-        if o == 45:
-            return _SEGMENTS[37] # dash
-        if o >= 65 and o <= 90:
-            return _SEGMENTS[o-55] # uppercase A-Z
-        if o >= 97 and o <= 122:
-            return _SEGMENTS[o-87] # lowercase a-z
-        if o >= 48 and o <= 57:
-            return _SEGMENTS[o-48] # 0-9
-        raise ValueError("Character out of range: {:d} '{:s}'".format(o, chr(o)))
+        seg = _ASCII[o] if o < 128 else TM1637_MSB
+        if seg == TM1637_MSB:
+            raise ValueError("Character out of range: {:d} '{:s}'".format(o, chr(o)))
+        return seg
+
+    def frame(self, string):
+        """Segments for the first 4 characters of string as immutable bytes,
+        cached so showing the same text again encodes and allocates nothing."""
+        segments = self._cache.get(string)
+        if segments is None:
+            if len(self._cache) >= TM1637_CACHE:
+                self._cache.clear() # bounded, rebuilt from whatever is shown next
+            segments = bytes(self.encode_string(string)[:4])
+            self._cache[string] = segments
+        return segments
 
     def hex(self, val):
         """Display a hex value 0x0000 through 0xffff, right aligned."""
@@ -188,8 +214,11 @@ class TM1637(object):
         self.write([_SEGMENTS[38], _SEGMENTS[12]], 2) # degrees C
 
     def show(self, string, colon=False):
+        if not colon:
+            self.write(self.frame(string))
+            return
         segments = self.encode_string(string)
-        if len(segments) > 1 and colon:
+        if len(segments) > 1:
             segments[1] |= 128
         self.write(segments[:4])
 
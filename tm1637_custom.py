@@ -13,68 +13,124 @@ Default Pinout:
 
 Dependencies:
 - tm1637
+- tm1637_fb
+- animator
+- compositor
+- ringbuf (Deferred)
 
 Usage:
 - load(state)
-    state=1 -> start loading graphic
-    state=0 -> stop loading graphic
+    state=1 -> start loading graphic (after a scroll in progress)
+    state=0 -> stop loading graphic and any scroll
 - show_brightness_percentage(is_num, value, duration)
-    is_num=1 -> expects numerical value, is_num!=1 -> expects str
+    is_num=1 -> expects integer percent 0-99, is_num!=1 -> expects str
     value = actual value passed (numerical value or str)
     duration = time in ms
 - custom_scroll(message, duration)
-    just calls tm.scroll() and passes same info
+    scrolls message in the background, duration = ms per frame, replaces any running animation
+- show_status(message, duration=0) / clear_status()
+    boot status text, duration=0 stays until cleared
+- load(), show_status() and clear_status() are for main code, they are applied through micropython.schedule,
+    kick() is the main loop's backstop if that schedule() failed or the apply was held off
+- hold_off = fn, fn() True makes the apply wait for the next kick(), main points it at ir_remote.receiving
+    so a status write never runs under an ir burst
+- show_warning(message, duration=0) / clear_warning()
+    battery warnings, shown over everything else, duration=0 stays until cleared
+- busy() -> True while the spinner/scroll runs or a message is waiting to time out
 
 Notes:
-- change custom_scroll in main to just call tm.scroll, must import from tm1637 there then get rid of custom_scroll
-- display sometimes doesn't show long enough, timing issues to sort out
+- custom_scroll and load share the animator, tm.scroll() itself still blocks and shouldn't be called from main
+- comp (compositor) owns the display: warnings > boot status/animations > brightness > info,
+    each message times out on its own and the next live one shows, write to tm only through comp
+- tm is a tm1637_fb framebuffer, tm.bus_stats() gives display bus cost (transactions, bytes, us, skipped)
 '''
 
 '''----------------------------imports----------------------------------------'''
-import time
-import machine
 import tm1637
+import tm1637_fb
+import animator
+import compositor
 from machine import Pin
-from machine import Timer
+from ringbuf import Deferred
 
 '''------------------------------Setup----------------------------------------'''
-tm = tm1637.TM1637(clk=Pin(7), dio=Pin(8))
-load_timer = machine.Timer()
+tm = tm1637_fb.TM1637FB(clk=Pin(7), dio=Pin(8))  #only changed digits go out on the bus
+comp = compositor.Compositor(tm.write)  #everything shown goes through here
+anim = animator.Animator(comp.writer(compositor.P_BOOT),  #one timer for the spinner and scrolling
+                         lambda: comp.clear(compositor.P_BOOT))
+bright_seg = bytearray(4)  #percentage frame, reused every call, only the digits change
+bright_seg[2] = tm.frame("%")[0]  #percent sign over the last two digits
+bright_seg[3] = tm1637.PERCENT_LOW
+load_next = -1  #load() state waiting for the scheduled apply, -1 = none
+status_next = None  #show_status() text waiting for the scheduled apply, "" = clear
+status_ms = 0
+hold_off = None  #callable, True while the apply should wait (ir burst coming in)
 
 '''------------------------------Load-----------------------------------------'''
 def load(state):
-    global load_timer  #refer to global timer
-    if state == 1:
-        pattern = [0b00000001, 0b00000010, 0b00000100, 0b00001000,  
-                   0b00010000, 0b00100000, 0b01000000, 0b10000000]
-        tm.write([0, 0, 0, 0])  # Clear the display first
-        index = 0  # Tracks current pattern position
-        def update_display(timer):
-            nonlocal index  # Allow modification of the index variable
-            data = [pattern[index], pattern[index] & 0b01111111, pattern[index], pattern[index]]  # Ensure colon is off
-            tm.write(data)  
-            index = (index + 1) % len(pattern)  #loop through the pattern
-        load_timer.init(period=100, mode=machine.Timer.PERIODIC, callback=update_display)
-    else:
-        load_timer.deinit()  #stop the timer if load(0) is called
+    global load_next
+    load_next = state
+    kick()
 
 '''--------------------------Show Brightness %--------------------------------'''
 def show_bright_percentage(is_num, value, duration=2000):  # duration in milliseconds
-    tm.show("")
     if is_num == 0: #display high/off/low if at those values
-        tm.show(value)
-    else: #display percentage based on inverted pwming from 0-65535
-        value = int((value/65535)*100) #get value percent in int 1-99, 0 and 100 reserved
-        percent_1 = 0b01100011  # Third digit |-- %   |
-        percent_2 = 0b01011100  # Fourth digit|     --|
-        tens = value // 10  #extract tens place
-        ones = value % 10   #extract ones place
-        tm.write([tm.encode_digit(tens), tm.encode_digit(ones), percent_1, percent_2])
-    #create timer
-    clear_timer = Timer(-1)  #local timer instance
-    #start a one-time timer to clear display after `duration` ms
-    clear_timer.init(mode=Timer.ONE_SHOT, period=duration, callback=lambda t: tm.show("    "))
+        comp.post(compositor.P_BRIGHT, tm.frame(value), duration)
+    else: #display percentage, caller passes int 1-99 (brightness.percent), 0 and 100 reserved
+        bright_seg[0] = tm.encode_digit(value // 10)  #tens place
+        bright_seg[1] = tm.encode_digit(value % 10)   #ones place
+        comp.post(compositor.P_BRIGHT, bright_seg, duration)  #compositor blanks it after duration
+
+'''------------------------------Status---------------------------------------'''
+def show_status(message, duration=0):
+    global status_next, status_ms
+    status_next = message
+    status_ms = duration
+    kick()
+
+def clear_status():
+    global status_next
+    status_next = ""
+    kick()
+
+# load()/show_status() are called from main code, they only leave the request here and the display
+# is written in scheduled context like every other writer, so a callback can't land mid frame
+def kick():
+    if load_next >= 0 or status_next is not None:
+        applier.schedule()
+
+def apply():
+    global load_next, status_next
+    if hold_off is not None and hold_off():
+        return  #requests stay put, the input backstop's kick() retries
+    if load_next == 1:
+        anim.then(animator.SPINNER, 100, loop=True)  #starts once a running scroll finishes
+    elif load_next == 0:
+        anim.cancel()  #stop the spinner (and anything queued) if load(0) is called
+    load_next = -1
+    message = status_next
+    status_next = None
+    if message == "":
+        anim.cancel()
+        comp.clear(compositor.P_BOOT)
+    elif message is not None:
+        anim.cancel(False)  #status text replaces the spinner/scroll in the boot slot, no blank in between
+        comp.post(compositor.P_BOOT, tm.frame(message), status_ms)
+
+applier = Deferred(apply)
+
+'''------------------------------Warning--------------------------------------'''
+def show_warning(message, duration=0):
+    comp.post(compositor.P_WARN, tm.frame(message), duration)
+
+def clear_warning():
+    comp.clear(compositor.P_WARN)
+
+'''-------------------------------Busy----------------------------------------'''
+# True while an animation runs or a message is timing out (idle manager check)
+def busy():
+    return applier.pending or anim.busy() or comp.timed()
 
 '''------------------------------Scroll---------------------------------------'''
 def custom_scroll(message,duration):
-    tm.scroll(message,duration)
\ No newline at end of file
+    anim.play(animator.scroll_frames(tm, message), duration)  #returns right away, runs on anim's timer
\ No newline at end of file
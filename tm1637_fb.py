@@ -0,0 +1,110 @@
+'''
+Filename: tm1637_fb.py
+Author: Brad Farris
+Date: 10/18/26
+Description: 4 digit framebuffer layer for the tm1637 driver, only sends digits that changed
+Version: 1.0
+
+Default Pinout:
+- same as tm1637, pins passed in
+
+Dependencies:
+- tm1637
+
+Usage:
+- tm = TM1637FB(clk=Pin(7), dio=Pin(8))
+    drop in replacement for tm1637.TM1637, show/write/scroll/number all go through write()
+- tm.refresh()
+    resend the whole frame and display control, e.g. after the display lost power
+- tm.bus_stats() -> (transactions, bytes, us on the bus, writes skipped as unchanged)
+
+Notes:
+- chip is left in fixed address mode, each changed digit is one start/addr/data/stop transaction,
+    an unchanged frame costs nothing on the bus
+- display control (on + brightness) is only sent at init, refresh() and when brightness changes
+- positions 4 and 5 (6 digit modules) are not part of the frame and are ignored
+'''
+
+'''----------------------------imports----------------------------------------'''
+from time import ticks_us, ticks_diff
+from micropython import const
+import tm1637
+
+'''------------------------------Setup----------------------------------------'''
+DIGITS = const(4)
+CMD_FIXED = const(68)  # 0x44 data command, fixed address, normal mode
+
+'''----------------------------Framebuffer------------------------------------'''
+class TM1637FB(tm1637.TM1637):
+    def __init__(self, clk, dio, brightness=7):
+        self._sent = bytearray(DIGITS)  #what the chip is showing
+        self.transactions = 0
+        self.bytes = 0
+        self.bus_us = 0
+        self.skipped = 0
+        super().__init__(clk, dio, brightness)  #sends fixed address data cmd + display control once
+        for pos in range(DIGITS):  #display ram is random at power up, start from a known blank frame
+            self._write_digit(pos, 0)
+
+    def _write_data_cmd(self):
+        # fixed address, normal mode, each digit write carries its own address
+        self._start()
+        self._write_byte(CMD_FIXED)
+        self._stop()
+
+    def _write_byte(self, b):
+        self.bytes += 1
+        super()._write_byte(b)
+
+    def _stop(self):
+        self.transactions += 1
+        super()._stop()
+
+    def _write_digit(self, pos, seg):
+        self._start()
+        self._write_byte(tm1637.TM1637_CMD2 | pos)
+        self._write_byte(seg)
+        self._stop()
+        self._sent[pos] = seg
+
+    def brightness(self, val=None):
+        """Set the display brightness 0-7, only touches the bus on a change."""
+        if val is None:
+            return self._brightness
+        if not 0 <= val <= 7:
+            raise ValueError("Brightness out of range")
+        if val != self._brightness:
+            self._brightness = val
+            self._write_dsp_ctrl()
+
+    def write(self, segments, pos=0):
+        """Update up to 4 digits from a given position, only changed digits
+        are sent. The MSB in the 2nd segment controls the colon."""
+        if not 0 <= pos <= 5:
+            raise ValueError("Position out of range")
+        t = ticks_us()
+        sent = self._sent
+        changed = 0
+        for seg in segments:
+            if pos >= DIGITS:
+                break
+            if sent[pos] != seg:
+                self._write_digit(pos, seg)
+                changed = 1
+            pos += 1
+        if changed:
+            self.bus_us += ticks_diff(ticks_us(), t)
+        else:
+            self.skipped += 1
+
+    def refresh(self):
+        """Resend the data command, every digit and display control."""
+        t = ticks_us()
+        self._write_data_cmd()
+        for pos in range(DIGITS):
+            self._write_digit(pos, self._sent[pos])
+        self._write_dsp_ctrl()
+        self.bus_us += ticks_diff(ticks_us(), t)
+
+    def bus_stats(self):
+        return self.transactions, self.bytes, self.bus_us, self.skipped
@@ -0,0 +1,130 @@
+'''
+Filename: tools/bench_datalog.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Datalogger benchmark on the SD card stand-in, CSV line per sample v binary blocks
+Version: 1.0
+
+Usage:
+- python tools/bench_datalog.py [--records 3600] [--period-ms 1000] [--flush-ms 15000] [--blocks 2048] [--baud 10000000]
+    logs the same samples both ways through sim/sdcard.py and reports card time, block writes,
+    flush latency and host cpu per record, then reopens the binary log as after a power cut and
+    checks every flushed record is recovered (records must fit in --blocks, no wrap)
+
+Notes:
+- host tool, runs the unmodified datalog.py on the sim stand-ins with its open() pointed at a
+    BlockFile, card time is the stand-in's timing model (see sim/sdcard.py), not a measured card
+- the CSV baseline is what the README planned: format a line, write it, flush so it survives power loss
+'''
+
+import argparse
+import os
+import sys
+import time as host_time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sim
+sim.install()
+
+from sim.clock import clock
+from sim.sdcard import SDCard, BlockFile
+import datalog
+
+'''------------------------------Card-----------------------------------------'''
+class Card:
+    # one file at a fixed place on the card, enough of a filesystem for one log
+    def __init__(self, baud):
+        self.dev = SDCard(baudrate=baud)
+        self.files = {}
+
+    def open(self, path, mode='r'):
+        if 'w' in mode or ('a' in mode and path not in self.files):
+            self.files[path] = BlockFile(self.dev)
+        elif path not in self.files:
+            raise OSError(2, 'ENOENT')
+        f = self.files[path]
+        f.seek(f.size if 'a' in mode else 0)
+        return f
+
+def samples(n):
+    for i in range(n):
+        yield -1500 - i % 300, 12600 - i // 10, 18900 + i % 50, 30000, 215, 550
+
+'''------------------------------Runs-----------------------------------------'''
+def run_csv(args):
+    card = Card(args.baud)
+    f = card.open('log.csv', 'a')
+    f.write(b'ms,ma,mv,mw,duty,temp_c10,hum10\n')
+    lat = []
+    cpu = 0.0
+    for i, (ma, mv, mw, duty, t, h) in enumerate(samples(args.records)):
+        clock.run_until(i * args.period_ms * 1000)
+        start = clock.now_us
+        wall = host_time.perf_counter()
+        f.write(('%d,%d,%d,%d,%d,%d,%d\n' % (clock.now_us // 1000, ma, mv, mw, duty, t, h)).encode())
+        cpu += host_time.perf_counter() - wall
+        f.flush()
+        lat.append(clock.now_us - start)
+    return card, lat, cpu, f.size
+
+def run_binary(args):
+    card = Card(args.baud)
+    datalog.open = card.open  #module global shadows the builtin, datalog itself is unchanged
+    log = datalog.Logger('log.bin', blocks=args.blocks)
+    card.dev.writes = card.dev.busy_us = card.dev.write_us = 0  #creating the file is a one off
+    lat = []
+    cpu = 0.0
+    every = max(1, args.flush_ms // args.period_ms)
+    for i, s in enumerate(samples(args.records)):
+        clock.run_until(i * args.period_ms * 1000)
+        wall = host_time.perf_counter()
+        log.record(*s)
+        cpu += host_time.perf_counter() - wall
+        if (i + 1) % every == 0:
+            start = clock.now_us
+            log.flush()
+            lat.append(clock.now_us - start)
+    return card, log, lat, cpu
+
+'''-----------------------------Report----------------------------------------'''
+def summary(name, card, lat, cpu, records, size):
+    dev = card.dev
+    span_s = records * ARGS.period_ms / 1000
+    lat = sorted(lat) or [0]
+    print('%-7s %6d block writes (%.2f per record), card busy %.1f ms (%.3f%% of %.0f s), %d bytes' % (
+        name, dev.writes, dev.writes / records, dev.busy_us / 1000, dev.busy_us / 1e4 / span_s, span_s, size))
+    print('        flush latency mean %.2f ms, p99 %.2f ms, max %.2f ms over %d flushes, host cpu %.1f us/record' % (
+        sum(lat) / len(lat) / 1000, lat[int(len(lat) * 0.99)] / 1000, lat[-1] / 1000, len(lat),
+        cpu / records * 1e6))
+    print('        write throughput %.0f records/s of card time' % (records / (dev.busy_us / 1e6)))
+
+def main(argv=None):
+    global ARGS
+    parser = argparse.ArgumentParser(description='Datalogger benchmark on the SD card stand-in')
+    parser.add_argument('--records', type=int, default=3600)
+    parser.add_argument('--period-ms', type=int, default=1000, help='time between records')
+    parser.add_argument('--flush-ms', type=int, default=15000, help='binary logger flush period')
+    parser.add_argument('--blocks', type=int, default=2048, help='binary log file size in blocks')
+    parser.add_argument('--baud', type=int, default=10000000, help='SPI clock')
+    ARGS = args = parser.parse_args(argv)
+
+    sim.reset()
+    card, lat, cpu, size = run_csv(args)
+    summary('csv', card, lat, cpu, args.records, size)
+
+    sim.reset()
+    card, log, lat, cpu = run_binary(args)
+    summary('binary', card, lat, cpu, args.records, min(log.seq + 2, args.blocks) * datalog.BLOCK)
+    # power cut: no close(), reopen the way boot does and see where logging carries on
+    flushed = log.records - log.pending()
+    reads = card.dev.reads
+    start = clock.now_us
+    again = datalog.Logger('log.bin', blocks=args.blocks)
+    took = clock.now_us - start
+    found = again.seq * datalog.RECORDS + again.count  #every block before the tail is full
+    print('recover %d of %d flushed records (%s), %d block reads, %.2f ms, %d dropped' % (
+        found, flushed, 'ok' if found == flushed else 'LOST', card.dev.reads - reads, took / 1000,
+        log.dropped))
+
+if __name__ == '__main__':
+    main()
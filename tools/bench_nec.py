@@ -0,0 +1,194 @@
+'''
+Filename: tools/bench_nec.py
+Author: Brad Farris
+Date: 10/18/26
+Description: NEC decoder throughput benchmark, original exception based decode v current decode
+Version: 1.0
+
+Usage:
+- python tools/bench_nec.py [--frames 2000] [--jitter 120] [--rounds 21] [--seconds 0.2] [captures ...]
+    replays edge arrays straight into the decoders (no pin or timer involved) and
+    reports decodes per second and result agreement, recorded ir_rx.capture files
+    are added to the synthetic corpus
+
+Notes:
+- host tool, runs on the sim stand-ins so ir_rx imports unchanged
+- LegacyNEC is a verbatim copy of the upstream exception based decode kept as the baseline
+- the decoders take turns, --rounds rounds of --seconds each, first one then the other order
+    swapped every round, and each reports its best round, so a slow spell on the host hits both
+    and a one off stall doesn't decide the ratio (spread is the worst round over the best),
+    the median of the back to back round ratios is the steadier number on a busy host
+'''
+
+import argparse
+import os
+import random
+import sys
+import time as host_time
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sim
+sim.install()
+
+from sim.machine import Pin
+from sim.ir import nec_frame, nec_repeat
+from utime import ticks_diff
+from ir_rx.nec import NEC_ABC
+
+'''------------------------------Baseline-------------------------------------'''
+class LegacyNEC(NEC_ABC):
+    def decode(self, _):
+        try:
+            if self.edge > 68:
+                raise RuntimeError(self.OVERRUN)
+            width = ticks_diff(self._times[1], self._times[0])
+            if width < self._leader:  # 9ms leading mark for all valid data
+                raise RuntimeError(self.BADSTART)
+            width = ticks_diff(self._times[2], self._times[1])
+            if width > 3000:  # 4.5ms space for normal data
+                if self.edge < 68:  # Haven't received the correct number of edges
+                    raise RuntimeError(self.BADBLOCK)
+                val = 0
+                for edge in range(3, 68 - 2, 2):
+                    val >>= 1
+                    if ticks_diff(self._times[edge + 1], self._times[edge]) > 1120:
+                        val |= 0x80000000
+            elif width > 1700: # 2.5ms space for a repeat code. Should have exactly 4 edges.
+                raise RuntimeError(self.REPEAT if self.edge == 4 else self.BADREP)  # Treat REPEAT as error.
+            else:
+                raise RuntimeError(self.BADSTART)
+            addr = val & 0xff  # 8 bit addr
+            cmd = (val >> 16) & 0xff
+            if cmd != (val >> 24) ^ 0xff:
+                raise RuntimeError(self.BADDATA)
+            if addr != ((val >> 8) ^ 0xff) & 0xff:  # 8 bit addr doesn't match check
+                if not self._extended:
+                    raise RuntimeError(self.BADADDR)
+                addr |= val & 0xff00  # pass assumed 16 bit address to callback
+            self._addr = addr
+        except RuntimeError as e:
+            cmd = e.args[0]
+            addr = self._addr if cmd == self.REPEAT else 0  # REPEAT uses last address
+        # Set up for new data burst and run user callback
+        self.do_callback(cmd, addr, 0, self.REPEAT)
+
+class CurrentNEC(NEC_ABC):
+    pass
+
+'''-------------------------------Corpus--------------------------------------'''
+# Edge time arrays as ir_rx records them: absolute ticks_us of every edge
+def edges_from(durations, t0):
+    times = [t0]
+    for d in durations:
+        times.append(times[-1] + max(1, d))
+    return times
+
+def jittered(durations, jitter):
+    return [d + random.randint(-jitter, jitter) for d in durations]
+
+def build_corpus(n, jitter):
+    corpus = []
+    t0 = random.randint(0, (1 << 30) - 1)  # anywhere in the ticks_us range, so some frames wrap
+    for i in range(n):
+        kind = i % 10
+        if kind < 6:  # clean or noisy data frame
+            d = nec_frame(random.randint(0, 255), random.randint(0, 255))
+        elif kind < 9:  # repeat codes, most common while a button is held
+            d = nec_repeat()
+        else:  # truncated frame
+            d = nec_frame(0, random.randint(0, 255))[:random.randint(3, 60)]
+        if jitter:
+            d = jittered(d, jitter)
+        corpus.append(edges_from(d, t0))
+        t0 = (t0 + 120000) & ((1 << 30) - 1)
+    return corpus
+
+def load_captures(paths):
+    from ir_rx.capture import read
+    corpus = []
+    for path in paths:
+        corpus.extend(list(times) for _, _, times in read(path))
+    return corpus
+
+'''-------------------------------Bench---------------------------------------'''
+def make(cls, results):
+    dec = cls(Pin(99), False, False, lambda cmd, addr, ext: results.append((cmd, addr)))
+    dec.error_function(lambda cmd: results.append((cmd, 0)))
+    dec.close()  # no pin irq or timer, edges are fed directly
+    return dec
+
+# Preload each edge list into its own array('i') sized like the receiver's
+# buffer so the timed loop is just swapping buffers and decoding
+def prepare(dec, corpus):
+    n = len(dec._times)
+    prepared = []
+    for edges in corpus:
+        times = array('i', (0 for _ in range(n)))
+        for i in range(min(len(edges), n)):
+            times[i] = edges[i] & 0x3fffffff
+        prepared.append((times, len(edges)))
+    return prepared
+
+def replay(dec, prepared):
+    for times, nedges in prepared:
+        dec._times = times
+        dec.edge = nedges
+        dec.decode(None)
+
+class Runner:
+    def __init__(self, cls, corpus):
+        self.results = []
+        self.dec = make(cls, self.results)
+        self.prepared = prepare(self.dec, corpus)
+        replay(self.dec, self.prepared)  # warm up, and keep the results for comparison
+        self.first = list(self.results)
+        self.rates = []
+
+    # One timed round, decodes per second
+    def round(self, seconds):
+        count = 0
+        start = host_time.perf_counter()
+        while True:
+            del self.results[:]
+            replay(self.dec, self.prepared)
+            count += len(self.prepared)
+            elapsed = host_time.perf_counter() - start
+            if elapsed >= seconds:
+                break
+        self.rates.append(count / elapsed)
+
+def bench(corpus, rounds, seconds):
+    old = Runner(LegacyNEC, corpus)
+    new = Runner(CurrentNEC, corpus)
+    for i in range(rounds):
+        for r in ((old, new) if i % 2 == 0 else (new, old)):
+            r.round(seconds)
+    return old, new
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='NEC decoder throughput benchmark')
+    parser.add_argument('--frames', type=int, default=2000, help='synthetic edge arrays')
+    parser.add_argument('--jitter', type=int, default=120, help='+- us noise per duration')
+    parser.add_argument('--rounds', type=int, default=21, help='timed rounds per decoder')
+    parser.add_argument('--seconds', type=float, default=0.2, help='time per decoder per round')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('captures', nargs='*', help='ir_rx.capture files to add')
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+    corpus = build_corpus(args.frames, args.jitter) + load_captures(args.captures)
+    old, new = bench(corpus, args.rounds, args.seconds)
+    agree = sum(a == b for a, b in zip(old.first, new.first))
+    best_old = max(old.rates)
+    best_new = max(new.rates)
+    print('edge arrays   %d, %d rounds of %.2f s each' % (len(corpus), args.rounds, args.seconds))
+    print('legacy        %10.0f decodes/s best (spread %.2f)' % (best_old, min(old.rates) / best_old))
+    print('current       %10.0f decodes/s best (spread %.2f, %.2fx)' % (
+        best_new, min(new.rates) / best_new, best_new / best_old))
+    ratios = sorted(n / o for o, n in zip(old.rates, new.rates))  # paired rounds, back to back
+    print('round ratio   median %.2fx, range %.2fx-%.2fx' % (ratios[len(ratios) // 2], ratios[0], ratios[-1]))
+    print('agreement     %d/%d results identical' % (agree, len(corpus)))
+    return 0 if agree == len(corpus) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+'''
+Filename: tools/bench_switch.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Panel switch latency benchmark, original blocking irq handler v the edge flag + switch timer path
+Version: 1.0
+
+Usage:
+- python tools/bench_switch.py [--press-ms 100] [--hold-ms 1200] [--bounce 3]
+    presses then holds the top switch on the virtual clock with each path and reports per case:
+    time inside the pin irq handler, press to the first pwm duty change (the light responding),
+    how late that is after the light could know (release for a press, the 800ms threshold for a hold),
+    and the longest any one callback ran (ir edges, fade ticks and the display all wait that long)
+
+Notes:
+- host tool, the current path is the unmodified pwm_light on the sim stand-ins
+- LegacyPanel is the original check_switch_state() for the top switch, verbatim apart from set_x()
+    writing the duty straight to the pwm, the original also wrote the display from inside the irq
+    so its real handler times were longer still
+- virtual clock times: only sleeps and bus transfers take time, python code itself takes none, so the
+    current handler reads 0 here, on the board it is the irq_stats() figure (tens of us)
+'''
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sim
+sim.install()
+
+import time
+from sim.clock import clock
+from sim.machine import Pin, PWM
+
+TOP = 20
+HOLD_MS = 800  #hold_threshold on both paths
+
+'''------------------------------Baseline-------------------------------------'''
+class LegacyPanel:
+    def __init__(self):
+        self.pwm = PWM(Pin(6))
+        self.pwm.freq(1000)
+        self.top_sw = Pin(TOP, Pin.IN, Pin.PULL_UP)
+        self.top_sw_last_state = 1
+        self.hold_threshold = 0.8
+        self.high_thresh = 63000
+        self.increment = 1000
+        self.x = 32767
+        self.pwm.duty_u16(abs(self.x - 65535))
+        self.top_sw.irq(trigger=Pin.IRQ_FALLING, handler=lambda pin: self.check_switch_state())
+
+    def set_x(self, val):
+        self.x = val
+        self.pwm.duty_u16(abs(val - 65535))
+
+    def top_hold(self):
+        if self.x != 0:
+            self.set_x(self.high_thresh)
+
+    def top_press(self):
+        x = self.x
+        if x != 0:
+            if x < self.high_thresh - self.increment:
+                x += self.increment
+            else:
+                x = self.high_thresh
+            self.set_x(x)
+
+    def check_switch_state(self):
+        debounce_delay = 50  # Debounce time in milliseconds (adjust if needed)
+
+        if self.top_sw.value() == 0 and self.top_sw_last_state == 1:
+            time.sleep_ms(debounce_delay)  #short debounce
+            if self.top_sw.value() == 0:  #check if still pressed
+                press_time = time.ticks_ms() #start counting time
+                while self.top_sw.value() == 0:
+                    time.sleep(0.01) #more delay
+                    if time.ticks_diff(time.ticks_ms(), press_time) > self.hold_threshold * 1000: #if held
+                        self.top_hold()
+                        break
+                else:
+                    self.top_press()
+                while self.top_sw.value() == 0:  #wait for release
+                    time.sleep(0.01)
+                self.top_sw_last_state = 1  #only update on release
+
+def legacy():
+    return LegacyPanel().pwm
+
+def current():
+    import pwm_light
+    pwm_light.start_pwm_light()
+    return pwm_light.pwm
+
+'''-------------------------------Timing--------------------------------------'''
+class Probe:
+    # wraps the clock's callback runner, outermost callbacks give the stall, the pin handler its own time
+    def __init__(self, handler):
+        self.handler = handler
+        self.handler_us = 0
+        self.stall_us = 0
+        self.depth = 0
+        self.call = clock._call
+        clock._call = self._call
+
+    def _call(self, fn, *args):
+        start = clock.now_us
+        self.depth += 1
+        try:
+            self.call(fn, *args)
+        finally:
+            self.depth -= 1
+        took = clock.now_us - start
+        if fn is self.handler:
+            self.handler_us = max(self.handler_us, took)
+        if not self.depth:
+            self.stall_us = max(self.stall_us, took)
+
+    def close(self):
+        clock._call = self.call
+
+def run(boot, hold_ms, bounce):
+    sim.reset()
+    sim.install()
+    pwm = boot()
+    probe = Probe(Pin(TOP)._handler)
+    t0 = 100000
+    start = len(pwm.history)
+    sim.press(TOP, t0 // 1000, hold_ms, bounce)
+    t0 += bounce * 400  #contact settles, the press proper starts here
+    clock.run_until(t0 + (hold_ms + 1000) * 1000)
+    probe.close()
+    changes = [t for t, _ in pwm.history[start:] if t >= t0]
+    response = changes[0] - t0 if changes else -1
+    return probe.handler_us, response, probe.stall_us
+
+'''-----------------------------Report----------------------------------------'''
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Panel switch latency benchmark')
+    parser.add_argument('--press-ms', type=int, default=100, help='short press length')
+    parser.add_argument('--hold-ms', type=int, default=1200, help='hold length, past the 800ms threshold')
+    parser.add_argument('--bounce', type=int, default=3, help='contact bounces before the press')
+    args = parser.parse_args(argv)
+    print('%-8s %-6s %11s %12s %8s %9s' % ('path', 'input', 'handler ms', 'response ms', 'late ms', 'stall ms'))
+    for name, boot in (('legacy', legacy), ('current', current)):
+        for kind, ms, due in (('press', args.press_ms, args.press_ms), ('hold', args.hold_ms, HOLD_MS)):
+            handler, response, stall = run(boot, ms, args.bounce)
+            print('%-8s %-6s %11.2f %12.2f %8.2f %9.2f' % (name, kind, handler / 1000, response / 1000,
+                                                          response / 1000 - due, stall / 1000))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+'''
+Filename: tools/ir_replay.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Replay recorded ir edge captures through IR_RX decoders on the host
+Version: 1.0
+
+Usage:
+- python tools/ir_replay.py replay captures/*.bin [--decoder NEC_8 NEC_16] [--set T_ONE_SPACE=1000]
+    feeds every captured burst straight into each decoder's decode() at full speed and
+    reports results per code, error rate and host decode latency,
+    --decoder takes names from ir_rx.nec or a dotted path to any IR_RX subclass,
+    --set overrides decoder attributes (thresholds) to try tuning without a remote
+- python tools/ir_replay.py synth out.bin [--presses 40] [--jitter 150] [--seed 1]
+    records simulated noisy NEC presses/holds through ir_rx.capture under the sim,
+    handy for checking the pipeline before real captures exist
+
+Notes:
+- captures come from ir_rx.capture (record() on the board or Capture.tap() on the live receiver)
+- host tool, runs on the sim stand-ins so ir_rx imports unchanged
+'''
+
+import argparse
+import importlib
+import os
+import random
+import sys
+import time as host_time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sim
+sim.install()
+
+from sim.machine import Pin
+from ir_rx import IR_RX
+from ir_rx.capture import read
+
+'''------------------------------Decoders-------------------------------------'''
+CODES = {getattr(IR_RX, n): n for n in ('REPEAT', 'BADSTART', 'BADBLOCK', 'BADREP',
+                                        'OVERRUN', 'BADDATA', 'BADADDR')}
+
+def load_decoder(name):
+    if '.' in name:
+        mod, cls = name.rsplit('.', 1)
+    else:
+        mod, cls = 'ir_rx.nec', name
+    return getattr(importlib.import_module(mod), cls)
+
+def parse_value(text):
+    try:
+        return int(text, 0)
+    except ValueError:
+        return float(text)
+
+def make(cls, overrides, results):
+    dec = cls(Pin(99), lambda cmd, addr, ext: results.append((cmd, addr)))
+    dec.error_function(lambda cmd: results.append((cmd, 0)))
+    dec.close()  # no pin irq or timer, edges are fed directly
+    for name, value in overrides:
+        setattr(dec, name, value)
+    return dec
+
+'''-------------------------------Replay--------------------------------------'''
+def replay(cls, bursts, overrides):
+    results = []
+    dec = make(cls, overrides, results)
+    size = len(dec._times)
+    latency = []
+    for nedges, times in bursts:
+        buf = dec._times
+        n = min(len(times), size)
+        for i in range(n):
+            buf[i] = times[i] & 0x3fffffff
+        dec.edge = min(nedges, size)
+        t = host_time.perf_counter_ns()
+        dec.decode(None)
+        latency.append(host_time.perf_counter_ns() - t)
+    return results, latency
+
+def summarise(name, results, latency):
+    counts = {}
+    for cmd, _ in results:
+        key = CODES.get(cmd, 'data') if cmd < 0 else 'data'
+        counts[key] = counts.get(key, 0) + 1
+    total = len(results)
+    errors = sum(v for k, v in counts.items() if k not in ('data', 'REPEAT'))
+    latency = sorted(latency)
+    print('%s' % name)
+    print('  bursts      %d' % total)
+    for key in sorted(counts, key=lambda k: -counts[k]):
+        print('  %-11s %d' % (key, counts[key]))
+    print('  error rate  %.1f%%' % (100 * errors / total if total else 0))
+    if latency:
+        print('  latency     mean %.1f us, p99 %.1f us, max %.1f us (host)' % (
+            sum(latency) / len(latency) / 1000, latency[int(len(latency) * 0.99)] / 1000,
+            latency[-1] / 1000))
+    cmds = {}
+    for cmd, addr in results:
+        if cmd >= 0:
+            cmds[(cmd, addr)] = cmds.get((cmd, addr), 0) + 1
+    if cmds:
+        print('  codes       ' + ', '.join('0x%02x@0x%04x x%d' % (c, a, n) for (c, a), n in sorted(cmds.items())))
+
+def cmd_replay(args):
+    bursts = []
+    for path in args.captures:
+        bursts.extend((nedges, times) for _, nedges, times in read(path))
+    overrides = []
+    for item in args.set:
+        name, _, value = item.partition('=')
+        overrides.append((name, parse_value(value)))
+    for name in args.decoder:
+        results, latency = replay(load_decoder(name), bursts, overrides)
+        summarise(name, results, latency)
+
+'''--------------------------------Synth--------------------------------------'''
+def cmd_synth(args):
+    import sim.ir
+    from sim.clock import clock
+    from ir_rx.capture import record
+    random.seed(args.seed)
+    pin = Pin(17)
+    t = 200000
+    keys = (0x45, 0x46, 0x47, 0x44, 0x40, 0x43, 0x07, 0x15, 0x09, 0x16, 0x18, 0x52)
+    for _ in range(args.presses):
+        repeats = random.choice((0, 0, 1, 3, 8))
+        end = sim.ir.press(pin, random.choice(keys), addr=0x00, t_us=t,
+                           repeats=repeats, jitter=args.jitter)
+        t = end + random.randint(300000, 900000)
+    n = record(pin, args.output, seconds=t // 1000000 + 1)
+    print('%d bursts written to %s (%.1f s virtual)' % (n, args.output, clock.now_us / 1e6))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='IR capture replay harness')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('replay', help='replay capture files through decoders')
+    p.add_argument('captures', nargs='+')
+    p.add_argument('--decoder', nargs='+', default=['NEC_8', 'NEC_16'])
+    p.add_argument('--set', action='append', default=[], metavar='NAME=VALUE')
+    p.set_defaults(fn=cmd_replay)
+    p = sub.add_parser('synth', help='write a simulated capture file')
+    p.add_argument('output')
+    p.add_argument('--presses', type=int, default=40)
+    p.add_argument('--jitter', type=int, default=150)
+    p.add_argument('--seed', type=int, default=1)
+    p.set_defaults(fn=cmd_synth)
+    args = parser.parse_args(argv)
+    args.fn(args)
+
+if __name__ == '__main__':
+    main()
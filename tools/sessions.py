@@ -0,0 +1,87 @@
+'''
+Filename: tools/sessions.py
+Author: Brad Farris
+Date: 10/18/26
+Description: List log sessions from the SD card's index and pull one trip out as CSV
+Version: 1.0
+
+Usage:
+- python tools/sessions.py list /media/SD
+    one line per session from sessions.idx: number, start time, records, byte range, file
+- python tools/sessions.py dump /media/SD 42 [-o trip42.csv]
+    looks session 42 up in the index (one seek, no directory scan) and writes its records as CSV
+    with the columns tools/soc_fit.py reads (ms, mv, ma, temp_c10, ...)
+
+Notes:
+- host tool, uses the board's session.py and datalog.py on the sim stand-ins
+- opening the index applies a journal entry left by a power cut, same as the board does at boot
+- start times are the board's time.time(), only wall clock time once something sets its RTC
+'''
+
+import argparse
+import csv
+import os
+import sys
+import time as host_time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sim
+sim.install()
+
+import datalog
+import session
+
+INDEX = 'sessions.idx'
+STATES = {session.OPEN: 'open', session.CLOSED: 'closed'}
+
+def open_index(card):
+    path = os.path.join(card, INDEX)
+    if not os.path.exists(path):
+        raise SystemExit('%s: no session index' % path)
+    return session.SessionIndex(path)
+
+def cmd_list(args):
+    idx = open_index(args.card)
+    print('%-7s %-19s %-6s %8s %-17s %s' % ('session', 'start', 'state', 'records', 'bytes', 'file'))
+    for n in range(idx.first, idx.next):
+        rec = idx.get(n)
+        if rec is None:
+            print('%-7d (missing)' % n)
+            continue
+        s, state, start_s, records, first, end, name = rec
+        start = host_time.strftime('%Y-%m-%d %H:%M:%S', host_time.gmtime(start_s))
+        print('%-7d %-19s %-6s %8d %8d-%-8d %s' % (s, start, STATES.get(state, state), records, first, end, name))
+    idx.close()
+
+def cmd_dump(args):
+    idx = open_index(args.card)
+    rec = idx.get(args.session)
+    idx.close()
+    if rec is None:
+        raise SystemExit('session %d not in the index (%d-%d)' % (args.session, idx.first, idx.next - 1))
+    path = os.path.join(args.card, rec[6])
+    rows = datalog.read(path)
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    w = csv.writer(out)
+    w.writerow(datalog.FIELDS)
+    w.writerows(rows)
+    if args.output:
+        out.close()
+        print('session %d: %d records from %s -> %s' % (args.session, len(rows), path, args.output))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Log sessions on the SD card')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('list', help='list sessions in the index')
+    p.add_argument('card', help='SD card mount point or a copy of it')
+    p.set_defaults(fn=cmd_list)
+    p = sub.add_parser('dump', help='write one session as CSV')
+    p.add_argument('card')
+    p.add_argument('session', type=int)
+    p.add_argument('-o', '--output', help='CSV file (default stdout)')
+    p.set_defaults(fn=cmd_dump)
+    args = parser.parse_args(argv)
+    args.fn(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+'''
+Filename: tools/soc_fit.py
+Author: Brad Farris
+Date: 10/18/26
+Description: Fit the battery state of charge model from logged data and export it for soc.py
+Version: 1.0
+
+Usage:
+- python tools/soc_fit.py fit logs/*.csv [--test held_out.csv ...] [--capacity-mah 7000] [-o soc_model.py]
+    fits R(T) and SoC(resting voltage), reports error on held out logs with the board's fixed point code
+    and writes the coefficients module to copy to the board
+- python tools/soc_fit.py check soc_model.py logs/*.csv
+    error of an existing exported model against logs
+
+Log format (CSV with a header row, extra columns ignored, or a datalog .bin/.BIN file straight off the SD card):
+- ms, mv, ma       timestamp, terminal voltage, load current (INA260 units)
+- temp_c10         optional, tenths C (dht22), 25.0C assumed without it
+- soc              optional, reference state of charge 0-100, otherwise each log must be a full
+                   discharge (full battery -> cutoff) and soc is coulomb counted over it, or from
+                   --capacity-mah if the log starts full but doesn't run to empty
+
+Notes:
+- needs NumPy (host only)
+- R(T) comes from load steps (current changing by more than --step-ma between samples): R = -dV/dI,
+    fitted as a quadratic in temperature, then resting voltage = v + i * R(T) and SoC is a polynomial
+    (--degree) in resting voltage, both over inputs normalised to -1..1
+- without --test the last log is held out (or the last 20% of the only log)
+- coefficients are exported as Q12 ints, evaluation with soc.estimate (the code that runs on the board)
+    gives the reported error, so quantisation and clamping are included
+'''
+
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+Q = 12
+ONE = 1 << Q
+COEFF_LIMIT = 1 << 17  #keeps acc * x under 2^30 in soc.horner (|x| <= 2^12)
+T_DEFAULT = 250
+
+'''--------------------------------Logs---------------------------------------'''
+class Log:
+    def __init__(self, path, ms, mv, ma, temp, soc):
+        self.path = path
+        self.ms = ms
+        self.mv = mv
+        self.ma = ma
+        self.temp = temp
+        self.soc = soc  #0-100, None until referenced
+
+    def split(self, fraction):
+        n = int(len(self.ms) * fraction)
+        cut = lambda a: (a[:n], a[n:]) if a is not None else (None, None)
+        parts = list(zip(*(cut(a) for a in (self.ms, self.mv, self.ma, self.temp, self.soc))))
+        return Log(self.path, *parts[0]), Log(self.path + ' (held out)', *parts[1])
+
+def load_csv(path):
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        raise SystemExit('%s: no rows' % path)
+    col = lambda name: np.array([float(r[name]) for r in rows]) if name in rows[0] else None
+    ms, mv, ma = col('ms'), col('mv'), col('ma')
+    if ms is None or mv is None or ma is None:
+        raise SystemExit('%s: needs ms, mv and ma columns' % path)
+    temp = col('temp_c10')
+    if temp is None:
+        temp = np.full(len(ms), float(T_DEFAULT))
+    return Log(path, ms, mv, ma, temp, col('soc'))
+
+def load_bin(path):
+    import sim
+    sim.install()  #datalog.py imports micropython
+    import datalog
+    rows = datalog.read(path)
+    if not rows:
+        raise SystemExit('%s: no records' % path)
+    col = lambda name: np.array([float(r[datalog.FIELDS.index(name)]) for r in rows])
+    temp = col('temp_c10')
+    temp[temp == datalog.TEMP_NONE] = T_DEFAULT
+    return Log(path, col('ms'), col('mv'), col('ma'), temp, None)
+
+def load_log(path):
+    return load_bin(path) if path.lower().endswith('.bin') else load_csv(path)  #card names are L0000042.BIN
+
+def reference_soc(log, capacity_mah):
+    # coulomb count, trapezoid over the sample times
+    if log.soc is not None:
+        return
+    hours = np.diff(log.ms) / 3600000.0
+    used = np.concatenate(([0.0], np.cumsum((log.ma[1:] + log.ma[:-1]) / 2 * hours)))
+    total = capacity_mah or used[-1]
+    log.soc = np.clip(100.0 * (1 - used / total), 0, 100)
+
+'''-------------------------------Fitting-------------------------------------'''
+def span(values):
+    lo, hi = float(np.min(values)), float(np.max(values))
+    center = int(round((lo + hi) / 2))
+    scale = max(1, int(np.ceil((hi - lo) / 2)))
+    return center, scale
+
+def fit_resistance(logs, step_ma, degree=2):
+    t, r = [], []
+    for log in logs:
+        di = np.diff(log.ma)
+        dv = np.diff(log.mv)
+        steps = np.abs(di) > step_ma
+        r.extend(-dv[steps] / di[steps] * 1000)  #mOhm
+        t.extend(log.temp[1:][steps])
+    if len(r) < 3:
+        raise SystemExit('only %d load steps over %d mA, vary the load while logging' % (len(r), step_ma))
+    t, r = np.array(t), np.array(r)
+    keep = (r > 0) & (r < np.percentile(r, 95) * 2)  #drop steps caught mid conversion
+    t, r = t[keep], r[keep]
+    t_center, t_scale = span(t)
+    r_scale = max(1, int(np.ceil(np.max(np.abs(r)))))
+    x = (t - t_center) / t_scale
+    deg = min(degree, len(np.unique(t)) - 1)
+    coeffs = np.polyfit(x, r / r_scale, deg) if deg > 0 else np.array([np.mean(r) / r_scale])
+    print('R(T): %d load steps, %.1f-%.1f mOhm, T %.1f-%.1fC' % (len(r), r.min(), r.max(),
+                                                               t.min() / 10, t.max() / 10))
+    return coeffs, t_center, t_scale, r_scale
+
+def fit_soc(logs, r_model, degree):
+    coeffs, t_center, t_scale, r_scale = r_model
+    rest, soc = [], []
+    for log in logs:
+        r = np.polyval(coeffs, np.clip((log.temp - t_center) / t_scale, -1, 1)) * r_scale
+        rest.append(log.mv + log.ma * r / 1000)
+        soc.append(log.soc / 100)
+    rest, soc = np.concatenate(rest), np.concatenate(soc)
+    v_center, v_scale = span(rest)
+    return np.polyfit((rest - v_center) / v_scale, soc, degree), v_center, v_scale
+
+'''-------------------------------Export--------------------------------------'''
+def quantise(coeffs):
+    q = [int(round(c * ONE)) for c in coeffs]
+    worst = max(abs(c) for c in q)
+    if worst >= COEFF_LIMIT:
+        raise SystemExit('coefficient %d too large for Q12 on the board, lower --degree' % worst)
+    return tuple(q)
+
+def render(r_model, soc_model, source):
+    r_coeffs, t_center, t_scale, r_scale = r_model
+    soc_coeffs, v_center, v_scale = soc_model
+    return """'''
+Filename: soc_model.py
+Description: Battery model coefficients for soc.py, generated by tools/soc_fit.py
+Source: %s
+
+Notes:
+- Q12 ints, highest power first, inputs normalised as (value - CENTER) / SCALE
+- regenerate with tools/soc_fit.py, don't edit by hand
+'''
+
+# internal resistance vs temperature (tenths C), output * R_SCALE mOhm
+T_CENTER = %d
+T_SCALE = %d
+R_SCALE = %d
+R_COEFFS = %r
+
+# state of charge (0-1) vs resting voltage (mV)
+V_CENTER = %d
+V_SCALE = %d
+SOC_COEFFS = %r
+""" % (source, t_center, t_scale, r_scale, quantise(r_coeffs), v_center, v_scale, quantise(soc_coeffs))
+
+def load_model(path):
+    import sim
+    sim.install()  #soc.py imports micropython
+    spec = importlib.util.spec_from_file_location('soc_model', path)
+    model = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(model)
+    sys.modules['soc_model'] = model
+    sys.modules.pop('soc', None)
+    import soc
+    return soc
+
+'''------------------------------Validate-------------------------------------'''
+def report(soc, logs):
+    for log in logs:
+        est = np.array([soc.estimate(int(v), int(i), int(t))
+                        for v, i, t in zip(log.mv, log.ma, log.temp)])
+        err = est - log.soc
+        print('%s: %d samples, mean abs %.2f%%, rms %.2f%%, max %.2f%% (board fixed point)' % (
+            log.path, len(err), np.mean(np.abs(err)), np.sqrt(np.mean(err ** 2)), np.max(np.abs(err))))
+
+def cmd_fit(args):
+    logs = [load_log(p) for p in args.logs]
+    for log in logs:
+        reference_soc(log, args.capacity_mah)
+    if args.test:
+        test = [load_log(p) for p in args.test]
+        for log in test:
+            reference_soc(log, args.capacity_mah)
+    elif len(logs) > 1:
+        test = [logs.pop()]
+    else:
+        train, held = logs[0].split(0.8)
+        logs, test = [train], [held]
+    r_model = fit_resistance(logs, args.step_ma)
+    soc_model = fit_soc(logs, r_model, args.degree)
+    with open(args.output, 'w') as f:
+        f.write(render(r_model, soc_model, ', '.join(os.path.basename(p) for p in args.logs)))
+    print('wrote %s' % args.output)
+    report(load_model(args.output), test)
+
+def cmd_check(args):
+    logs = [load_log(p) for p in args.logs]
+    for log in logs:
+        reference_soc(log, args.capacity_mah)
+    report(load_model(args.model), logs)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Battery SoC model fitting')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('fit', help='fit and export a model')
+    p.add_argument('logs', nargs='+')
+    p.add_argument('--test', nargs='+', help='held out logs (default: last log)')
+    p.add_argument('--degree', type=int, default=5, help='SoC polynomial degree')
+    p.add_argument('--step-ma', type=float, default=300, help='current change that counts as a load step')
+    p.add_argument('--capacity-mah', type=float, help='battery capacity if logs are not full discharges')
+    p.add_argument('-o', '--output', default=os.path.join(ROOT, 'soc_model.py'))
+    p.set_defaults(fn=cmd_fit)
+    p = sub.add_parser('check', help='error of an exported model on logs')
+    p.add_argument('model')
+    p.add_argument('logs', nargs='+')
+    p.add_argument('--capacity-mah', type=float)
+    p.set_defaults(fn=cmd_check)
+    args = parser.parse_args(argv)
+    args.fn(args)
+
+if __name__ == '__main__':
+    main()